@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+import sys
+import os
+from unittest.mock import patch
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_cache import SemanticAnswerCache, cache_scope
+
+def _source(document_id):
+    return {'id': f"{document_id}_chunk_0", 'document_id': document_id, 'content': 'text', 'metadata': {}}
+
+class TestSemanticAnswerCache:
+    @pytest.fixture
+    def query(self):
+        """Create a query embedding"""
+        return np.random.default_rng(0).standard_normal(16).astype(np.float32)
+
+    def test_similar_query_hits(self, query):
+        """Test that a paraphrase above the threshold is served from cache"""
+        cache = SemanticAnswerCache(similarity_threshold=0.95)
+        cache.put(query, "answer", [_source('1')])
+
+        paraphrase = query + 0.01 * np.random.default_rng(1).standard_normal(16)
+        hit = cache.get(paraphrase)
+        assert hit.response == "answer"
+        assert hit.similarity > 0.95
+        assert cache.get(-query) is None
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_scope_must_match(self, query):
+        """Test that answers are not shared across k, filters or corpus generations"""
+        cache = SemanticAnswerCache()
+        cache.put(query, "answer", [], scope=cache_scope(5))
+        assert cache.get(query, scope=cache_scope(5, {'type': 'regulation'})) is None
+        assert cache.get(query, scope=cache_scope(5, generation=1)) is None
+        assert cache.get(query, scope=cache_scope(5)) is not None
+
+    def test_invalidate_documents(self, query):
+        """Test that updating or deleting a cited document drops the answer"""
+        cache = SemanticAnswerCache()
+        cache.put(query, "answer", [_source('1'), _source('2')])
+        assert cache.invalidate_documents(['3']) == 0
+        assert cache.invalidate_documents(['2']) == 1
+        assert cache.get(query) is None
+        assert len(cache) == 0
+
+    def test_lru_eviction_reuses_rows(self):
+        """Test that the least recently used answer is evicted at capacity"""
+        cache = SemanticAnswerCache(max_entries=2)
+        a, b, c = np.eye(3, dtype=np.float32)
+        cache.put(a, "a", [])
+        cache.put(b, "b", [])
+        cache.get(a)
+        cache.put(c, "c", [])
+
+        assert cache.get(b) is None
+        assert cache.get(a).response == "a"
+        assert cache.get(c).response == "c"
+        assert cache.stats()['evictions'] == 1
+
+    def test_memory_cap(self):
+        """Test that entries are evicted to stay under max_bytes"""
+        cache = SemanticAnswerCache(max_bytes=1500)
+        for i in range(4):
+            cache.put(np.eye(4, dtype=np.float32)[i], "x" * 500, [])
+        assert cache.stats()['bytes'] <= 1500
+        assert len(cache) == 3
+
+    def test_ttl_expiry(self, query):
+        """Test that entries expire after the TTL"""
+        cache = SemanticAnswerCache(ttl_seconds=10)
+        with patch('answer_cache.time.monotonic', return_value=100.0):
+            cache.put(query, "answer", [])
+        with patch('answer_cache.time.monotonic', return_value=111.0):
+            assert cache.get(query) is None
+        assert cache.stats()['expirations'] == 1
+
+    def test_disabled(self, query):
+        """Test that max_entries=0 disables caching"""
+        cache = SemanticAnswerCache(max_entries=0)
+        cache.put(query, "answer", [])
+        assert cache.get(query) is None
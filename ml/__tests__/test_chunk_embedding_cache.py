@@ -0,0 +1,102 @@
+import pytest
+import numpy as np
+import threading
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_embedding_cache import ChunkEmbeddingCache, text_key
+
+class CountingEncoder:
+    """Deterministic 8-dimensional encoder that records what it was asked to encode"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text)] * 4 + [sum(map(ord, text))] * 4 for text in texts], dtype=np.float32)
+
+class TestChunkEmbeddingCache:
+    def test_repeated_chunks_encoded_once(self):
+        """Test that duplicates within a call and across calls reach the encoder once"""
+        encoder = CountingEncoder()
+        cache = ChunkEmbeddingCache(model_name='m')
+        texts = ['boilerplate', 'clause 1', 'boilerplate']
+
+        first = cache.encode(texts, encoder)
+        second = cache.encode(['clause 1', 'clause 2', 'boilerplate'], encoder)
+        assert encoder.calls == [['boilerplate', 'clause 1'], ['clause 2']]
+        np.testing.assert_array_equal(first, CountingEncoder()(texts))
+        np.testing.assert_array_equal(second, CountingEncoder()(['clause 1', 'clause 2', 'boilerplate']))
+        stats = cache.stats()
+        assert stats['hits'] == 3 and stats['misses'] == 3
+        assert stats['hit_rate'] == 0.5
+
+    def test_persists_per_model(self, tmp_path):
+        """Test that vectors survive reopening and are never shared across models"""
+        path = str(tmp_path / 'cache' / 'embeddings.sqlite3')
+        cache = ChunkEmbeddingCache(path, model_name='minilm')
+        cache.encode(['GST return'], CountingEncoder())
+        cache.close()
+
+        reopened = ChunkEmbeddingCache(path, model_name='minilm')
+        assert reopened.stats()['bytes'] == 8 * 4
+        assert text_key('GST return') in reopened.get_many([text_key('GST return')])
+
+        other_model = ChunkEmbeddingCache(path, model_name='minilm-int8')
+        assert other_model.get_many([text_key('GST return')]) == {}
+
+    def test_size_based_eviction(self):
+        """Test that the least recently used vectors are evicted past max_bytes"""
+        cache = ChunkEmbeddingCache(model_name='m', max_bytes=4 * 32, evict_fraction=0.25)
+        encoder = CountingEncoder()
+        cache.encode(['a', 'b', 'c', 'd'], encoder)
+        assert cache.stats()['evictions'] == 0
+
+        # Touch 'a' so 'b' is the oldest, then overflow the cap
+        cache.get_many([text_key('a')])
+        cache.encode(['e'], encoder)
+        stats = cache.stats()
+        assert stats['evictions'] == 2 and stats['bytes'] == 3 * 32
+        assert set(cache.get_many([text_key(t) for t in 'abcde'])) == {text_key(t) for t in 'ade'}
+
+    def test_eviction_counts_other_writers(self, tmp_path):
+        """Test that the cap covers vectors written by another cache on the same file"""
+        path = str(tmp_path / 'embeddings.sqlite3')
+        first = ChunkEmbeddingCache(path, model_name='m', max_bytes=4 * 32, evict_fraction=0.25)
+        second = ChunkEmbeddingCache(path, model_name='m', max_bytes=4 * 32, evict_fraction=0.25)
+        encoder = CountingEncoder()
+        first.encode(['a', 'b', 'c'], encoder)
+        second.encode(['d', 'e'], encoder)
+
+        assert second.stats()['evictions'] == 2
+        assert first.stats()['bytes'] == second.stats()['bytes'] == 3 * 32
+        assert len(first) == 3
+
+    def test_concurrent_encoders(self):
+        """Test that encode can be called from several threads at once"""
+        cache = ChunkEmbeddingCache(model_name='m')
+        encoder = CountingEncoder()
+        results = {}
+
+        def work(i):
+            texts = [f'chunk {j}' for j in range(i, i + 50)]
+            results[i] = (texts, cache.encode(texts, encoder))
+
+        threads = [threading.Thread(target=work, args=(i * 25,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for texts, embeddings in results.values():
+            np.testing.assert_array_equal(embeddings, CountingEncoder()(texts))
+        assert len(cache) == 125
+
+    def test_invalid_configuration(self):
+        """Test that negative caps and out-of-range eviction fractions are rejected"""
+        with pytest.raises(ValueError):
+            ChunkEmbeddingCache(max_bytes=-1)
+        with pytest.raises(ValueError):
+            ChunkEmbeddingCache(evict_fraction=1.0)
@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_assembler import ContextAssembler
+
+def _source(content, score):
+    return {'id': content[:10], 'content': content, 'similarity_score': score}
+
+class TestContextAssembler:
+    def test_no_budget_keeps_everything(self):
+        """Test that distinct chunks are all kept, best first, when nothing constrains them"""
+        assembler = ContextAssembler(max_tokens=None)
+        sources = [_source('Tax planning guide', 0.9), _source('GST filing guide', 0.8)]
+        context = assembler.assemble(sources, chunk_embeddings=np.eye(2, 8))
+
+        assert context.text == 'Tax planning guide\n\nGST filing guide'
+        assert context.sources == sources
+        assert context.saved_tokens == 0
+
+    def test_near_duplicates_are_dropped(self):
+        """Test that chunks nearly identical to a chunk already taken are left out"""
+        assembler = ContextAssembler(max_tokens=None, duplicate_threshold=0.95)
+        sources = [_source('Section 80C limit is 1.5 lakh', 0.9),
+                   _source('Section 80C limit is 1.5 lakh.', 0.89),
+                   _source('Section 80C limit is 1.5 lakh', 0.88),
+                   _source('GST returns are filed monthly', 0.7)]
+        embeddings = np.array([[1.0, 0.0], [0.99, 0.05], [0.3, 0.9], [0.0, 1.0]])
+        context = assembler.assemble(sources, chunk_embeddings=embeddings)
+
+        # The second is a near-duplicate by embedding, the third an exact text duplicate
+        assert [source['similarity_score'] for source in context.sources] == [0.9, 0.7]
+        assert context.duplicates_dropped == 2
+        assert context.saved_tokens > 0
+
+    def test_mmr_prefers_novel_chunks(self):
+        """Test that a slightly less relevant but different chunk beats a redundant one"""
+        assembler = ContextAssembler(max_tokens=None, mmr_lambda=0.5, duplicate_threshold=1.01)
+        sources = [_source('a', 0.90), _source('b', 0.89), _source('c', 0.80)]
+        embeddings = np.array([[1.0, 0.0], [0.9, 0.436], [0.0, 1.0]])
+        context = assembler.assemble(sources, chunk_embeddings=embeddings)
+        assert [source['content'] for source in context.sources] == ['a', 'c', 'b']
+
+    def test_budget_trims_to_relevant_sentences(self):
+        """Test that a chunk over the remaining budget is cut down to its sentences matching the query"""
+        assembler = ContextAssembler(max_tokens=40, min_trim_tokens=8)
+        first = 'Old regime deductions include standard deduction and HRA exemption for salaried taxpayers.'
+        second = ('Mutual funds carry market risk. ' * 3 + 'ELSS funds qualify for the 80C deduction. ' +
+                  'Past returns do not guarantee future results.')
+        context = assembler.assemble([_source(first, 0.9), _source(second, 0.8)], query='80C deduction ELSS')
+
+        assert context.tokens <= 40
+        assert context.chunks_truncated == 1
+        assert context.text.endswith('ELSS funds qualify for the 80C deduction.')
+        assert context.saved_tokens == context.retrieved_tokens - context.tokens > 0
+
+    def test_chunks_over_budget_are_counted(self):
+        """Test that chunks left out for lack of budget are reported"""
+        assembler = ContextAssembler(max_tokens=10, min_trim_tokens=8)
+        context = assembler.assemble([_source('x' * 36, 0.9), _source('y' * 400, 0.8), _source('z' * 400, 0.7)])
+        assert [source['content'][0] for source in context.sources] == ['x']
+        assert context.chunks_over_budget == 2
+        assert assembler.stats()['saved_tokens'] == context.saved_tokens
+
+    def test_invalid_lambda(self):
+        """Test that mmr_lambda must be a weight"""
+        with pytest.raises(ValueError):
+            ContextAssembler(mmr_lambda=1.5)
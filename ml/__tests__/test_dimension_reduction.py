@@ -0,0 +1,95 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+from dimension_reduction import (PCAProjection, TruncationProjection, projection_version,
+                                 save_projection, load_projection)
+from index_snapshot import write_snapshot, read_manifest, read_projection, PROJECTION_FILE
+
+class TestDimensionReduction:
+    @pytest.fixture
+    def embeddings(self):
+        """Create embeddings whose variance lives in a low-rank subspace"""
+        rng = np.random.default_rng(5)
+        basis = rng.standard_normal((8, 64))
+        return (rng.standard_normal((300, 8)) @ basis + 0.01 * rng.standard_normal((300, 64))).astype(np.float32)
+
+    def test_pca_preserves_low_rank_structure(self, embeddings):
+        """Test that PCA keeps nearly all variance and pairwise geometry of a low-rank sample"""
+        projection = PCAProjection(dimensions=8)
+        projection.train(embeddings)
+        reduced = projection.transform(embeddings)
+
+        assert reduced.shape == (300, 8)
+        assert projection.explained_variance_ratio > 0.99
+        np.testing.assert_allclose(reduced @ reduced.T, embeddings @ embeddings.T, rtol=1e-2, atol=1.0)
+
+    def test_full_rank_pca_is_a_rotation(self, embeddings):
+        """Test that PCA to the input dimension preserves inner products exactly"""
+        projection = PCAProjection(dimensions=64)
+        projection.train(embeddings)
+        reduced = projection.transform(embeddings)
+        np.testing.assert_allclose(reduced @ reduced.T, embeddings @ embeddings.T, rtol=1e-3, atol=1e-2)
+
+    def test_pca_rejects_small_sample(self, embeddings):
+        """Test that PCA needs at least as many training vectors as output dimensions"""
+        with pytest.raises(ValueError):
+            PCAProjection(dimensions=32).train(embeddings[:10])
+
+    def test_truncation_keeps_prefix(self, embeddings):
+        """Test that truncation keeps the leading dimensions"""
+        projection = TruncationProjection(dimensions=16)
+        np.testing.assert_array_equal(projection.transform(embeddings), embeddings[:, :16])
+        np.testing.assert_array_equal(projection.transform(embeddings[0]), embeddings[0, :16])
+
+    def test_version_tracks_parameters(self, embeddings):
+        """Test that the version changes whenever the fitted projection does"""
+        first, second = PCAProjection(dimensions=8), PCAProjection(dimensions=8)
+        first.train(embeddings)
+        second.train(embeddings[:150])
+
+        assert projection_version(first).startswith('pca-8-')
+        assert projection_version(first) != projection_version(second)
+        assert projection_version(TruncationProjection(16)) != projection_version(TruncationProjection(32))
+
+    def test_save_and_load(self, embeddings, tmp_path):
+        """Test that a saved projection transforms identically once loaded"""
+        projection = PCAProjection(dimensions=8)
+        projection.train(embeddings)
+        path = str(tmp_path / 'projection.npz')
+        save_projection(projection, path)
+
+        loaded = load_projection(path)
+        assert projection_version(loaded) == projection_version(projection)
+        np.testing.assert_array_equal(loaded.transform(embeddings), projection.transform(embeddings))
+
+    def test_snapshot_roundtrip(self, embeddings, tmp_path):
+        """Test that a snapshot carries the projection its vectors were built with"""
+        projection = PCAProjection(dimensions=8)
+        projection.train(embeddings)
+        index = VectorIndex(dimension=8)
+        ids = [str(i) for i in range(len(embeddings))]
+        index.add(ids, ids, projection.transform(embeddings))
+
+        path = write_snapshot(index, str(tmp_path), version='v1', projection=projection)
+        assert read_manifest(path)['projection'] == projection_version(projection)
+        assert projection_version(read_projection(path)) == projection_version(projection)
+
+        plain = write_snapshot(index, str(tmp_path), version='v2')
+        assert read_projection(plain) is None
+
+    def test_snapshot_rejects_mismatched_projection(self, embeddings, tmp_path):
+        """Test that a projection file swapped under a snapshot is refused"""
+        projection = TruncationProjection(dimensions=8)
+        index = VectorIndex(dimension=8)
+        index.add(['a'], ['a'], projection.transform(embeddings[:1]))
+        path = write_snapshot(index, str(tmp_path), version='v1', projection=projection)
+
+        save_projection(TruncationProjection(dimensions=16), os.path.join(path, PROJECTION_FILE))
+        with pytest.raises(ValueError):
+            read_projection(path)
@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_backends import (HashingBackend, SentenceTransformerBackend, QuantizedSentenceTransformerBackend,
+                                create_backend)
+
+class TestEmbeddingBackends:
+    def test_hashing_is_deterministic_and_normalized(self):
+        """Test that hashing embeddings are stable unit vectors"""
+        backend = HashingBackend(dimension=64)
+        texts = ["GST return filing", "Section 80C deductions", ""]
+        first = backend.encode(texts)
+        second = HashingBackend(dimension=64).encode(list(reversed(texts)))
+
+        assert first.shape == (3, 64)
+        assert first.dtype == np.float32
+        np.testing.assert_array_equal(first, second[::-1])
+        np.testing.assert_allclose(np.linalg.norm(first[:2], axis=1), 1.0, rtol=1e-6)
+        assert not first[2].any()
+
+    def test_hashing_scores_shared_words_higher(self):
+        """Test that texts sharing words are closer than unrelated ones"""
+        backend = HashingBackend()
+        query, related, unrelated = backend.encode(
+            ["tax deductions", "claiming tax deductions under 80C", "mutual fund returns"])
+        assert query @ related > query @ unrelated
+
+    def test_sentence_transformer_backend(self):
+        """Test that the backend loads the model lazily and reads its metadata"""
+        model = Mock()
+        model.get_sentence_embedding_dimension.return_value = 384
+        model.max_seq_length = 256
+        model.encode.return_value = np.zeros((1, 384))
+        backend = SentenceTransformerBackend('all-MiniLM-L6-v2')
+
+        with pytest.raises(ValueError):
+            backend.encode(["not loaded"])
+        with patch('sentence_transformers.SentenceTransformer', return_value=model) as constructor:
+            backend.load()
+
+        constructor.assert_called_once_with('all-MiniLM-L6-v2', device=None)
+        assert (backend.dimension, backend.max_seq_length) == (384, 256)
+        backend.encode(["text"])
+        model.encode.assert_called_once_with(["text"], convert_to_tensor=False)
+
+    def test_create_backend(self):
+        """Test backend selection by name"""
+        assert isinstance(create_backend('hashing', dimension=32), HashingBackend)
+        quantized = create_backend('quantized', model_name='all-MiniLM-L6-v2')
+        assert isinstance(quantized, QuantizedSentenceTransformerBackend)
+        assert quantized.name == 'all-MiniLM-L6-v2-int8'
+        with pytest.raises(ValueError):
+            create_backend('word2vec')
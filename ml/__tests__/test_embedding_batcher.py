@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_batcher import EmbeddingBatcher, plan_batches, approximate_tokens
+
+def _length_encoder(calls):
+    """Encoder embedding each text as [len(text), 1], recording batch lengths"""
+    def encode(texts):
+        calls.append([len(text) for text in texts])
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+    return encode
+
+class TestPlanBatches:
+    def test_batches_cover_every_text_once(self):
+        """Test that batches partition the texts and respect both caps"""
+        lengths = np.random.default_rng(0).integers(1, 300, size=500)
+        batches = plan_batches(lengths, max_batch_tokens=1000, max_batch_size=16)
+        np.testing.assert_array_equal(np.sort(np.concatenate(batches)), np.arange(500))
+        for batch in batches:
+            assert len(batch) <= 16
+            assert len(batch) == 1 or lengths[batch].max() * len(batch) <= 1000
+
+    def test_batches_are_length_sorted(self):
+        """Test that each batch holds similar lengths, shortest batches first"""
+        lengths = [5, 100, 6, 101, 7, 102]
+        batches = plan_batches(lengths, max_batch_tokens=400, max_batch_size=3)
+        assert [sorted(batch.tolist()) for batch in batches] == [[0, 2, 4], [1, 3, 5]]
+
+    def test_oversized_text_gets_own_batch(self):
+        """Test that a text longer than the budget is still encoded"""
+        batches = plan_batches([10, 5000, 10], max_batch_tokens=100, max_batch_size=8)
+        assert [batch.tolist() for batch in batches] == [[0, 2], [1]]
+
+class TestEmbeddingBatcher:
+    def test_restores_input_order(self):
+        """Test that rows come back in the caller's order despite sorting"""
+        calls = []
+        batcher = EmbeddingBatcher(_length_encoder(calls), max_batch_tokens=64, max_batch_size=4,
+                                   token_counter=len)
+        texts = ['x' * n for n in np.random.default_rng(1).integers(1, 40, size=50)]
+        embeddings = batcher.encode(texts)
+        np.testing.assert_array_equal(embeddings[:, 0], [len(text) for text in texts])
+        assert len(calls) > 1
+        assert all(max(call) * len(call) <= 64 or len(call) == 1 for call in calls)
+
+    def test_max_tokens_caps_cost(self):
+        """Test that texts beyond the encoder's truncation length are costed at that length"""
+        batcher = EmbeddingBatcher(_length_encoder([]), token_counter=len, max_tokens=8)
+        np.testing.assert_array_equal(batcher.token_lengths(['a' * 3, 'a' * 50]), [3, 8])
+
+    def test_stats(self):
+        """Test that stats report throughput, padding and peak memory"""
+        batcher = EmbeddingBatcher(_length_encoder([]), max_batch_tokens=100, token_counter=len)
+        batcher.encode(['aa', 'aaaa', 'aaaa'])
+        stats = batcher.stats()
+        assert stats['texts'] == 3
+        assert stats['tokens'] == 10
+        assert stats['padded_tokens'] == 12
+        assert stats['peak_rss_bytes'] > 0
+        assert batcher.encode([]).shape == (0,)
+
+    def test_approximate_tokens(self):
+        """Test the four-characters-per-token estimate"""
+        assert approximate_tokens('') == 1
+        assert approximate_tokens('a' * 400) == 101
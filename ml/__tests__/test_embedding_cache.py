@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+import threading
+import sys
+import os
+from unittest.mock import patch
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_cache import EmbeddingCache, normalize_query
+
+class TestEmbeddingCache:
+    def test_normalize_query(self):
+        """Test that equivalent queries share a cache key"""
+        assert normalize_query("  What is   SIP? ") == normalize_query("what is sip?")
+
+    def test_hit_and_miss_counters(self):
+        """Test hit/miss accounting and returned vectors"""
+        cache = EmbeddingCache()
+        assert cache.get("what is sip") is None
+
+        cache.put("what is sip", np.ones(4))
+        np.testing.assert_array_equal(cache.get("What is SIP"), np.ones(4))
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = EmbeddingCache(max_entries=2)
+        cache.put("a", np.zeros(4))
+        cache.put("b", np.zeros(4))
+        cache.get("a")
+        cache.put("c", np.zeros(4))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()['evictions'] == 1
+
+    def test_memory_cap(self):
+        """Test that the byte budget bounds the cache"""
+        cache = EmbeddingCache(max_bytes=3 * (384 * 4 + 1))
+        for key in "abcde":
+            cache.put(key, np.zeros(384))
+
+        assert len(cache) == 3
+        assert cache.stats()['bytes'] <= cache.max_bytes
+
+    def test_ttl_expiry(self):
+        """Test that stale entries are treated as misses"""
+        cache = EmbeddingCache(ttl_seconds=10)
+        with patch('embedding_cache.time.monotonic', return_value=100.0):
+            cache.put("80c limit", np.ones(4))
+        with patch('embedding_cache.time.monotonic', return_value=111.0):
+            assert cache.get("80c limit") is None
+
+        assert cache.stats()['expirations'] == 1
+        assert len(cache) == 0
+
+    def test_cached_vectors_are_read_only(self):
+        """Test that callers cannot mutate cached embeddings"""
+        cache = EmbeddingCache()
+        cache.put("q", np.ones(4))
+        with pytest.raises(ValueError):
+            cache.get("q")[0] = 5.0
+
+    def test_concurrent_access(self):
+        """Test that concurrent puts and gets keep the cache consistent"""
+        cache = EmbeddingCache(max_entries=50)
+
+        def worker(offset):
+            for i in range(200):
+                cache.put(f"query {offset + i % 80}", np.ones(8))
+                cache.get(f"query {i % 80}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert stats['entries'] <= 50
+        assert stats['bytes'] == sum(len(k) + 32 for k in cache._entries)
+        assert stats['hits'] + stats['misses'] == 8 * 200
@@ -0,0 +1,89 @@
+import pytest
+import asyncio
+import threading
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executors import BoundedExecutor, ExecutionManager, PoolSaturatedError, DEFAULT_POOLS
+
+class TestBoundedExecutor:
+    def test_rejects_when_saturated(self):
+        """Test backpressure once workers and queue are full"""
+        release = threading.Event()
+        pool = BoundedExecutor('encode', max_workers=1, max_queue=1)
+
+        first = pool.submit(release.wait)
+        second = pool.submit(release.wait)
+        with pytest.raises(PoolSaturatedError):
+            pool.submit(release.wait)
+
+        release.set()
+        first.result(timeout=5)
+        second.result(timeout=5)
+        assert pool.submit(lambda: 42).result(timeout=5) == 42
+
+        stats = pool.stats()
+        assert stats['rejected'] == 1
+        assert stats['completed'] == 3
+        pool.shutdown()
+
+    def test_slots_released_on_error(self):
+        """Test that failing tasks free their slot"""
+        pool = BoundedExecutor('classify', max_workers=1, max_queue=0)
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            pool.submit(fail).result(timeout=5)
+        assert pool.submit(lambda: 'ok').result(timeout=5) == 'ok'
+        assert pool.stats()['in_flight'] == 0
+        pool.shutdown()
+
+    def test_invalid_kind(self):
+        """Test configuration validation"""
+        with pytest.raises(ValueError):
+            BoundedExecutor('ingest', kind='fiber')
+
+class TestExecutionManager:
+    def test_from_env_overrides(self):
+        """Test per-deployment pool configuration"""
+        manager = ExecutionManager.from_env({'ML_POOL_INGEST_WORKERS': '3', 'ML_POOL_INGEST_QUEUE': '0'})
+
+        assert set(manager.pools) == set(DEFAULT_POOLS)
+        assert manager.get('ingest').max_workers == 3
+        assert manager.get('ingest').max_queue == 0
+        assert manager.get('encode').max_workers == DEFAULT_POOLS['encode']['max_workers']
+        manager.shutdown()
+
+    def test_process_kind_requires_process_safe_pool(self):
+        """Test that process pools are refused for pools running unpicklable work"""
+        with pytest.raises(ValueError, match='ML_POOL_INGEST_KIND'):
+            ExecutionManager.from_env({'ML_POOL_INGEST_KIND': 'process'})
+
+        manager = ExecutionManager.from_env({'ML_POOL_INGEST_KIND': 'process'}, process_safe=['ingest'])
+        assert manager.get('ingest').kind == 'process'
+        assert manager.get('classify').kind == 'thread'
+        manager.shutdown()
+
+    def test_run_off_event_loop(self):
+        """Test that blocking work runs on a pool thread"""
+        manager = ExecutionManager({'classify': {'max_workers': 1, 'max_queue': 0}})
+
+        async def scenario():
+            return await manager.run('classify', threading.current_thread)
+
+        worker = asyncio.run(scenario())
+        assert worker is not threading.current_thread()
+        assert worker.name.startswith('ml-classify')
+        manager.shutdown()
+
+    def test_unknown_pool(self):
+        """Test lookup of an unconfigured pool"""
+        manager = ExecutionManager({'encode': {'max_workers': 1}})
+        with pytest.raises(KeyError):
+            manager.get('ingest')
+        manager.shutdown()
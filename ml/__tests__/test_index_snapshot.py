@@ -0,0 +1,69 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+from index_snapshot import write_snapshot, read_snapshot, current_snapshot, read_manifest, MappedColumn
+
+class TestIndexSnapshot:
+    @pytest.fixture
+    def index(self):
+        """Create a populated VectorIndex"""
+        rng = np.random.default_rng(11)
+        index = VectorIndex()
+        ids = [f"doc_{i}_chunk_0" for i in range(20)]
+        texts = [f"Section 80C deduction text {i} — ₹1.5 lakh" for i in range(20)]
+        metadatas = [{'document_id': f"doc_{i}", 'metadata': {'year': 2023}} for i in range(20)]
+        index.add(ids, texts, rng.standard_normal((20, 8)), metadatas)
+        return index
+
+    def test_roundtrip(self, index, tmp_path):
+        """Test that a snapshot reproduces vectors, text and metadata"""
+        path = write_snapshot(index, str(tmp_path), version='v1')
+        loaded = read_snapshot(path)
+
+        assert len(loaded) == 20
+        assert isinstance(loaded.vectors, np.memmap) or isinstance(loaded.vectors.base, np.memmap)
+        np.testing.assert_array_equal(loaded.vectors, index.vectors)
+        assert loaded.get(7) == index.get(7)
+        assert loaded.search(index.vectors[3], k=3) == index.search(index.vectors[3], k=3)
+
+    def test_current_pointer_tracks_latest(self, index, tmp_path):
+        """Test that publishing updates CURRENT atomically"""
+        assert current_snapshot(str(tmp_path)) is None
+        write_snapshot(index, str(tmp_path), version='v1')
+        write_snapshot(index, str(tmp_path), version='v2')
+
+        assert current_snapshot(str(tmp_path)) == 'v2'
+        assert read_manifest(str(tmp_path / 'v2'))['num_chunks'] == 20
+        assert not [p for p in tmp_path.iterdir() if p.name.startswith('.')]
+
+    def test_duplicate_version_rejected(self, index, tmp_path):
+        """Test that a published version is never overwritten"""
+        write_snapshot(index, str(tmp_path), version='v1')
+        with pytest.raises(FileExistsError):
+            write_snapshot(index, str(tmp_path), version='v1')
+
+    def test_loaded_index_accepts_inserts(self, index, tmp_path):
+        """Test that chunks can be added on top of a mapped snapshot"""
+        loaded = read_snapshot(write_snapshot(index, str(tmp_path), version='v1'))
+        loaded.add(['new'], ['new chunk'], np.ones((1, 8)), [{'document_id': 'new'}])
+
+        assert len(loaded) == 21
+        assert loaded.get(20)['content'] == 'new chunk'
+        assert loaded.get(0) == index.get(0)
+
+    def test_mapped_column(self):
+        """Test decoding and overflow appends in MappedColumn"""
+        data = np.frombuffer(b'abcde', dtype=np.uint8)
+        column = MappedColumn(data, np.array([0, 2, 5]), lambda b: b.decode())
+        column.append('f')
+
+        assert list(column) == ['ab', 'cde', 'f']
+        assert column[-1] == 'f'
+        with pytest.raises(IndexError):
+            column[3]
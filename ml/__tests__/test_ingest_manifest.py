@@ -0,0 +1,155 @@
+import pytest
+import os
+from unittest.mock import MagicMock
+import sys
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest_manifest import FileChange, IngestManifest, ManifestEntry, file_hash, plan_ingest, source_key
+
+VERSION = 'chunker-v1:1000/200:hashing-384:384'
+
+def _entry(path, chunk_ids, version=VERSION):
+    """Manifest entry matching a file as it is on disk"""
+    stat = os.stat(path)
+    return ManifestEntry(source_key(path), file_hash(path), stat.st_size, stat.st_mtime_ns, version, chunk_ids)
+
+class TestIngestManifest:
+    @pytest.fixture
+    def files(self, tmp_path):
+        """Create four documents, all recorded in the manifest"""
+        paths = []
+        for name in ['same.md', 'touched.md', 'edited.md', 'upgraded.md']:
+            path = tmp_path / name
+            path.write_text(f'# {name}\nOriginal content')
+            paths.append(path)
+        return paths
+
+    def test_plan_classifies_files(self, files, tmp_path):
+        """Test that files are skipped, refreshed, re-ingested or removed as appropriate"""
+        same, touched, edited, upgraded = files
+        gone = tmp_path / 'gone.md'
+        manifest = {source_key(path): _entry(path, [f'{path.name}_a']) for path in files}
+        manifest[source_key(upgraded)].pipeline_version = 'chunker-v0'
+        manifest[source_key(gone)] = ManifestEntry(source_key(gone), '0' * 64, 1, 1, VERSION, ['gone.md_a'])
+
+        # Same bytes with a new mtime, and an edit
+        os.utime(touched, ns=(1, 1))
+        edited.write_text('# edited.md\nNew content')
+        new = tmp_path / 'new.md'
+        new.write_text('# new')
+
+        plan = plan_ingest(files + [new], manifest, VERSION, tmp_path)
+        assert [entry.source_path for entry in plan.unchanged] == [source_key(same)]
+        assert [entry.source_path for entry in plan.touched] == [source_key(touched)]
+        assert plan.touched[0].mtime_ns == 1
+        assert [change.path.name for change in plan.changed] == ['edited.md', 'upgraded.md', 'new.md']
+        assert [entry.source_path for entry in plan.removed] == [source_key(gone)]
+
+        edited_change, upgraded_change, new_change = plan.changed
+        assert edited_change.entry.content_hash == file_hash(edited)
+        assert edited_change.reusable_chunk_ids == {'edited.md_a'}
+        # Chunks embedded by another pipeline version are re-embedded, but still replaced
+        assert upgraded_change.reusable_chunk_ids == frozenset()
+        assert upgraded_change.stale_chunk_ids(['upgraded.md_b']) == ['upgraded.md_a']
+        assert new_change.previous is None and new_change.stale_chunk_ids([]) == []
+
+    def test_force_reingests_everything(self, files):
+        """Test that a forced plan re-embeds unchanged files but still knows their old chunks"""
+        manifest = {source_key(path): _entry(path, [f'{path.name}_a']) for path in files}
+        plan = plan_ingest(files, manifest, VERSION, files[0].parent, force=True)
+        assert not plan.unchanged and not plan.touched and not plan.removed
+        assert len(plan.changed) == len(files)
+        assert all(change.reusable_chunk_ids == frozenset() for change in plan.changed)
+        assert plan.changed[0].stale_chunk_ids([]) == ['same.md_a']
+
+    def test_removed_only_within_documents_directory(self, tmp_path):
+        """Test that ingesting one directory never removes another directory's files"""
+        manifest = {}
+        directories = {}
+        for name in ['first', 'second']:
+            directory = tmp_path / name
+            (directory / 'nested').mkdir(parents=True)
+            for filename in ['a.md', 'nested/b.md']:
+                path = directory / filename
+                path.write_text(f'# {name} {filename}')
+                manifest[source_key(path)] = _entry(path, [f'{name}_{path.name}'])
+            directories[name] = directory
+
+        second = directories['second']
+        plan = plan_ingest([second / 'a.md'], manifest, VERSION, second)
+        assert not plan.removed
+        assert [entry.source_path for entry in plan.unchanged] == [source_key(second / 'a.md')]
+
+        (second / 'a.md').unlink()
+        plan = plan_ingest([], manifest, VERSION, second)
+        assert [entry.source_path for entry in plan.removed] == [source_key(second / 'a.md')]
+
+    def test_stale_chunk_ids(self, files):
+        """Test that only chunks missing from the new version are stale"""
+        previous = _entry(files[2], ['a', 'b', 'c'])
+        change = FileChange(files[2], _entry(files[2], []), previous)
+        assert change.stale_chunk_ids(['b', 'd']) == ['a', 'c']
+
+    def test_purge_deletes_chunks_in_one_statement(self, files):
+        """Test that removed files' chunks and entries go in one transaction"""
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.rowcount = 3
+        entries = [_entry(files[0], ['a', 'b']), _entry(files[1], ['c'])]
+
+        assert IngestManifest(connection).purge(entries) == 3
+        statements = [call.args for call in cursor.execute.call_args_list]
+        # Chunk ids come from the manifest rows, not the loaded entries
+        assert statements[0][0].startswith('DELETE FROM vector_embeddings')
+        assert 'unnest(chunk_ids)' in statements[0][0]
+        assert statements[0][1] == ([entries[0].source_path, entries[1].source_path],)
+        assert statements[1][1] == statements[0][1]
+        connection.commit.assert_called_once()
+
+        assert IngestManifest(connection).purge([]) == 0
+        assert cursor.execute.call_count == 2
+
+    def test_load_and_save(self, files):
+        """Test that entries are read in one query and written as upserts"""
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        entry = _entry(files[0], ['a'])
+        cursor.fetchall.return_value = [(entry.source_path, entry.content_hash, entry.size, entry.mtime_ns,
+                                         entry.pipeline_version)]
+        manifest = IngestManifest(connection)
+        loaded = manifest.load()
+        assert 'chunk_ids' not in cursor.execute.call_args.args[0]
+        assert loaded == {entry.source_path: _entry(files[0], [])}
+
+        manifest.save(cursor, [entry])
+        query, params = cursor.executemany.call_args.args
+        assert 'ON CONFLICT (source_path)' in query
+        assert params == [(entry.source_path, entry.content_hash, entry.size, entry.mtime_ns, VERSION, ['a'])]
+
+    def test_chunk_ids_loaded_only_when_needed(self, files):
+        """Test that chunk ids are fetched for the requested entries and touch leaves them alone"""
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        manifest = IngestManifest(connection)
+        edited, touched = _entry(files[2], []), _entry(files[1], [])
+
+        cursor.fetchall.return_value = [(edited.source_path, ['x', 'y'])]
+        manifest.load_chunk_ids([edited])
+        assert cursor.execute.call_args.args[1] == ([edited.source_path],)
+        assert edited.chunk_ids == ['x', 'y']
+
+        manifest.touch([touched])
+        query, params = cursor.executemany.call_args.args
+        assert query.startswith('UPDATE ingest_manifest') and 'chunk_ids' not in query
+        assert params == [(touched.size, touched.mtime_ns, touched.source_path)]
+
+        cursor.execute.reset_mock()
+        manifest.load_chunk_ids([])
+        cursor.execute.assert_not_called()
+
+    def test_invalid_table_name(self):
+        """Test that unsafe table names are rejected"""
+        with pytest.raises(ValueError):
+            IngestManifest(MagicMock(), table='manifest; DROP TABLE users')
@@ -0,0 +1,159 @@
+import pytest
+import threading
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest_pipeline import run_pipeline, STAGES
+
+def parse_lines(path):
+    """One chunk per non-empty line; fails on files named bad*"""
+    if os.path.basename(path).startswith('bad'):
+        raise ValueError("unreadable")
+    with open(path) as f:
+        return [{'content': line.strip()} for line in f if line.strip()]
+
+class TestIngestPipeline:
+    @pytest.fixture
+    def files(self, tmp_path):
+        """Create a few small files, one empty and one unparseable"""
+        paths = []
+        for i in range(6):
+            path = tmp_path / f'doc{i}.txt'
+            path.write_text('\n'.join(f'doc{i} line {j}' for j in range(i + 1)))
+            paths.append(path)
+        (tmp_path / 'empty.txt').write_text('')
+        (tmp_path / 'bad.txt').write_text('x')
+        return paths + [tmp_path / 'empty.txt', tmp_path / 'bad.txt']
+
+    @pytest.mark.parametrize('parse_workers', [0, 2])
+    def test_every_file_flows_through(self, files, parse_workers):
+        """Test that each file's chunks reach the writer with their own embeddings"""
+        written = {}
+        writer_threads = set()
+
+        def embed(chunks):
+            return [len(chunk['content']) for chunk in chunks]
+
+        def write(chunks, embeddings, name):
+            writer_threads.add(threading.current_thread().name)
+            written[name] = (chunks, list(embeddings))
+
+        result = run_pipeline(files, parse_lines, embed, write, parse_workers=parse_workers,
+                              embed_workers=2, queue_size=2, embed_batch_chunks=4)
+
+        # The empty file still reaches the writer, with nothing to store
+        assert written.pop('empty.txt') == ([], [])
+        assert sorted(written) == [f'doc{i}.txt' for i in range(6)]
+        for name, (chunks, embeddings) in written.items():
+            assert all(chunk['content'].startswith(name[:-4]) for chunk in chunks)
+            assert embeddings == [len(chunk['content']) for chunk in chunks]
+        assert writer_threads == {'ingest-writer'}
+
+        assert result['files'] == 7
+        assert result['chunks'] == sum(range(1, 7))
+        assert result['errors'] == ['Error processing bad.txt: unreadable']
+        assert set(result['stages']) == set(STAGES)
+        assert result['stages']['embed']['chunks'] == result['chunks']
+        assert result['stages']['parse']['files'] == 7
+
+    def test_write_failures_are_per_file(self, files):
+        """Test that a failed write is reported and later files still land"""
+        written = []
+
+        def write(chunks, embeddings, name):
+            if name == 'doc2.txt':
+                raise RuntimeError("connection reset")
+            written.append(name)
+
+        result = run_pipeline(files, parse_lines, lambda chunks: [0] * len(chunks), write, parse_workers=0)
+        assert 'Error processing doc2.txt: connection reset' in result['errors']
+        assert len(written) == 6
+        assert result['stages']['write']['files'] == 6
+
+    @pytest.mark.parametrize('embed_workers', [1, 3])
+    def test_streamed_files_finish_after_last_part(self, files, embed_workers):
+        """Test that streamed files arrive in parts and are finished once, after all of them"""
+        parts = {}
+        finished = []
+
+        def stream(path):
+            """Three-chunk batches; fails halfway through files named broken*"""
+            chunks = parse_lines(path)
+            for offset in range(0, len(chunks), 3):
+                if os.path.basename(path).startswith('broken') and offset:
+                    raise ValueError("truncated")
+                yield chunks[offset:offset + 3]
+
+        def write(chunks, embeddings, name):
+            assert len(chunks) == len(embeddings)
+            parts.setdefault(name, []).append(len(chunks))
+
+        def finish(name):
+            assert name not in finished
+            finished.append(name)
+
+        broken = files[0].parent / 'broken.txt'
+        broken.write_text('\n'.join(f'line {j}' for j in range(9)))
+        streamed = files[3:6] + [broken]
+        result = run_pipeline(files[:3], parse_lines, lambda chunks: [0] * len(chunks), write,
+                              parse_workers=0, embed_workers=embed_workers, queue_size=1, embed_batch_chunks=2,
+                              stream_paths=streamed, stream_fn=stream, finish_fn=finish)
+
+        # doc5 has 6 lines: two parts of three chunks
+        assert sorted(parts['doc5.txt']) == [3, 3]
+        assert sorted(finished) == ['doc0.txt', 'doc1.txt', 'doc2.txt', 'doc3.txt', 'doc4.txt', 'doc5.txt']
+        assert result['files'] == 6
+        assert result['chunks'] == sum(range(1, 7))
+        assert result['errors'] == ['Error processing broken.txt: truncated']
+
+    @pytest.mark.parametrize('stage', ['stream', 'embed', 'write'])
+    def test_failed_streamed_file_is_aborted(self, tmp_path, stage):
+        """Test that a file failing after some parts were written is handed to abort_fn once"""
+        path = tmp_path / 'statement.txt'
+        path.write_text('\n'.join(f'row {j}' for j in range(9)))
+        bad = tmp_path / 'bad.txt'
+        bad.write_text('x')
+        stored = {}
+        aborted = []
+
+        def stream(path):
+            """Three-chunk batches, the third one failing in the given stage"""
+            chunks = parse_lines(path)
+            for offset in range(0, len(chunks), 3):
+                if stage == 'stream' and offset == 6:
+                    raise ValueError("truncated")
+                yield [dict(chunk, last=offset == 6) for chunk in chunks[offset:offset + 3]]
+
+        def embed(chunks):
+            if stage == 'embed' and any(chunk['last'] for chunk in chunks):
+                raise RuntimeError("encoder crashed")
+            return [0] * len(chunks)
+
+        def write(chunks, embeddings, name):
+            if stage == 'write' and chunks[0]['last']:
+                raise RuntimeError("connection reset")
+            stored.setdefault(name, []).extend(chunks)
+
+        def abort(name):
+            aborted.append((name, len(stored.pop(name))))
+
+        result = run_pipeline([bad], parse_lines, embed, write, parse_workers=0, queue_size=1,
+                              embed_batch_chunks=1, stream_paths=[path], stream_fn=stream,
+                              finish_fn=lambda name: pytest.fail("failed file finished"), abort_fn=abort)
+
+        # Parts still queued when the file failed are dropped rather than written;
+        # whatever did land is undone, and bad.txt never had a part written
+        assert stored == {}
+        assert [name for name, _ in aborted] in ([], ['statement.txt'])
+        if stage == 'write':
+            assert aborted == [('statement.txt', 6)]
+        assert result['files'] == 0
+        assert len(result['errors']) == 2
+
+    def test_stream_paths_require_stream_fn(self, files):
+        """Test that streamed paths without a stream function are rejected"""
+        with pytest.raises(ValueError):
+            run_pipeline([], parse_lines, len, print, stream_paths=files)
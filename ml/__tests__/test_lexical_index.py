@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexical_index import BM25Index, tokenize, reciprocal_rank_fusion
+
+class TestTokenize:
+    def test_identifiers_kept_whole_and_split(self):
+        """Test that joined identifiers are indexed whole and by part"""
+        assert sorted(tokenize("File GSTR-3B under Section 80C.")) == \
+            sorted(['file', 'gstr-3b', 'gstr', '3b', 'under', 'section', '80c'])
+
+class TestBM25Index:
+    @pytest.fixture
+    def index(self):
+        """Create an index over a few financial snippets"""
+        index = BM25Index(initial_posting_capacity=1)
+        index.add(range(4), [
+            "Deductions under section 80C include PPF and ELSS",
+            "GSTR-3B is a monthly GST return",
+            "Section 80D covers health insurance premiums",
+            "Mutual fund SIP investments build long-term wealth",
+        ])
+        return index
+
+    def test_exact_term_ranks_first(self, index):
+        """Test that rare exact terms dominate the ranking"""
+        assert index.search("80C limit", k=2)[0][0] == 0
+        assert index.search("gstr-3b due date", k=1)[0][0] == 1
+
+    def test_no_shared_terms(self, index):
+        """Test that chunks sharing no query term are not returned"""
+        assert index.search("cryptocurrency", k=5) == []
+
+    def test_incremental_add(self, index):
+        """Test that chunks added later are searchable and postings grow"""
+        index.add([4, 5], ["Section 80C ELSS lock-in is three years", "80C 80C 80C"])
+        slots = [slot for slot, _ in index.search("80C", k=10)]
+        assert set(slots) == {0, 4, 5}
+        assert slots[0] == 5
+        assert index.stats()['indexed_chunks'] == 6
+
+    def test_mask(self, index):
+        """Test that masked-out chunks are excluded"""
+        mask = np.array([False, True, True, True])
+        assert [slot for slot, _ in index.search("section", k=5, mask=mask)] == [2]
+
+    def test_clear(self, index):
+        """Test that clear empties the index"""
+        index.clear()
+        assert len(index) == 0
+        assert index.search("80C") == []
+
+class TestReciprocalRankFusion:
+    def test_fuses_rankings(self):
+        """Test that items ranked well by both lists win"""
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=60)
+        assert [slot for slot, _ in fused] == [1, 3, 2, 4]
+        assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+    def test_weights(self):
+        """Test per-list weights"""
+        fused = reciprocal_rank_fusion([[1], [2]], weights=[1.0, 2.0])
+        assert fused[0][0] == 2
@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metadata_index import MetadataIndex, value_key
+
+class TestMetadataIndex:
+    @pytest.fixture
+    def index(self):
+        """Create an index over a few chunks of mixed metadata"""
+        index = MetadataIndex()
+        index.add(range(4), [
+            {'type': 'regulation', 'year': 2023, 'tags': ['gst', 'filing']},
+            {'type': 'regulation', 'year': '2022'},
+            {'type': 'guide', 'year': 2023, 'draft': True},
+            {'type': 'guide', 'year': 2021, 'source': None},
+        ])
+        return index
+
+    def test_single_value(self, index):
+        """Test equality filters"""
+        assert list(np.flatnonzero(index.mask({'type': 'regulation'}))) == [0, 1]
+
+    def test_and_across_fields_or_within_field(self, index):
+        """Test that fields are ANDed and listed values ORed"""
+        mask = index.mask({'type': 'regulation', 'year': [2022, 2023]})
+        assert list(np.flatnonzero(mask)) == [0, 1]
+        assert list(np.flatnonzero(index.mask({'type': 'guide', 'year': '2023'}))) == [2]
+
+    def test_list_and_bool_values(self, index):
+        """Test multi-valued fields and boolean keys"""
+        assert list(np.flatnonzero(index.mask({'tags': 'gst'}))) == [0]
+        assert list(np.flatnonzero(index.mask({'draft': True}))) == [2]
+        assert value_key(True) == 'true'
+
+    def test_unknown_field_matches_nothing(self, index):
+        """Test that unknown fields or values give an empty mask"""
+        assert not index.mask({'missing': 'x'}).any()
+        assert not index.mask({'type': 'faq'}).any()
+
+    def test_mask_size_and_growth(self):
+        """Test bitsets across word boundaries and padded masks"""
+        index = MetadataIndex(fields=['bucket'])
+        index.add(range(200), [{'bucket': i % 3, 'ignored': 'x'} for i in range(200)])
+        mask = index.mask({'bucket': 1}, size=250)
+        assert mask.shape == (250,)
+        assert list(np.flatnonzero(mask)) == list(range(1, 200, 3))
+        assert index.stats()['fields'] == {'bucket': 3}
+
+    def test_empty_filters_match_everything(self, index):
+        """Test that no filters means no restriction"""
+        assert index.mask({}).all()
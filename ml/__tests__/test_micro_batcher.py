@@ -0,0 +1,107 @@
+import pytest
+import asyncio
+import numpy as np
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from micro_batcher import MicroBatcher
+
+class RecordingEncoder:
+    """Fake encoder that records each batch it receives"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+class TestMicroBatcher:
+    def test_concurrent_requests_share_one_encode(self):
+        """Test that requests inside the window are encoded together"""
+        encoder = RecordingEncoder()
+        batcher = MicroBatcher(encoder, max_batch_size=16, max_wait_ms=20)
+
+        async def scenario():
+            results = await asyncio.gather(*[batcher.submit("q" * n) for n in range(1, 9)])
+            await batcher.close()
+            return results
+
+        results = asyncio.run(scenario())
+
+        assert len(encoder.calls) == 1
+        assert [row[0] for row in results] == list(range(1, 9))
+        assert batcher.stats()['mean_batch_size'] == 8
+
+    def test_max_batch_size_splits_batches(self):
+        """Test that no encoder call exceeds max_batch_size"""
+        encoder = RecordingEncoder()
+        batcher = MicroBatcher(encoder, max_batch_size=3, max_wait_ms=20)
+
+        async def scenario():
+            await asyncio.gather(*[batcher.submit(f"query {n}") for n in range(7)])
+            await batcher.close()
+
+        asyncio.run(scenario())
+
+        assert all(len(call) <= 3 for call in encoder.calls)
+        assert sum(len(call) for call in encoder.calls) == 7
+
+    def test_duplicate_queries_encoded_once(self):
+        """Test that identical concurrent queries share a row"""
+        encoder = RecordingEncoder()
+        batcher = MicroBatcher(encoder, max_wait_ms=20)
+
+        async def scenario():
+            results = await asyncio.gather(*[batcher.submit("what is sip") for _ in range(5)])
+            await batcher.close()
+            return results
+
+        results = asyncio.run(scenario())
+
+        assert encoder.calls == [["what is sip"]]
+        assert len(results) == 5
+        assert batcher.stats()['encoded'] == 1
+
+    def test_encoder_errors_propagate(self):
+        """Test that every waiting caller sees the encoder failure"""
+        def failing_encoder(texts):
+            raise RuntimeError("encoder down")
+
+        batcher = MicroBatcher(failing_encoder, max_wait_ms=5)
+
+        async def scenario():
+            results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+            await batcher.close()
+            return results
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    def test_worker_survives_malformed_results(self):
+        """Test that a batch with too few rows fails its callers and later batches still run"""
+        encoder = RecordingEncoder()
+        batcher = MicroBatcher(lambda texts: encoder(texts)[:1], max_wait_ms=20)
+
+        async def scenario():
+            failed = await asyncio.wait_for(
+                asyncio.gather(batcher.submit("a"), batcher.submit("bb"), return_exceptions=True), timeout=5)
+            worker = batcher._worker
+            recovered = await asyncio.wait_for(batcher.submit("ccc"), timeout=5)
+            same_worker = batcher._worker is worker and not worker.done()
+            await batcher.close()
+            return failed, same_worker, recovered
+
+        failed, same_worker, recovered = asyncio.run(scenario())
+        assert all(isinstance(result, ValueError) for result in failed)
+        assert same_worker
+        assert recovered[0] == 3
+        assert batcher.stats()['batches'] == 1
+
+    def test_rejects_invalid_batch_size(self):
+        """Test configuration validation"""
+        with pytest.raises(ValueError):
+            MicroBatcher(RecordingEncoder(), max_batch_size=0)
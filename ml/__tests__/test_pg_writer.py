@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+import io
+import json
+import struct
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pg_writer import PGVectorWriter, copy_binary, unique_rows
+
+def _parse_copy(data: bytes):
+    """Decode a PGCOPY binary stream of (text, text, vector, jsonb) tuples"""
+    stream = io.BytesIO(data)
+    assert stream.read(11) == b'PGCOPY\n\xff\r\n\x00'
+    assert struct.unpack('>ii', stream.read(8)) == (0, 0)
+    rows = []
+    while True:
+        (fields,) = struct.unpack('>h', stream.read(2))
+        if fields == -1:
+            break
+        values = []
+        for _ in range(fields):
+            (length,) = struct.unpack('>i', stream.read(4))
+            values.append(stream.read(length))
+        chunk_id, content, vector, metadata = values
+        dimension, unused = struct.unpack('>HH', vector[:4])
+        assert unused == 0 and metadata[:1] == b'\x01'
+        rows.append((chunk_id.decode(), content.decode(), np.frombuffer(vector[4:], dtype='>f4'),
+                     json.loads(metadata[1:])))
+        assert rows[-1][2].shape == (dimension,)
+    assert stream.read() == b''
+    return rows
+
+class TestPGWriter:
+    @pytest.fixture
+    def rows(self):
+        """Create chunk rows with 4-dimensional embeddings"""
+        rng = np.random.default_rng(0)
+        return [(f'doc_{i}', f'Chunk {i} about GST ₹', rng.standard_normal(4).astype(np.float32),
+                 {'source': 'doc', 'chunk_id': i}) for i in range(5)]
+
+    def test_copy_binary_roundtrip(self, rows):
+        """Test that the binary COPY stream carries ids, text, float4 vectors and jsonb metadata"""
+        parsed = _parse_copy(copy_binary(rows))
+        assert [row[0] for row in parsed] == [row[0] for row in rows]
+        assert [row[1] for row in parsed] == [row[1] for row in rows]
+        for (_, _, vector, metadata), (_, _, expected, expected_metadata) in zip(parsed, rows):
+            np.testing.assert_array_equal(vector, expected)
+            assert metadata == expected_metadata
+        assert _parse_copy(copy_binary([])) == []
+
+    def test_unique_rows_keeps_last(self, rows):
+        """Test that repeated ids collapse to their last row, like sequential upserts"""
+        replaced = ('doc_1', 'Replaced', rows[0][2], {})
+        unique = unique_rows(rows + [replaced])
+        assert len(unique) == 5
+        assert unique[-1] is replaced
+
+    def test_copy_mode_batches(self, rows):
+        """Test that copy mode stages each batch and upserts it with one statement"""
+        connection = MagicMock()
+        cursor = connection.cursor.return_value
+        writer = PGVectorWriter(connection, mode='copy', batch_size=2)
+
+        assert writer.upsert(rows) == 5
+        assert cursor.copy_expert.call_count == 3
+        upserts = [call.args[0] for call in cursor.execute.call_args_list if 'ON CONFLICT' in call.args[0]]
+        assert len(upserts) == 3
+        connection.commit.assert_not_called()
+        assert writer.stats()['rows'] == 5 and writer.stats()['batches'] == 3
+
+    def test_row_mode_executes_per_row(self, rows):
+        """Test that the baseline mode issues one INSERT per row"""
+        connection = MagicMock()
+        writer = PGVectorWriter(connection, mode='row')
+        writer.upsert(rows)
+        assert connection.cursor.return_value.execute.call_count == 5
+
+    def test_invalid_configuration(self):
+        """Test that unknown modes and unsafe table names are rejected"""
+        with pytest.raises(ValueError):
+            PGVectorWriter(MagicMock(), mode='bulk')
+        with pytest.raises(ValueError):
+            PGVectorWriter(MagicMock(), table='vectors; DROP TABLE users')
@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+import sys
+import os
+from unittest.mock import patch
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex, normalize_rows
+from quantization import ScalarQuantizer, ProductQuantizer, QuantizedIndex
+
+class TestQuantization:
+    @pytest.fixture
+    def embeddings(self):
+        """Create normalized random embeddings for testing"""
+        rng = np.random.default_rng(3)
+        return normalize_rows(rng.standard_normal((600, 32)))
+
+    def _add(self, index, embeddings):
+        ids = [str(i) for i in range(len(embeddings))]
+        index.add(ids, ids, embeddings)
+
+    def test_scalar_quantizer_roundtrip(self, embeddings):
+        """Test int8 codes reconstruct vectors and scores closely"""
+        quantizer = ScalarQuantizer()
+        quantizer.train(embeddings)
+        codes = quantizer.encode(embeddings)
+
+        assert codes.dtype == np.uint8
+        assert codes.shape == embeddings.shape
+        np.testing.assert_allclose(quantizer.decode(codes), embeddings, atol=0.01)
+        np.testing.assert_allclose(quantizer.score(codes, embeddings[0]),
+                                   embeddings @ embeddings[0], atol=0.02)
+
+    def test_product_quantizer_codes(self, embeddings):
+        """Test PQ code shape and that ADC scores match decoded vectors"""
+        quantizer = ProductQuantizer(num_subspaces=8, iterations=5)
+        quantizer.train(embeddings)
+        codes = quantizer.encode(embeddings)
+
+        assert codes.shape == (600, 8)
+        decoded = quantizer.decode(codes)
+        np.testing.assert_allclose(quantizer.score(codes, embeddings[0]),
+                                   decoded @ embeddings[0], rtol=1e-4, atol=1e-5)
+
+    def test_product_quantizer_rejects_bad_dimension(self, embeddings):
+        """Test that the dimension must split evenly into subspaces"""
+        with pytest.raises(ValueError):
+            ProductQuantizer(num_subspaces=5).train(embeddings)
+
+    @pytest.mark.parametrize("quantization,params", [('int8', {}), ('pq', {'num_subspaces': 8})])
+    def test_index_rescores_exactly(self, embeddings, quantization, params):
+        """Test that rescoring returns exact scores for the top candidates"""
+        index = QuantizedIndex(quantization=quantization, quantizer_params=params,
+                               train_size=300, rescore_factor=10)
+        self._add(index, embeddings)
+        exact = VectorIndex()
+        self._add(exact, embeddings)
+
+        assert index.is_trained
+        assert index.codes.shape[0] == 600
+        results = index.search(embeddings[5], k=5)
+        expected = exact.search(embeddings[5], k=5)
+        assert results[0] == expected[0]
+        for slot, score in results:
+            assert score == pytest.approx(float(embeddings[slot] @ embeddings[5]), abs=1e-5)
+
+    def test_search_during_add_and_training_sees_encoded_rows(self, embeddings):
+        """Test that searches racing add() and train() only use complete codes"""
+        index = QuantizedIndex(train_size=300, rescore_factor=10, initial_capacity=64)
+        query = embeddings[5]
+        seen = []
+        encode = ScalarQuantizer.encode
+
+        def encode_and_search(quantizer, vectors):
+            seen.append((len(index), index.search(query, k=5)))
+            return encode(quantizer, vectors)
+
+        with patch.object(ScalarQuantizer, 'encode', encode_and_search):
+            # Training on the 300th row, then encoding rows 300+ as they arrive
+            self._add(index, embeddings[:300])
+            index.add(['300'], ['300'], embeddings[300:301])
+            self._add(index, embeddings[301:400])
+
+        assert index.is_trained
+        for size, results in seen:
+            exact = VectorIndex()
+            self._add(exact, embeddings[:size])
+            assert results[0] == exact.search(query, k=5)[0]
+            assert all(slot < size for slot, _ in results)
+
+    def test_memory_mapped_storage(self, embeddings, tmp_path):
+        """Test that full-precision vectors can live off-heap"""
+        index = QuantizedIndex(train_size=100, storage_dir=str(tmp_path), initial_capacity=64)
+        self._add(index, embeddings)
+
+        usage = index.memory_usage()
+        assert usage['vector_bytes'] == 0
+        assert usage['codes_bytes'] == 600 * 32
+        assert len(list(tmp_path.iterdir())) == 1
+        assert index.search(embeddings[9], k=1)[0][0] == 9
+
+        # A second index on the same directory (e.g. a compaction) gets its own block
+        rebuilt = QuantizedIndex(train_size=100, storage_dir=str(tmp_path), initial_capacity=64)
+        self._add(rebuilt, embeddings[::-1].copy())
+        assert len(list(tmp_path.iterdir())) == 2
+        assert index.search(embeddings[9], k=1)[0][0] == 9
+        np.testing.assert_allclose(np.linalg.norm(index.vectors[:600], axis=1), 1, atol=1e-5)
+
+        del rebuilt
+        assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,63 @@
+import pytest
+import os
+import sys
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_ingest import RAGDocumentIngestion
+
+class TestCSVChunking:
+    def _chunks(self, path, batch_rows=2):
+        return [chunk for batch in RAGDocumentIngestion.iter_csv_file(path, batch_rows) for chunk in batch]
+
+    def test_transactions_and_summary(self, tmp_path):
+        """Test one chunk per transaction row, then a summary of every row"""
+        path = tmp_path / 'statement.csv'
+        path.write_text('date,description,amount,category,balance\n'
+                        '2024-01-01,UPI/SWIGGY,250.5,food,1000\n'
+                        '2024-01-02,NEFT/RENT,15000,rent,2000\n'
+                        '2024-01-03,UPI/ZOMATO,300,food,3000\n')
+
+        chunks = self._chunks(path)
+        assert [chunk['id'] for chunk in chunks] == [
+            'statement_transaction_0', 'statement_transaction_1', 'statement_transaction_2', 'statement_summary'
+        ]
+        assert chunks[1]['content'] == \
+            'Transaction: NEFT/RENT - Amount: 15000 - Date: 2024-01-02 - Category: rent'
+        assert chunks[-1]['content'] == ("Data summary: 3 records from statement.csv. Total amount: 15550.5. "
+                                         "Categories: {'food': 2, 'rent': 1}.")
+
+    def test_amounts_as_written_in_bank_exports(self, tmp_path):
+        """Test that amounts keep their text as written, and only numbers add to the total"""
+        path = tmp_path / 'export.csv'
+        path.write_text('date,description,amount\n'
+                        '2024-01-01,NEFT/RENT,"1,234.50"\n'
+                        '2024-01-02,CHQ BOUNCE,-\n'
+                        '2024-01-03,UPI/IRCTC,100.00\n'
+                        '2024-01-04,ATM/WDL,\n')
+
+        chunks = self._chunks(path)
+        assert [chunk['content'] for chunk in chunks] == [
+            'Transaction: NEFT/RENT - Amount: 1,234.50 - Date: 2024-01-01',
+            'Transaction: CHQ BOUNCE - Amount: - - Date: 2024-01-02',
+            'Transaction: UPI/IRCTC - Amount: 100.00 - Date: 2024-01-03',
+            'Transaction: ATM/WDL - Amount: N/A - Date: 2024-01-04',
+            'Data summary: 4 records from export.csv. Total amount: 1334.5. ',
+        ]
+
+    def test_summary_without_known_columns(self, tmp_path):
+        """Test that a CSV with none of the chunker's columns still gets its summary chunk"""
+        path = tmp_path / 'holdings.csv'
+        path.write_text('isin,units\nINE002A01018,10\nINE467B01029,5\nINE040A01034,7\n')
+
+        chunks = self._chunks(path)
+        assert [chunk['id'] for chunk in chunks] == ['holdings_summary']
+        assert chunks[0]['content'] == 'Data summary: 3 records from holdings.csv. '
+
+    @pytest.mark.parametrize('content', ['', 'isin,units\n'])
+    def test_empty_files_have_no_chunks(self, tmp_path, content):
+        """Test that empty and header-only files produce nothing"""
+        path = tmp_path / 'empty.csv'
+        path.write_text(content)
+        assert self._chunks(path) == []
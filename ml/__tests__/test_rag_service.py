@@ -12,8 +12,8 @@ from rag_service import RAGService
 class TestRAGService:
     @pytest.fixture
     def rag_service(self):
-        """Create a RAGService instance for testing"""
-        return RAGService()
+        """Create a RAGService instance for testing, on the model-free hashing encoder"""
+        return RAGService(embedding_backend='hashing')
 
     @pytest.fixture
     def sample_documents(self):
@@ -43,15 +43,28 @@ class TestRAGService:
         assert rag_service.llm_model is None
 
     @patch('sentence_transformers.SentenceTransformer')
-    def test_initialize_models(self, mock_sentence_transformer, rag_service):
+    def test_initialize_models(self, mock_sentence_transformer):
         """Test model initialization"""
         mock_model = Mock()
         mock_sentence_transformer.return_value = mock_model
         
+        rag_service = RAGService(load_models=False)
         rag_service.initialize_models()
         
         assert rag_service.embedding_model is not None
         mock_sentence_transformer.assert_called_once()
+    
+    def test_hashing_backend_end_to_end(self, rag_service):
+        """Test that the hashing backend embeds documents and queries with no model"""
+        rag_service.vector_store.clear()
+        rag_service.store_documents([
+            {'id': 'tax', 'content': 'Section 80C tax deductions for salaried employees'},
+            {'id': 'gst', 'content': 'Monthly GST return filing procedure'},
+        ])
+        
+        assert rag_service.model_name == 'hashing-384'
+        assert rag_service.get_embedding_dimensions() == 384
+        assert rag_service.retrieve_relevant_documents("GST return filing", k=1)[0]['id'] == 'gst_chunk_0'
 
     def test_chunk_document(self, rag_service):
         """Test document chunking functionality"""
@@ -90,9 +103,7 @@ class TestRAGService:
 
     def test_store_documents(self, rag_service, sample_documents):
         """Test document storage in vector database"""
-        # Mock the vector store
-        rag_service.vector_store = Mock()
-        rag_service.vector_store.add_documents.return_value = ['1', '2', '3']
+        rag_service.vector_store.clear()
         
         # Mock embedding generation
         with patch.object(rag_service, 'generate_embeddings') as mock_embeddings:
@@ -100,20 +111,34 @@ class TestRAGService:
             
             result = rag_service.store_documents(sample_documents)
             
-            assert result == ['1', '2', '3']
-            rag_service.vector_store.add_documents.assert_called_once()
+            assert len(result) == 3
+            assert all(chunk_id.startswith(f"{doc['id']}_chunk_") for chunk_id, doc in zip(result, sample_documents))
+            assert len(rag_service.vector_store) == 3
 
+    def test_batch_process_documents_caps_batch_size(self, rag_service):
+        """Test that ingestion batches are cut by document count and by total characters"""
+        documents = [{'id': str(i), 'content': 'x' * 100, 'metadata': {}} for i in range(7)]
+        with patch.object(rag_service, 'store_documents', side_effect=lambda docs: [d['id'] for d in docs]) as store:
+            ids = rag_service.batch_process_documents(documents, batch_size=3, max_batch_chars=250)
+        assert ids == [str(i) for i in range(7)]
+        assert [len(call.args[0]) for call in store.call_args_list] == [2, 2, 2, 1]
+        
+        with patch.object(rag_service, 'store_documents', side_effect=lambda docs: [d['id'] for d in docs]) as store:
+            rag_service.batch_process_documents(documents, batch_size=3)
+        assert [len(call.args[0]) for call in store.call_args_list] == [3, 3, 1]
+    
     def test_retrieve_relevant_documents(self, rag_service):
         """Test document retrieval"""
         query = "How to file GST returns?"
         
-        # Mock the vector store
-        rag_service.vector_store = Mock()
-        mock_docs = [
-            Mock(content="GST filing guide", metadata={'type': 'gst_guide'}),
-            Mock(content="Tax planning tips", metadata={'type': 'tax_guide'})
-        ]
-        rag_service.vector_store.similarity_search.return_value = mock_docs
+        # Populate the vector index
+        rag_service.vector_store.clear()
+        rag_service.vector_store.add(
+            ['1_chunk_0', '2_chunk_0', '3_chunk_0'],
+            ["GST filing guide", "Tax planning tips", "Investment basics"],
+            np.random.rand(3, 384),
+            [{'metadata': {'type': 'gst_guide'}}, {'metadata': {'type': 'tax_guide'}}, {'metadata': {}}]
+        )
         
         # Mock embedding generation
         with patch.object(rag_service, 'generate_embeddings') as mock_embeddings:
@@ -122,7 +147,7 @@ class TestRAGService:
             documents = rag_service.retrieve_relevant_documents(query, k=2)
             
             assert len(documents) == 2
-            assert all(hasattr(doc, 'content') for doc in documents)
+            assert all('content' in doc and 'similarity_score' in doc for doc in documents)
 
     def test_generate_response(self, rag_service):
         """Test response generation with RAG"""
@@ -148,15 +173,15 @@ class TestRAGService:
         
         # Mock all components
         rag_service.embedding_model = Mock()
-        rag_service.vector_store = Mock()
         rag_service.llm_model = Mock()
+        rag_service.query_cache.clear()
         
         # Mock embedding generation
         rag_service.embedding_model.encode.return_value = np.random.rand(1, 384)
         
-        # Mock document retrieval
-        mock_docs = [Mock(content="Tax planning guide", metadata={'type': 'tax_guide'})]
-        rag_service.vector_store.similarity_search.return_value = mock_docs
+        # Populate the vector index
+        rag_service.vector_store.clear()
+        rag_service.vector_store.add(['1_chunk_0'], ["Tax planning guide"], np.random.rand(1, 384))
         
         # Mock response generation
         rag_service.llm_model.generate.return_value = "Tax planning involves..."
@@ -177,9 +202,8 @@ class TestRAGService:
         """Test handling when no documents are found"""
         query = "Very specific query that won't match anything"
         
-        # Mock the vector store to return empty results
-        rag_service.vector_store = Mock()
-        rag_service.vector_store.similarity_search.return_value = []
+        # Start from an empty vector index
+        rag_service.vector_store.clear()
         
         with patch.object(rag_service, 'generate_embeddings') as mock_embeddings:
             mock_embeddings.return_value = np.random.rand(1, 384)
@@ -203,21 +227,26 @@ class TestRAGService:
 
     def test_document_metadata_preservation(self, rag_service, sample_documents):
         """Test that document metadata is preserved during processing"""
-        # Mock the vector store
-        rag_service.vector_store = Mock()
-        rag_service.vector_store.add_documents.return_value = ['1', '2', '3']
+        rag_service.vector_store.clear()
         
         with patch.object(rag_service, 'generate_embeddings') as mock_embeddings:
             mock_embeddings.return_value = np.random.rand(3, 384)
             
             result = rag_service.store_documents(sample_documents)
             
-            # Check that the vector store was called with documents that have metadata
-            call_args = rag_service.vector_store.add_documents.call_args
-            stored_docs = call_args[0][0]
+            # Check that the indexed chunks kept their document metadata
+            stored_docs = list(rag_service.vector_store.metadatas)
             
             assert all('metadata' in doc for doc in stored_docs)
             assert all(doc['metadata']['year'] == '2023' for doc in stored_docs)
+        
+        # Sources carry the document's own metadata, not the stored chunk record
+        rag_service.query_cache.clear()
+        results = rag_service.retrieve_relevant_documents("GST filing procedures", k=3)
+        by_document = {doc['document_id']: doc for doc in results}
+        assert set(by_document) == {'1', '2', '3'}
+        for document in sample_documents:
+            assert by_document[document['id']]['metadata'] == document['metadata']
 
     @patch('os.path.exists')
     def test_load_existing_embeddings(self, mock_exists, rag_service):
@@ -243,3 +272,268 @@ class TestRAGService:
         assert file_path.exists()
         loaded_embeddings = np.load(str(file_path))
         np.testing.assert_array_equal(embeddings, loaded_embeddings)
+
+    def test_metadata_filters(self, rag_service):
+        """Test that retrieval only returns chunks matching the metadata filters"""
+        rag_service.vector_store.clear()
+        rag_service.query_cache.clear()
+        rag_service.vector_store.add(
+            ['1_chunk_0', '2_chunk_0', '3_chunk_0'],
+            ['GST rules 2023', 'GST rules 2022', 'Investment guide'],
+            np.random.rand(3, 384),
+            [
+                {'document_id': '1', 'metadata': {'type': 'regulation', 'year': '2023'}},
+                {'document_id': '2', 'metadata': {'type': 'regulation', 'year': '2022'}},
+                {'document_id': '3', 'metadata': {'type': 'guide', 'year': '2023'}},
+            ]
+        )
+        rag_service.embedding_model = Mock()
+        rag_service.embedding_model.encode.return_value = np.random.rand(1, 384)
+        
+        results = rag_service.retrieve_relevant_documents(
+            "GST", k=3, filters={'type': 'regulation', 'year': 2023}
+        )
+        assert [doc['id'] for doc in results] == ['1_chunk_0']
+        
+        results = rag_service.retrieve_relevant_documents("GST", k=3, filters={'document_id': ['2', '3']})
+        assert sorted(doc['id'] for doc in results) == ['2_chunk_0', '3_chunk_0']
+    
+    def test_hybrid_retrieval_finds_exact_terms(self, rag_service):
+        """Test that BM25 fusion surfaces chunks naming the queried identifier"""
+        rag_service.vector_store.clear()
+        rag_service.query_cache.clear()
+        rng = np.random.default_rng(0)
+        texts = [f"General personal finance note number {i}" for i in range(50)]
+        texts[37] = "Claim deductions under section 80C before March"
+        rag_service.vector_store.add([f"{i}_chunk_0" for i in range(50)], texts, rng.random((50, 384)))
+        rag_service.embedding_model = Mock()
+        rag_service.embedding_model.encode.return_value = rng.random((1, 384))
+        
+        results = rag_service.retrieve_relevant_documents("What is 80C?", k=3)
+        assert '37_chunk_0' in [doc['id'] for doc in results]
+        assert all(-1.0 <= doc['similarity_score'] <= 1.0 for doc in results)
+        
+        rag_service.hybrid = False
+        results = rag_service.retrieve_relevant_documents("What is 80C?", k=3)
+        assert len(results) == 3
+    
+    def test_update_and_delete_tombstone_document_chunks(self, rag_service):
+        """Test that updates replace a document's chunks and deletes hide them immediately"""
+        rag_service.vector_store.clear()
+        rag_service.compaction_threshold = None
+        rag_service.embedding_model = Mock()
+        rag_service.embedding_model.encode.side_effect = lambda texts, **kwargs: np.random.rand(len(texts), 384)
+        
+        ids = rag_service.store_documents([
+            {'id': 'a', 'content': 'Section 80C deductions. ' * 40, 'metadata': {'type': 'tax'}},
+            {'id': 'b', 'content': 'GST filing guide', 'metadata': {'type': 'gst'}},
+        ])
+        assert ids[-1] == 'b_chunk_0'
+        assert ids[:2] == ['a_chunk_0', 'a_chunk_1']
+        assert rag_service.vector_store.get(len(ids) - 1)['metadata']['chunk_index'] == 0
+        
+        rag_service.update_document('a', 'Revised 80C limits', {'type': 'tax'})
+        results = rag_service.retrieve_relevant_documents("80C", k=10)
+        assert sorted(doc['id'] for doc in results) == ['a_chunk_0', 'b_chunk_0']
+        assert [doc['content'] for doc in results if doc['id'] == 'a_chunk_0'] == ['Revised 80C limits']
+        
+        rag_service.delete_document('b')
+        results = rag_service.retrieve_relevant_documents("GST", k=10, filters={'type': 'gst'})
+        assert results == []
+        
+        stats = rag_service.get_document_stats()
+        assert stats['total_documents'] == 1
+        assert stats['total_chunks'] == 1
+        assert stats['deleted_chunks'] == len(ids)
+    
+    def test_compaction_drops_deleted_chunks(self, rag_service):
+        """Test that compaction rebuilds the index from live chunks once enough are deleted"""
+        rag_service.vector_store.clear()
+        rag_service.embedding_model = Mock()
+        rag_service.embedding_model.encode.side_effect = lambda texts, **kwargs: np.random.rand(len(texts), 384)
+        rag_service.store_documents([
+            {'id': str(i), 'content': f'Finance note {i}', 'metadata': {'type': 'note'}} for i in range(10)
+        ])
+        old_index = rag_service.vector_store
+        
+        rag_service.delete_document('0')
+        assert rag_service.vector_store is old_index
+        rag_service.delete_document('1')
+        rag_service.delete_document('2')
+        rag_service._compaction_thread.join()
+        
+        index = rag_service.vector_store
+        assert index is not old_index
+        assert len(index) == 7 and index.num_deleted == 0
+        assert rag_service.compactions == 1
+        assert sorted(doc['id'] for doc in rag_service.retrieve_relevant_documents("note", k=10)) == \
+            [f'{i}_chunk_0' for i in range(3, 10)]
+        
+        rag_service.update_document('5', 'Updated finance note', {'type': 'note'})
+        results = rag_service.retrieve_relevant_documents("note", k=10, filters={'document_id': '5'})
+        assert [doc['content'] for doc in results] == ['Updated finance note']
+    
+    def test_answer_cache_serves_repeat_queries(self, rag_service):
+        """Test that a repeated query skips retrieval and generation until its document changes"""
+        rag_service.vector_store.clear()
+        rag_service.vector_store.add(
+            ['1_chunk_0'], ['Tax planning guide'], np.random.rand(1, 384), [{'document_id': '1'}]
+        )
+        rag_service.query_cache.clear()
+        rag_service.answer_cache.clear()
+        rag_service.embedding_model = Mock()
+        rag_service.embedding_model.encode.return_value = np.random.rand(1, 384)
+        rag_service.llm_model = Mock()
+        rag_service.llm_model.generate.return_value = "Tax planning involves..."
+        
+        first = rag_service.run_pipeline("How to plan taxes?", k=1)
+        second = rag_service.run_pipeline("How to plan taxes?", k=1)
+        assert not first.cached
+        assert second.cached
+        assert second.response == first.response
+        assert [doc['id'] for doc in second.sources] == ['1_chunk_0']
+        rag_service.llm_model.generate.assert_called_once()
+        
+        rag_service.delete_document('1')
+        assert not rag_service.run_pipeline("How to plan taxes?", k=1).cached
+        assert rag_service.run_pipeline("How to plan taxes?", k=1).cached
+        
+        # A new document may be the better source, so earlier answers are not served
+        rag_service.store_documents([{'id': '2', 'content': 'Tax saving under section 80C'}])
+        assert not rag_service.run_pipeline("How to plan taxes?", k=1).cached
+    
+    def test_run_pipeline_batch(self, rag_service):
+        """Test that a batch of queries is encoded in one call and answered in order"""
+        rag_service.vector_store.clear()
+        rag_service.vector_store.add(
+            ['1_chunk_0', '2_chunk_0', '3_chunk_0'],
+            ['Tax planning guide', 'GST filing guide', 'Investment guide'],
+            np.eye(3, 384)
+        )
+        rag_service.query_cache.clear()
+        rag_service.answer_cache.clear()
+        rag_service.embedding_model = Mock()
+        rag_service.embedding_model.encode.return_value = np.eye(3, 384)[[1, 0, 2]]
+        rag_service.llm_model = Mock()
+        rag_service.llm_model.generate.side_effect = lambda query, context: f"answer: {query}"
+        
+        queries = ["GST?", "Tax?", "Invest?"]
+        results = rag_service.run_pipeline_batch(queries, k=1)
+        rag_service.embedding_model.encode.assert_called_once()
+        assert [result.query for result in results] == queries
+        assert [result.sources[0]['id'] for result in results] == ['2_chunk_0', '1_chunk_0', '3_chunk_0']
+        assert [result.response for result in results] == [f"answer: {query}" for query in queries]
+        assert set(results[0].timings) == {'embed', 'answer_cache', 'search', 'assemble_context', 'generate', 'total'}
+        
+        again = rag_service.run_pipeline_batch(queries[:2], k=1)
+        assert all(result.cached for result in again)
+        assert rag_service.run_pipeline_batch([], k=1) == []
+        with pytest.raises(ValueError):
+            rag_service.run_pipeline_batch(["ok", " "], k=1)
+    
+    def test_run_pipeline_single_pass(self, rag_service):
+        """Test that a query is encoded and searched exactly once"""
+        rag_service.vector_store.clear()
+        rag_service.vector_store.add(
+            ['1_chunk_0', '2_chunk_0', '3_chunk_0'],
+            ['Tax planning guide', 'GST filing guide', 'Investment guide'],
+            np.random.rand(3, 384)
+        )
+        rag_service.query_cache.clear()
+        rag_service.embedding_model = Mock()
+        rag_service.embedding_model.encode.return_value = np.random.rand(1, 384)
+        rag_service.llm_model = Mock()
+        rag_service.llm_model.generate.return_value = "Tax planning involves..."
+        
+        with patch.object(rag_service.vector_store, 'search', wraps=rag_service.vector_store.search) as mock_search:
+            result = rag_service.run_pipeline("How to plan taxes?", k=2)
+        
+        assert result.response == "Tax planning involves..."
+        assert len(result.sources) == 2
+        assert set(result.timings) == {'embed', 'answer_cache', 'search', 'assemble_context', 'generate', 'total'}
+        rag_service.embedding_model.encode.assert_called_once()
+        mock_search.assert_called_once()
+    
+    def test_dimension_reduction(self, tmp_path):
+        """Test that chunks and queries share one projection, fitted on the corpus and kept in snapshots"""
+        reduction_params = {'method': 'pca', 'dimensions': 4, 'train_size': 8}
+        service = RAGService(embedding_backend='hashing', reduction_params=reduction_params)
+        rng = np.random.default_rng(0)
+        service.embedding_model = Mock()
+        service.embedding_model.encode.side_effect = lambda texts, **kwargs: rng.standard_normal((len(texts), 384))
+        
+        service.store_documents([{'id': str(i), 'content': f'Finance note {i}'} for i in range(4)])
+        assert service.vector_store.dimension == 384
+        service.store_documents([{'id': str(i), 'content': f'Finance note {i}'} for i in range(4, 10)])
+        assert service.vector_store.dimension == 4
+        
+        stats = service.get_document_stats()
+        assert stats['total_chunks'] == 10
+        assert stats['index_dimensions'] == 4
+        assert stats['projection'].startswith('pca-4-')
+        
+        # The query goes through the same projection, so a stored chunk's own embedding finds it
+        service.embedding_model.encode.side_effect = None
+        service.embedding_model.encode.return_value = np.ones((1, 384))
+        service.store_documents([{'id': 'probe', 'content': 'Probe note'}])
+        assert service.retrieve_relevant_documents("Probe", k=1)[0]['id'] == 'probe_chunk_0'
+        
+        service.save_snapshot(str(tmp_path))
+        restored = RAGService(embedding_backend='hashing', reduction_params=reduction_params)
+        restored.embedding_model = service.embedding_model
+        # Metadata and BM25 indexes are built on first use, not while loading
+        with patch('rag_service.ChunkStore.sync') as sync:
+            restored.load_snapshot(str(tmp_path))
+        sync.assert_not_called()
+        assert restored.get_document_stats()['projection'] == stats['projection']
+        assert restored.retrieve_relevant_documents("Probe", k=1)[0]['id'] == 'probe_chunk_0'
+    
+    def test_truncation_applies_to_store_and_query(self):
+        """Test that prefix truncation reduces both stored chunks and queries"""
+        service = RAGService(embedding_backend='hashing', reduction_params={'method': 'truncate', 'dimensions': 3})
+        service.embedding_model = Mock()
+        service.embedding_model.encode.return_value = np.eye(3, 384)
+        service.store_documents([{'id': str(i), 'content': f'Note {i}'} for i in range(3)])
+        assert service.vector_store.dimension == 3
+        
+        service.embedding_model.encode.return_value = np.eye(3, 384)[[2]]
+        assert service.retrieve_relevant_documents("Note", k=1)[0]['id'] == '2_chunk_0'
+        
+        with pytest.raises(ValueError):
+            RAGService(reduction_params={'method': 'umap'})
+    
+    def test_pipeline_context_drops_duplicates(self, rag_service):
+        """Test that duplicated chunks are kept out of the prompt and the savings are reported"""
+        rag_service.vector_store.clear()
+        rag_service.query_cache.clear()
+        rag_service.answer_cache.clear()
+        rag_service.store_documents([
+            {'id': 'a', 'content': 'Section 80C deductions are capped at 1.5 lakh per year'},
+            {'id': 'b', 'content': 'Section 80C deductions are capped at 1.5 lakh per year'},
+            {'id': 'c', 'content': 'GST returns are filed monthly by registered businesses'},
+        ])
+        rag_service.llm_model = Mock()
+        rag_service.llm_model.generate.return_value = "80C allows up to 1.5 lakh"
+        
+        result = rag_service.run_pipeline("80C deduction limit", k=3)
+        prompt_context = rag_service.llm_model.generate.call_args[0][1]
+        assert prompt_context.count('Section 80C') == 1
+        assert len(result.sources) == 2
+        assert result.context['duplicates_dropped'] == 1
+        assert result.context['saved_tokens'] > 0
+        assert rag_service.get_document_stats()['context_assembler']['saved_tokens'] == result.context['saved_tokens']
+    
+    def test_chunk_cache_skips_stored_chunks(self, tmp_path, sample_documents):
+        """Test that re-storing unchanged documents is served from the chunk embedding cache"""
+        cache_params = {'path': str(tmp_path / 'chunks.sqlite3')}
+        service = RAGService(embedding_backend='hashing', chunk_cache_params=cache_params)
+        service.store_documents(sample_documents)
+        assert service.get_document_stats()['chunk_cache']['misses'] == 3
+        
+        # A new service process finds the vectors on disk
+        restarted = RAGService(embedding_backend='hashing', chunk_cache_params=cache_params)
+        with patch.object(restarted.document_batcher, 'encode') as encode:
+            restarted.store_documents(sample_documents)
+        encode.assert_not_called()
+        assert restarted.get_document_stats()['chunk_cache']['hits'] == 3
+        assert restarted.retrieve_relevant_documents("GST filing", k=1)[0]['id'] == '3_chunk_0'
@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+from sharded_index import ShardedIndex, shard_bounds, SHARD_ALIGNMENT
+
+class TestShardedIndex:
+    @pytest.fixture
+    def embeddings(self):
+        """Create random embeddings for testing"""
+        rng = np.random.default_rng(7)
+        return rng.standard_normal((3000, 32)).astype(np.float32)
+
+    @pytest.fixture
+    def exact(self, embeddings):
+        """Create the single-shard reference index"""
+        index = VectorIndex()
+        ids = [str(i) for i in range(len(embeddings))]
+        index.add(ids, ids, embeddings)
+        return index
+
+    @pytest.fixture
+    def sharded(self, embeddings):
+        """Create a ShardedIndex grown over several inserts"""
+        index = ShardedIndex(num_shards=3, min_shard_rows=256, initial_capacity=100)
+        ids = [str(i) for i in range(len(embeddings))]
+        for start in range(0, len(embeddings), 700):
+            index.add(ids[start:start + 700], ids[start:start + 700], embeddings[start:start + 700])
+        yield index
+        index.close()
+
+    def test_shard_bounds(self):
+        """Test that shards cover every row once and start on aligned rows"""
+        bounds = shard_bounds(1000, 4)
+        assert bounds[0][0] == 0 and bounds[-1][1] == 1000
+        assert all(hi == lo for (_, hi), (lo, _) in zip(bounds, bounds[1:]))
+        assert all(lo % SHARD_ALIGNMENT == 0 for lo, _ in bounds)
+        assert len(shard_bounds(10, 16)) == 1
+
+    def test_matches_single_shard(self, sharded, exact, embeddings):
+        """Test that scattered search returns exactly the single-scan results"""
+        queries = np.random.default_rng(8).standard_normal((10, 32))
+        for query in queries:
+            assert sharded.search(query, k=10) == exact.search(query, k=10)
+
+    def test_mask_and_deletes(self, sharded, embeddings):
+        """Test that masks and tombstones are honoured across shards"""
+        reference = VectorIndex()
+        reference.add(sharded.ids, sharded.texts, embeddings)
+        mask = np.random.default_rng(9).random(len(embeddings)) < 0.5
+        sharded.delete([0, 1500, 2999])
+        reference.delete([0, 1500, 2999])
+
+        for query in embeddings[[0, 1500, 10]]:
+            assert sharded.search(query, k=5, mask=mask) == reference.search(query, k=5, mask=mask)
+            assert sharded.search(query, k=5) == reference.search(query, k=5)
+
+    def test_from_storage_copies_into_shared_memory(self, exact):
+        """Test that snapshot storage is served from shared memory with identical results"""
+        index = ShardedIndex.from_storage(exact.vectors, exact.ids, exact.texts, exact.metadatas)
+        index.num_shards, index.min_shard_rows = 2, 256
+        query = np.ones(32)
+        assert index.search(query, k=5) == exact.search(query, k=5)
+        index.close()
+        assert len(index) == 0
@@ -0,0 +1,35 @@
+import pytest
+import subprocess
+import sys
+import os
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('sentence_transformers', 'torch', 'pandas', 'sklearn')
+
+
+def _imported_after(statement: str):
+    """Run an import in a fresh interpreter and return which heavy modules it pulled in"""
+    script = (
+        f"import sys\n{statement}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=ML_DIR,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+class TestLazyImports:
+    def test_rag_service_import_is_light(self):
+        """Test importing the RAG service does not load model libraries"""
+        assert _imported_after("import rag_service") == []
+
+    def test_service_construction_defers_models(self):
+        """Test RAGService(load_models=False) is not ready and loads nothing"""
+        assert _imported_after(
+            "from rag_service import RAGService\n"
+            "service = RAGService(load_models=False)\n"
+            "assert not service.ready\n"
+            "assert service.health_check()['status'] == 'starting'"
+        ) == []
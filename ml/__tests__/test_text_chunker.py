@@ -0,0 +1,64 @@
+import pytest
+import sys
+import os
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_chunker import iter_chunks, sentence_boundaries, last_sentence_boundary
+
+class TestTextChunker:
+    @pytest.fixture
+    def document(self):
+        """Create a multi-sentence document"""
+        return " ".join(f"Sentence number {i} explains Section 80C.1 rules." for i in range(200))
+
+    def test_chunks_respect_size_and_sentences(self, document):
+        """Test that chunks fit the size limit and end at sentence boundaries"""
+        chunks = list(iter_chunks(document, chunk_size=300, overlap=40))
+        assert len(chunks) > 1
+        assert all(len(chunk.text) <= 300 for chunk in chunks)
+        assert all(chunk.text.endswith('rules.') for chunk in chunks)
+
+    def test_spans_cover_document_with_overlap(self, document):
+        """Test that consecutive spans overlap and reach the end"""
+        chunks = list(iter_chunks(document, chunk_size=300, overlap=40))
+        assert chunks[0].start == 0
+        assert chunks[-1].end == len(document)
+        for previous, current in zip(chunks, chunks[1:]):
+            assert current.start == previous.end - 40
+            assert current.start > previous.start
+
+    def test_forward_progress_without_boundaries(self):
+        """Test that text without spaces or punctuation is cut at the size limit"""
+        chunks = list(iter_chunks("x" * 1000, chunk_size=100, overlap=99))
+        assert all(len(chunk.text) <= 100 for chunk in chunks)
+        assert [chunk.start for chunk in chunks[:3]] == [0, 1, 2]
+        assert chunks[-1].end == 1000
+
+    def test_word_boundary_fallback(self):
+        """Test that chunks without sentence ends break between words"""
+        chunks = list(iter_chunks("alpha beta gamma delta " * 50, chunk_size=64, overlap=0))
+        assert all(not chunk.text.endswith(('alph', 'bet', 'gamm', 'delt')) for chunk in chunks)
+
+    def test_last_sentence_boundary(self):
+        """Test that the last boundary inside the window is found, looking one character ahead"""
+        text = "One. Two. Three.x"
+        assert last_sentence_boundary(text, 0, len(text)) == text.index('Two.') + 4
+        assert last_sentence_boundary(text, 0, 4) == 4
+        assert last_sentence_boundary(text, 5, 8) == -1
+
+    def test_invalid_overlap(self):
+        """Test that an overlap as large as the chunk size is rejected"""
+        with pytest.raises(ValueError):
+            list(iter_chunks("text " * 100, chunk_size=50, overlap=50))
+
+    def test_token_counter(self, document):
+        """Test optional tokenizer token counts"""
+        chunks = list(iter_chunks(document, chunk_size=300, overlap=0, token_counter=lambda t: len(t.split())))
+        assert all(chunk.num_tokens == len(chunk.text.split()) for chunk in chunks)
+
+    def test_sentence_boundaries(self):
+        """Test that decimals and abbreviations inside tokens are not boundaries"""
+        text = "Limit is Rs.1.5 lakh. Next!\n\nNew paragraph"
+        assert sentence_boundaries(text) == [text.index('lakh.') + 5, text.index('Next!') + 5, text.index('New') - 1]
@@ -0,0 +1,240 @@
+import pytest
+import numpy as np
+import sys
+import os
+from unittest.mock import patch
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex, normalize_rows, top_k_indices, top_k_rows
+import ann_index
+from ann_index import IVFIndex
+
+class TestVectorIndex:
+    @pytest.fixture
+    def embeddings(self):
+        """Create random embeddings for testing"""
+        rng = np.random.default_rng(42)
+        return rng.standard_normal((50, 16)).astype(np.float32)
+
+    @pytest.fixture
+    def index(self, embeddings):
+        """Create a populated VectorIndex"""
+        index = VectorIndex(initial_capacity=8)
+        ids = [f"doc_{i}" for i in range(len(embeddings))]
+        texts = [f"chunk text {i}" for i in range(len(embeddings))]
+        metadatas = [{'document_id': f"doc_{i}"} for i in range(len(embeddings))]
+        index.add(ids, texts, embeddings, metadatas)
+        return index
+
+    def test_add_grows_capacity(self, index, embeddings):
+        """Test that the vector matrix grows in blocks and keeps its rows"""
+        assert len(index) == 50
+        assert index.capacity >= 50
+        assert index.dimension == 16
+        np.testing.assert_allclose(index.vectors, normalize_rows(embeddings), rtol=1e-6)
+
+    def test_vectors_are_normalized(self, index):
+        """Test that stored vectors have unit norm"""
+        norms = np.linalg.norm(index.vectors, axis=1)
+        np.testing.assert_allclose(norms, np.ones(len(index)), rtol=1e-5)
+
+    def test_search_matches_brute_force(self, index, embeddings):
+        """Test that search returns the exact top-k by cosine similarity"""
+        query = embeddings[7] + 0.01
+        results = index.search(query, k=5)
+
+        expected_scores = normalize_rows(embeddings) @ normalize_rows(query)[0]
+        expected = np.argsort(-expected_scores)[:5]
+
+        assert [slot for slot, _ in results] == list(expected)
+        assert results[0][0] == 7
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_search_honors_k(self, index, embeddings):
+        """Test that k limits the number of results"""
+        assert len(index.search(embeddings[0], k=3)) == 3
+        assert len(index.search(embeddings[0], k=500)) == 50
+        assert index.search(embeddings[0], k=0) == []
+
+    def test_search_empty_index(self):
+        """Test searching an empty index"""
+        index = VectorIndex()
+        assert index.search(np.ones(4), k=5) == []
+
+    def test_get_returns_parallel_arrays(self, index):
+        """Test that text and metadata are kept aligned with vectors"""
+        doc = index.get(3)
+        assert doc['id'] == 'doc_3'
+        assert doc['content'] == 'chunk text 3'
+        assert doc['metadata'] == {'document_id': 'doc_3'}
+
+    def test_dimension_mismatch(self, index):
+        """Test that mismatched dimensions are rejected"""
+        with pytest.raises(ValueError):
+            index.add(['x'], ['x'], np.ones((1, 8)))
+        with pytest.raises(ValueError):
+            index.search(np.ones(8), k=1)
+
+    def test_search_with_mask(self, index, embeddings):
+        """Test that pre-filter and in-search masking agree with brute force"""
+        query = embeddings[0] + 0.1
+        scores = normalize_rows(embeddings) @ normalize_rows(query)[0]
+
+        for matching in (3, 40):  # below and above the pre-filter limit
+            mask = np.zeros(len(index), dtype=bool)
+            mask[-matching:] = True
+            expected = np.argsort(-np.where(mask, scores, -np.inf))[:5]
+            assert [slot for slot, _ in index.search(query, k=5, mask=mask)] == list(expected[:min(5, matching)])
+
+    def test_search_with_empty_mask(self, index, embeddings):
+        """Test that a mask matching nothing returns no results"""
+        assert index.search(embeddings[0], k=5, mask=np.zeros(len(index), dtype=bool)) == []
+
+    def test_deleted_rows_are_skipped(self, index, embeddings):
+        """Test that tombstoned rows never come back from search or search_slots"""
+        assert index.delete([3, 3, 7]) == 2
+        assert index.delete([3]) == 0
+        assert index.num_deleted == 2
+        assert index.num_live == len(embeddings) - 2
+
+        results = index.search(embeddings[3], k=len(embeddings))
+        assert {3, 7}.isdisjoint(slot for slot, _ in results)
+        assert len(results) == len(embeddings) - 2
+
+        mask = np.zeros(len(embeddings), dtype=bool)
+        mask[[3, 4]] = True
+        assert [slot for slot, _ in index.search(embeddings[3], k=5, mask=mask)] == [4]
+        assert [slot for slot, _ in index.search_slots(embeddings[3], 5, [3, 7, 9])] == [9]
+
+        index.add(['new'], ['new chunk'], embeddings[3:4])
+        assert index.search(embeddings[3], k=1)[0][0] == len(index) - 1
+
+        index.clear()
+        assert index.num_deleted == 0 and index.live_mask() is None
+
+    def test_search_batch_matches_search(self, index, embeddings):
+        """Test that the matrix-matrix search returns each query's single search results"""
+        queries = np.random.default_rng(3).standard_normal((70, 16))
+        mask = np.arange(len(embeddings)) % 3 != 0
+        index.delete([4])
+        for batch_mask in (None, mask, np.arange(len(embeddings)) < 5):
+            batch = index.search_batch(queries, k=7, mask=batch_mask)
+            assert len(batch) == len(queries)
+            for query, hits in zip(queries, batch):
+                single = index.search(query, k=7, mask=batch_mask)
+                assert [slot for slot, _ in hits] == [slot for slot, _ in single]
+                np.testing.assert_allclose([s for _, s in hits], [s for _, s in single], atol=1e-6)
+        assert index.search_batch(queries[:2], k=0) == [[], []]
+
+    def test_top_k_rows(self):
+        """Test that row-wise top-k matches per-row top_k_indices"""
+        scores = np.random.default_rng(4).random((5, 40))
+        rows = top_k_rows(scores, 6)
+        for row_scores, top in zip(scores, rows):
+            np.testing.assert_array_equal(top, top_k_indices(row_scores, 6))
+        assert top_k_rows(scores, 100).shape == (5, 40)
+
+    def test_top_k_indices(self):
+        """Test the argpartition-based top-k helper"""
+        scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+        assert list(top_k_indices(scores, 2)) == [1, 3]
+        assert list(top_k_indices(scores, 10)) == [1, 3, 2, 4, 0]
+
+
+class TestIVFIndex:
+    @pytest.fixture
+    def clustered_embeddings(self):
+        """Create embeddings drawn around a handful of cluster centres"""
+        rng = np.random.default_rng(7)
+        centres = rng.standard_normal((8, 32)).astype(np.float32)
+        labels = rng.integers(0, 8, size=800)
+        noise = 0.1 * rng.standard_normal((800, 32)).astype(np.float32)
+        return centres[labels] + noise
+
+    def _add(self, index, embeddings, offset=0):
+        ids = [f"doc_{offset + i}" for i in range(len(embeddings))]
+        return index.add(ids, ids, embeddings)
+
+    def test_exact_search_before_training(self, clustered_embeddings):
+        """Test that the index falls back to exact search until trained"""
+        index = IVFIndex(nlist=8, train_size=1000)
+        self._add(index, clustered_embeddings[:100])
+
+        assert not index.is_trained
+        exact = VectorIndex()
+        self._add(exact, clustered_embeddings[:100])
+        query = clustered_embeddings[3]
+        assert index.search(query, k=5) == exact.search(query, k=5)
+
+    def test_trains_once_threshold_reached(self, clustered_embeddings):
+        """Test automatic training and list assignment of every chunk"""
+        index = IVFIndex(nlist=8, train_size=400)
+        self._add(index, clustered_embeddings[:300])
+        assert not index.is_trained
+
+        self._add(index, clustered_embeddings[300:], offset=300)
+        assert index.is_trained
+        assert index._list_sizes.sum() == len(index) == 800
+
+    def test_search_during_training_sees_no_partial_state(self, clustered_embeddings):
+        """Test that a search racing train() uses the previous, complete state"""
+        index = IVFIndex(nlist=8, train_size=1000)
+        self._add(index, clustered_embeddings)
+        exact = VectorIndex()
+        self._add(exact, clustered_embeddings)
+        query = clustered_embeddings[7]
+        seen = []
+        assign = ann_index.assign_to_centroids
+
+        def assign_and_search(vectors, centroids, *args):
+            seen.append(index.search(query, k=5))
+            return assign(vectors, centroids, *args)
+
+        with patch.object(ann_index, 'assign_to_centroids', side_effect=assign_and_search):
+            # Spherical k-means calls the patched helper too; the last call is list assignment
+            index.train(clustered_embeddings)
+        assert seen[-1] == exact.search(query, k=5)
+        assert index.is_trained
+        assert index._list_sizes.sum() == 800
+
+    def test_incremental_inserts_after_training(self, clustered_embeddings):
+        """Test that chunks added after training are searchable"""
+        index = IVFIndex(nlist=8, nprobe=2)
+        index.train(clustered_embeddings)
+        self._add(index, clustered_embeddings)
+
+        assert index._list_sizes.sum() == 800
+        slot, score = index.search(clustered_embeddings[42], k=1)[0]
+        assert slot == 42
+        assert score == pytest.approx(1.0, abs=1e-5)
+
+    def test_full_probe_matches_exact(self, clustered_embeddings):
+        """Test that scanning every list gives the exact result"""
+        index = IVFIndex(nlist=8, train_size=200)
+        self._add(index, clustered_embeddings)
+        exact = VectorIndex()
+        self._add(exact, clustered_embeddings)
+
+        query = clustered_embeddings[10] + 0.05
+        assert [s for s, _ in index.search(query, k=10, nprobe=8)] == \
+            [s for s, _ in exact.search(query, k=10)]
+
+    def test_masked_search(self, clustered_embeddings):
+        """Test that selective and broad masks only return matching chunks"""
+        index = IVFIndex(nlist=8, nprobe=2, train_size=200)
+        self._add(index, clustered_embeddings)
+        exact = VectorIndex()
+        self._add(exact, clustered_embeddings)
+        query = clustered_embeddings[10] + 0.05
+
+        selective = np.zeros(len(index), dtype=bool)
+        selective[::100] = True
+        assert index.search(query, k=5, mask=selective) == exact.search(query, k=5, mask=selective)
+
+        broad = np.arange(len(index)) % 2 == 0
+        results = index.search(query, k=10, mask=broad)
+        assert len(results) == 10
+        assert all(slot % 2 == 0 for slot, _ in results)
@@ -0,0 +1,253 @@
+"""
+Approximate nearest-neighbour index for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+IVF (inverted file) index: vectors are clustered around coarse centroids
+learned with spherical k-means, and a query only scores the chunks in its
+`nprobe` closest clusters. Storage is shared with the exact VectorIndex, so
+chunk text and metadata work the same way in both modes.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+from vector_index import VectorIndex, normalize_rows, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+
+def spherical_kmeans(vectors: np.ndarray,
+                     num_clusters: int,
+                     iterations: int = 10,
+                     seed: int = 0,
+                     batch_size: int = 8192) -> np.ndarray:
+    """
+    Cluster unit vectors by cosine similarity
+
+    Args:
+        vectors: Normalized training vectors
+        num_clusters: Number of centroids to learn
+        iterations: Number of Lloyd iterations
+        seed: Random seed for centroid initialization
+        batch_size: Rows assigned per matrix product, bounds peak memory
+
+    Returns:
+        Normalized centroid matrix of shape (num_clusters, dimension)
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = min(num_clusters, vectors.shape[0])
+    centroids = vectors[rng.choice(vectors.shape[0], num_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_to_centroids(vectors, centroids, batch_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=num_clusters)
+
+        # Re-seed empty clusters with random training points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(vectors.shape[0], len(empty), replace=False)]
+
+        centroids = normalize_rows(sums)
+
+    return centroids
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+    """Index of the most similar centroid for each row"""
+    assignments = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], batch_size):
+        block = vectors[start:start + batch_size] @ centroids.T
+        assignments[start:start + batch_size] = np.argmax(block, axis=1)
+    return assignments
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file approximate index with coarse centroids
+    """
+
+    def __init__(self,
+                 dimension: Optional[int] = None,
+                 nlist: int = 1024,
+                 nprobe: int = 16,
+                 train_size: Optional[int] = None,
+                 kmeans_iterations: int = 10,
+                 seed: int = 0,
+                 **kwargs):
+        """
+        Initialize an empty IVF index
+
+        Args:
+            dimension: Embedding dimension; inferred from the first insert if None
+            nlist: Number of coarse centroids (build parameter)
+            nprobe: Number of clusters scanned per query (search parameter)
+            train_size: Chunks to accumulate before training; defaults to 39 * nlist
+            kmeans_iterations: Lloyd iterations used when training centroids
+            seed: Random seed for training
+        """
+        super().__init__(dimension=dimension, **kwargs)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size or 39 * nlist
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+
+        # (centroids, inverted lists, list sizes), replaced as one tuple so a
+        # lock-free search never pairs centroids with another training's lists
+        self._ivf: Tuple[Optional[np.ndarray], List[np.ndarray], np.ndarray] = \
+            (None, [], np.zeros(0, dtype=np.int64))
+
+    @property
+    def centroids(self) -> Optional[np.ndarray]:
+        return self._ivf[0]
+
+    @property
+    def _lists(self) -> List[np.ndarray]:
+        return self._ivf[1]
+
+    @property
+    def _list_sizes(self) -> np.ndarray:
+        return self._ivf[2]
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, sample: Optional[np.ndarray] = None):
+        """
+        Learn coarse centroids and assign every stored chunk to a list
+
+        Args:
+            sample: Training vectors; defaults to the chunks already stored
+        """
+        if sample is None:
+            sample = self.vectors
+        else:
+            sample = normalize_rows(sample)
+        if sample.shape[0] == 0:
+            raise ValueError("Cannot train IVF index without vectors")
+
+        rng = np.random.default_rng(self.seed)
+        if sample.shape[0] > self.train_size:
+            sample = sample[rng.choice(sample.shape[0], self.train_size, replace=False)]
+
+        # Built aside and published in one assignment: searches take no lock
+        centroids = spherical_kmeans(sample, self.nlist, self.kmeans_iterations, self.seed)
+        num_lists = centroids.shape[0]
+        lists = [np.empty(0, dtype=np.int64) for _ in range(num_lists)]
+        list_sizes = np.zeros(num_lists, dtype=np.int64)
+        if len(self):
+            self._assign(np.arange(len(self)), centroids, lists, list_sizes)
+
+        self._ivf = (centroids, lists, list_sizes)
+        logger.info(f"Trained IVF index with {num_lists} lists on {sample.shape[0]} vectors")
+
+    def _assign(self, slots: np.ndarray, centroids: Optional[np.ndarray] = None,
+                lists: Optional[List[np.ndarray]] = None, list_sizes: Optional[np.ndarray] = None):
+        """Append row slots to the inverted list of their nearest centroid (default: the live lists)"""
+        if centroids is None:
+            centroids, lists, list_sizes = self._ivf
+        assignments = assign_to_centroids(self._vectors[slots], centroids)
+        order = np.argsort(assignments, kind='stable')
+        list_ids, starts = np.unique(assignments[order], return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+
+        for list_id, start, end in zip(list_ids, starts, bounds):
+            new_slots = slots[order[start:end]]
+            size = list_sizes[list_id]
+            required = size + len(new_slots)
+            posting = lists[list_id]
+            if required > posting.shape[0]:
+                grown = np.empty(max(required, 2 * posting.shape[0], 16), dtype=np.int64)
+                grown[:size] = posting[:size]
+                posting = lists[list_id] = grown
+            posting[size:required] = new_slots
+            list_sizes[list_id] = required
+
+    def add(self,
+            ids: List[str],
+            texts: List[str],
+            embeddings: np.ndarray,
+            metadatas: Optional[List[Dict[str, Any]]] = None) -> List[int]:
+        """Append chunks, training the centroids once enough have arrived"""
+        slots = super().add(ids, texts, embeddings, metadatas)
+        if not slots:
+            return slots
+
+        if self.is_trained:
+            self._assign(np.asarray(slots, dtype=np.int64))
+        elif len(self) >= self.train_size:
+            self.train()
+        return slots
+
+    def search(self,
+               query_embedding: np.ndarray,
+               k: int = 5,
+               nprobe: Optional[int] = None,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Find approximately the k most similar chunks to a query embedding
+
+        Falls back to exact search until the index has been trained. A mask
+        matching fewer rows than the probed lists would hold is searched
+        exactly over the matching rows, which is both cheaper and loses no
+        recall. So is a mask so selective that the probed lists would hold
+        too few matches to fill k; broader masks filter the probed candidates.
+
+        Args:
+            query_embedding: Query vector of shape (dimension,)
+            k: Number of results to return
+            nprobe: Clusters to scan; defaults to the index setting
+            mask: Optional boolean row mask; only rows where it is True are returned
+
+        Returns:
+            List of (row slot, cosine similarity) pairs, best first
+        """
+        if not self.is_trained:
+            return super().search(query_embedding, k, mask=mask)
+        if len(self) == 0 or k <= 0:
+            return []
+
+        centroids, lists, list_sizes = self._ivf
+        if centroids is None:
+            return super().search(query_embedding, k, mask=mask)
+        query = self._normalize_query(query_embedding)
+        nprobe = min(nprobe or self.nprobe, centroids.shape[0])
+        mask = self._effective_mask(mask)
+        if mask is not None:
+            mask = self._check_mask(mask)
+            selected = np.flatnonzero(mask)
+            # Rows the probed lists hold, and how many of them should match
+            scanned = len(self) * nprobe // centroids.shape[0]
+            expected_matches = scanned * selected.shape[0] / len(self)
+            if selected.shape[0] <= scanned or expected_matches < 4 * k:
+                return self.search_slots(query, k, selected)
+
+        probes = top_k_indices(centroids @ query, nprobe)
+
+        candidates = np.concatenate([lists[c][:list_sizes[c]] for c in probes])
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        if candidates.shape[0] == 0:
+            return []
+
+        scores = self._vectors[candidates] @ query
+        top = top_k_indices(scores, k)
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def search_batch(self,
+                     query_embeddings: np.ndarray,
+                     k: int = 5,
+                     mask: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """One exact matrix-matrix scan until trained, then one probed search per query"""
+        if not self.is_trained:
+            return super().search_batch(query_embeddings, k, mask=mask)
+        return [self.search(query, k, mask=mask) for query in normalize_rows(query_embeddings)]
+
+    def clear(self):
+        """Remove every chunk and the trained centroids"""
+        super().clear()
+        self._ivf = (None, [], np.zeros(0, dtype=np.int64))
@@ -0,0 +1,198 @@
+"""
+Semantic answer cache for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+Paraphrased questions ("how do I save tax with 80C" / "80C tax saving
+options") should not each pay for retrieval and generation. The cache keeps
+the normalized embedding of every answered query in one matrix; a new query
+whose cosine similarity to a cached one reaches the threshold is served the
+cached answer and sources. Entries are evicted LRU under an entry and memory
+cap, expire after a TTL, and are invalidated when a document they cite is
+updated or deleted. Newly stored documents may answer any question better, so
+the scope also carries the corpus generation: answers cached before a store
+are no longer matched and age out of the LRU.
+"""
+
+import json
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from vector_index import normalize_rows
+
+
+def cache_scope(k: int, filters: Optional[Dict[str, Any]] = None, generation: int = 0) -> str:
+    """Answers are only shared between queries with the same k and filters, against the same corpus"""
+    return json.dumps({'k': k, 'filters': filters or {}, 'generation': generation}, sort_keys=True, default=str)
+
+
+@dataclass
+class CachedAnswer:
+    """A cached response, the sources it was generated from and how close the match was"""
+    response: str
+    sources: List[Dict[str, Any]]
+    similarity: float = 1.0
+
+
+@dataclass
+class _Entry:
+    scope: str
+    response: str
+    sources: List[Dict[str, Any]]
+    document_ids: Set[str] = field(default_factory=set)
+    stored_at: float = 0.0
+    size: int = 0
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe LRU cache of answers keyed by query-embedding similarity
+    """
+
+    def __init__(self,
+                 similarity_threshold: float = 0.95,
+                 max_entries: int = 1000,
+                 max_bytes: int = 32 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = 3600):
+        """
+        Args:
+            similarity_threshold: Minimum cosine similarity to serve a cached answer
+            max_entries: Maximum number of cached answers; 0 disables the cache
+            max_bytes: Approximate cap on memory held by answers and sources
+            ttl_seconds: Seconds an answer stays valid; None disables expiry
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # Row slot -> entry in LRU order; rows of _embeddings are reused after eviction
+        self._entries: 'OrderedDict[int, _Entry]' = OrderedDict()
+        self._embeddings: Optional[np.ndarray] = None
+        self._active = np.zeros(max(0, max_entries), dtype=np.bool_)
+        self._free: List[int] = list(range(max(0, max_entries) - 1, -1, -1))
+        self._by_document: Dict[str, Set[int]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(response: str, sources: List[Dict[str, Any]]) -> int:
+        return len(response) + sum(len(source.get('content', '')) + 256 for source in sources)
+
+    def _remove(self, slot: int):
+        entry = self._entries.pop(slot)
+        self._active[slot] = False
+        self._free.append(slot)
+        self._bytes -= entry.size
+        for document_id in entry.document_ids:
+            slots = self._by_document.get(document_id)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._by_document[document_id]
+
+    def get(self, query_embedding: np.ndarray, scope: str = '') -> Optional[CachedAnswer]:
+        """Return the cached answer of the most similar query in scope, or None"""
+        with self._lock:
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            query = normalize_rows(query_embedding)[0]
+            similarities = np.where(self._active, self._embeddings @ query, -np.inf)
+            candidates = np.flatnonzero(similarities >= self.similarity_threshold)
+
+            now = time.monotonic()
+            for slot in candidates[np.argsort(-similarities[candidates])]:
+                slot = int(slot)
+                entry = self._entries[slot]
+                if entry.scope != scope:
+                    continue
+                if self.ttl_seconds is not None and now - entry.stored_at > self.ttl_seconds:
+                    self._remove(slot)
+                    self.expirations += 1
+                    continue
+
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return CachedAnswer(entry.response, entry.sources, float(similarities[slot]))
+
+            self.misses += 1
+            return None
+
+    def put(self, query_embedding: np.ndarray, response: str, sources: List[Dict[str, Any]], scope: str = ''):
+        """Cache an answer, evicting least-recently-used entries as needed"""
+        size = self._entry_size(response, sources)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+
+        query = normalize_rows(query_embedding)[0]
+        document_ids = {str(source['document_id']) for source in sources if source.get('document_id') is not None}
+
+        with self._lock:
+            if self._embeddings is None or self._embeddings.shape[1] != query.shape[0]:
+                self._clear()
+                self._embeddings = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+
+            while self._entries and (not self._free or self._bytes + size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+            slot = self._free.pop()
+            self._embeddings[slot] = query
+            self._active[slot] = True
+            self._entries[slot] = _Entry(scope, response, sources, document_ids, time.monotonic(), size)
+            self._bytes += size
+            for document_id in document_ids:
+                self._by_document.setdefault(document_id, set()).add(slot)
+
+    def invalidate_documents(self, document_ids: Iterable[str]) -> int:
+        """Drop every answer citing one of the documents; returns the number dropped"""
+        with self._lock:
+            slots = set()
+            for document_id in document_ids:
+                slots |= self._by_document.get(str(document_id), set())
+            for slot in slots:
+                self._remove(slot)
+            self.invalidations += len(slots)
+            return len(slots)
+
+    def _clear(self):
+        for slot in list(self._entries):
+            self._remove(slot)
+
+    def clear(self):
+        """Drop every entry; counters are kept"""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'similarity_threshold': self.similarity_threshold,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -1,15 +1,19 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import pandas as pd
+from typing import List, Dict, Any, Optional, Union
 import numpy as np
+import asyncio
 import logging
 import os
+import time
 from datetime import datetime
 
-from train_classifier import TransactionCategorizer
+# Heavy dependencies (pandas, scikit-learn, sentence-transformers/torch) are
+# imported lazily so the server can bind before the models are loaded
 from rag_service import RAGService
+from executors import ExecutionManager, PoolSaturatedError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,9 +35,160 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize ML services
-classifier = TransactionCategorizer()
-rag_service = RAGService()
+# Vector index configuration: "exact", "ivf" (approximate, tunable via env)
+# or "sharded" (exact, full scans split across worker processes)
+RAG_INDEX_TYPE = os.getenv("RAG_INDEX_TYPE", "exact")
+RAG_INDEX_PARAMS = {}
+if RAG_INDEX_TYPE == "ivf":
+    RAG_INDEX_PARAMS = {
+        "nlist": int(os.getenv("RAG_IVF_NLIST", "1024")),
+        "nprobe": int(os.getenv("RAG_IVF_NPROBE", "16")),
+    }
+elif RAG_INDEX_TYPE == "sharded":
+    RAG_INDEX_PARAMS = {
+        "num_shards": int(os.getenv("RAG_SHARDS", str(os.cpu_count() or 1))),
+        "min_shard_rows": int(os.getenv("RAG_SHARD_MIN_ROWS", "16384")),
+    }
+
+# Hybrid BM25 + vector retrieval with reciprocal rank fusion
+RAG_HYBRID = os.getenv("RAG_HYBRID", "true").lower() in ("1", "true", "yes")
+
+# Query embedding cache limits
+RAG_QUERY_CACHE_PARAMS = {
+    "max_entries": int(os.getenv("RAG_QUERY_CACHE_SIZE", "10000")),
+    "ttl_seconds": float(os.getenv("RAG_QUERY_CACHE_TTL", "3600")),
+    "max_bytes": int(os.getenv("RAG_QUERY_CACHE_MAX_MB", "64")) * 1024 * 1024,
+}
+
+# Semantic answer cache: paraphrased queries above the similarity threshold reuse an answer
+RAG_ANSWER_CACHE_PARAMS = {
+    "similarity_threshold": float(os.getenv("RAG_ANSWER_CACHE_THRESHOLD", "0.95")),
+    "max_entries": int(os.getenv("RAG_ANSWER_CACHE_SIZE", "1000")),
+    "ttl_seconds": float(os.getenv("RAG_ANSWER_CACHE_TTL", "3600")),
+    "max_bytes": int(os.getenv("RAG_ANSWER_CACHE_MAX_MB", "32")) * 1024 * 1024,
+}
+
+# Fraction of tombstoned (deleted/replaced) chunks that triggers a background compaction
+RAG_COMPACTION_THRESHOLD = float(os.getenv("RAG_COMPACTION_THRESHOLD", "0.2"))
+
+# Document embedding batches: length-sorted, capped in padded tokens and texts per encoder call
+RAG_EMBEDDING_BATCH_PARAMS = {
+    "max_batch_tokens": int(os.getenv("RAG_EMBED_BATCH_TOKENS", "16384")),
+    "max_batch_size": int(os.getenv("RAG_EMBED_BATCH_SIZE", "128")),
+}
+
+# Optional embedding dimensionality reduction: RAG_REDUCTION_METHOD=pca fits a
+# projection once RAG_REDUCTION_TRAIN_SIZE chunks are stored, truncate keeps a prefix
+RAG_REDUCTION_METHOD = os.getenv("RAG_REDUCTION_METHOD")
+RAG_REDUCTION_PARAMS = {
+    "method": RAG_REDUCTION_METHOD,
+    "dimensions": int(os.getenv("RAG_REDUCTION_DIMS", "128")),
+    "train_size": int(os.getenv("RAG_REDUCTION_TRAIN_SIZE", "10000")),
+} if RAG_REDUCTION_METHOD else None
+
+# Embedding encoder: sentence-transformers (default), quantized (int8 CPU) or hashing (no model)
+RAG_EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "sentence-transformers")
+RAG_EMBEDDING_BACKEND_PARAMS = (
+    {"dimension": int(os.getenv("RAG_EMBEDDING_DIMS", "384"))} if RAG_EMBEDDING_BACKEND == "hashing"
+    else {"model_name": os.getenv("RAG_EMBEDDING_MODEL", "all-MiniLM-L6-v2")}
+)
+
+# LLM context assembly: token budget, MMR relevance weight and near-duplicate cutoff
+RAG_CONTEXT_PARAMS = {
+    "max_tokens": int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "2048")),
+    "mmr_lambda": float(os.getenv("RAG_CONTEXT_MMR_LAMBDA", "0.7")),
+    "duplicate_threshold": float(os.getenv("RAG_CONTEXT_DUPLICATE_THRESHOLD", "0.95")),
+}
+
+# Largest number of questions accepted by /rag/query/batch
+RAG_BATCH_QUERY_LIMIT = int(os.getenv("RAG_BATCH_QUERY_LIMIT", "128"))
+
+# Query embedding micro-batching window
+RAG_BATCHER_PARAMS = {
+    "max_batch_size": int(os.getenv("RAG_BATCH_MAX_SIZE", "32")),
+    "max_wait_ms": float(os.getenv("RAG_BATCH_MAX_WAIT_MS", "3")),
+}
+
+# Persistent chunk embedding cache, enabled by RAG_CHUNK_CACHE_PATH (SQLite file)
+RAG_CHUNK_CACHE_PATH = os.getenv("RAG_CHUNK_CACHE_PATH")
+RAG_CHUNK_CACHE_PARAMS = {
+    "path": RAG_CHUNK_CACHE_PATH,
+    "max_bytes": int(os.getenv("RAG_CHUNK_CACHE_MAX_MB", "1024")) * 1024 * 1024,
+} if RAG_CHUNK_CACHE_PATH else None
+
+# Initialize ML services; models are loaded in the background at startup
+classifier = None
+rag_service = RAGService(
+    index_type=RAG_INDEX_TYPE,
+    index_params=RAG_INDEX_PARAMS,
+    query_cache_params=RAG_QUERY_CACHE_PARAMS,
+    batcher_params=RAG_BATCHER_PARAMS,
+    load_models=False,
+    hybrid=RAG_HYBRID,
+    answer_cache_params=RAG_ANSWER_CACHE_PARAMS,
+    compaction_threshold=RAG_COMPACTION_THRESHOLD,
+    embedding_batch_params=RAG_EMBEDDING_BATCH_PARAMS,
+    reduction_params=RAG_REDUCTION_PARAMS,
+    embedding_backend=RAG_EMBEDDING_BACKEND,
+    embedding_backend_params=RAG_EMBEDDING_BACKEND_PARAMS,
+    context_params=RAG_CONTEXT_PARAMS,
+    chunk_cache_params=RAG_CHUNK_CACHE_PARAMS
+)
+
+# Bounded pools keep blocking model work off the event loop. Every pool runs
+# service methods or reads the loaded classifier, so all of them stay threads
+execution = ExecutionManager.from_env()
+rag_service.query_batcher.executor = execution.get("encode")
+
+# Memory-mapped index snapshots shared by every worker on the host
+RAG_SNAPSHOT_DIR = os.getenv("RAG_SNAPSHOT_DIR")
+
+# Background model loading state, read by the readiness gate
+model_state = {
+    "status": "starting",
+    "error": None,
+    "load_seconds": None
+}
+
+def _load_models():
+    """Load the classifier, RAG models and snapshot, then warm up the encoder"""
+    global classifier
+    start = time.perf_counter()
+    try:
+        from train_classifier import TransactionCategorizer
+        classifier = TransactionCategorizer()
+        
+        if RAG_SNAPSHOT_DIR and os.path.exists(RAG_SNAPSHOT_DIR):
+            try:
+                rag_service.load_snapshot(RAG_SNAPSHOT_DIR)
+            except FileNotFoundError:
+                logger.info(f"No snapshot published in {RAG_SNAPSHOT_DIR}, starting with an empty index")
+        
+        rag_service.initialize_models(warm_up=True)
+        model_state["status"] = "ready"
+    except Exception as e:
+        logger.error(f"Model loading failed: {e}")
+        model_state["status"] = "failed"
+        model_state["error"] = str(e)
+    finally:
+        model_state["load_seconds"] = time.perf_counter() - start
+        logger.info(f"Model loading finished in {model_state['load_seconds']:.2f}s: {model_state['status']}")
+
+@app.on_event("startup")
+async def start_model_loading():
+    """Load models off the event loop so liveness probes answer immediately"""
+    loop = asyncio.get_running_loop()
+    app.state.model_loader = loop.run_in_executor(None, _load_models)
+
+def require_ready():
+    """Readiness gate for endpoints that need loaded models"""
+    if model_state["status"] != "ready":
+        raise HTTPException(status_code=503, detail=f"Models not ready: {model_state['status']}")
+
+def _dataframe(records: List[Dict[str, Any]]):
+    """Build a DataFrame; pandas is imported on first use"""
+    import pandas as pd
+    return pd.DataFrame(records)
 
 # Pydantic models
 class TransactionData(BaseModel):
@@ -52,34 +207,61 @@ class DocumentData(BaseModel):
     content: str
     metadata: Dict[str, Any]
 
+# Metadata filter values: one accepted value, or a list of accepted values
+FilterValue = Union[str, int, float, bool]
+
 class QueryRequest(BaseModel):
     query: str
     k: int = 5
+    filters: Optional[Dict[str, Union[FilterValue, List[FilterValue]]]] = None
 
 class QueryResponse(BaseModel):
     query: str
     response: str
     sources: List[Dict[str, Any]]
+    timings: Dict[str, float] = {}
+    cached: bool = False
+    context: Dict[str, int] = {}
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    k: int = 5
+    filters: Optional[Dict[str, Union[FilterValue, List[FilterValue]]]] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+    count: int
 
-# Health check endpoint
+def _predict_with_proba(df):
+    """Run classifier prediction and probabilities together in one pool task"""
+    return classifier.predict(df), classifier.predict_proba(df)
+
+# Health check endpoints
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    try:
-        rag_health = rag_service.health_check()
-        return {
-            "status": "healthy",
-            "timestamp": datetime.now().isoformat(),
-            "services": {
-                "rag_service": rag_health
-            }
+    """Health check endpoint; served from cached model state"""
+    return {
+        "status": "healthy" if model_state["status"] == "ready" else model_state["status"],
+        "timestamp": datetime.now().isoformat(),
+        "services": {
+            "rag_service": rag_service.health_check()
         }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        raise HTTPException(status_code=500, detail="Service unhealthy")
+    }
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: models are loaded and warmed up"""
+    if model_state["status"] != "ready":
+        return JSONResponse(status_code=503, content=model_state)
+    return model_state
 
 # Transaction classification endpoints
-@app.post("/classify/transactions", response_model=List[TransactionPrediction])
+@app.post("/classify/transactions", response_model=List[TransactionPrediction], dependencies=[Depends(require_ready)])
 async def classify_transactions(transactions: List[TransactionData]):
     """Classify transaction categories"""
     try:
@@ -87,11 +269,10 @@ async def classify_transactions(transactions: List[TransactionData]):
             raise HTTPException(status_code=400, detail="No transactions provided")
         
         # Convert to DataFrame
-        df = pd.DataFrame([t.dict() for t in transactions])
+        df = _dataframe([t.dict() for t in transactions])
         
         # Make predictions
-        predictions = classifier.predict(df)
-        probabilities = classifier.predict_proba(df)
+        predictions, probabilities = await execution.run("classify", _predict_with_proba, df)
         
         # Get confidence scores
         max_probs = np.max(probabilities, axis=1)
@@ -107,20 +288,23 @@ async def classify_transactions(transactions: List[TransactionData]):
         
         return results
         
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Error classifying transactions: {e}")
         raise HTTPException(status_code=500, detail="Classification failed")
 
-@app.post("/classify/single", response_model=TransactionPrediction)
+@app.post("/classify/single", response_model=TransactionPrediction, dependencies=[Depends(require_ready)])
 async def classify_single_transaction(transaction: TransactionData):
     """Classify a single transaction"""
     try:
         # Convert to DataFrame
-        df = pd.DataFrame([transaction.dict()])
+        df = _dataframe([transaction.dict()])
         
         # Make prediction
-        prediction = classifier.predict(df)[0]
-        probability = classifier.predict_proba(df)[0]
+        predictions, probabilities = await execution.run("classify", _predict_with_proba, df)
+        prediction = predictions[0]
+        probability = probabilities[0]
         
         # Get confidence score
         confidence = float(np.max(probability))
@@ -131,35 +315,77 @@ async def classify_single_transaction(transaction: TransactionData):
             confidence=confidence
         )
         
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Error classifying transaction: {e}")
         raise HTTPException(status_code=500, detail="Classification failed")
 
 # RAG endpoints
-@app.post("/rag/query", response_model=QueryResponse)
+@app.post("/rag/query", response_model=QueryResponse, dependencies=[Depends(require_ready)])
 async def query_rag(request: QueryRequest):
     """Query the RAG system"""
     try:
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        # Get response from RAG pipeline
-        response = rag_service.rag_pipeline(request.query)
-        
-        # Get relevant documents
-        relevant_docs = rag_service.retrieve_relevant_documents(request.query, request.k)
+        # Single pass: one encode, one search, one generation
+        result = await rag_service.run_pipeline_async(
+            request.query, request.k, executor=execution.get("query"), filters=request.filters
+        )
         
         return QueryResponse(
             query=request.query,
-            response=response,
-            sources=relevant_docs
+            response=result.response,
+            sources=result.sources,
+            timings=result.timings,
+            cached=result.cached,
+            context=result.context
         )
         
+    except (HTTPException, PoolSaturatedError):
+        raise
     except Exception as e:
         logger.error(f"Error querying RAG: {e}")
         raise HTTPException(status_code=500, detail="RAG query failed")
 
-@app.post("/rag/documents")
+@app.post("/rag/query/batch", response_model=BatchQueryResponse, dependencies=[Depends(require_ready)])
+async def query_rag_batch(request: BatchQueryRequest):
+    """Answer many RAG queries with one encode and one matrix-matrix search"""
+    try:
+        if not request.queries:
+            raise HTTPException(status_code=400, detail="No queries provided")
+        if len(request.queries) > RAG_BATCH_QUERY_LIMIT:
+            raise HTTPException(status_code=400, detail=f"At most {RAG_BATCH_QUERY_LIMIT} queries per batch")
+        if any(not query.strip() for query in request.queries):
+            raise HTTPException(status_code=400, detail="Query cannot be empty")
+        
+        results = await execution.run(
+            "query", rag_service.run_pipeline_batch, request.queries, request.k, request.filters
+        )
+        
+        return BatchQueryResponse(
+            results=[
+                QueryResponse(
+                    query=result.query,
+                    response=result.response,
+                    sources=result.sources,
+                    timings=result.timings,
+                    cached=result.cached,
+                    context=result.context
+                )
+                for result in results
+            ],
+            count=len(results)
+        )
+        
+    except (HTTPException, PoolSaturatedError):
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch RAG query: {e}")
+        raise HTTPException(status_code=500, detail="Batch RAG query failed")
+
+@app.post("/rag/documents", dependencies=[Depends(require_ready)])
 async def store_documents(documents: List[DocumentData]):
     """Store documents in the RAG system"""
     try:
@@ -170,7 +396,7 @@ async def store_documents(documents: List[DocumentData]):
         doc_list = [doc.dict() for doc in documents]
         
         # Store documents
-        document_ids = rag_service.store_documents(doc_list)
+        document_ids = await execution.run("ingest", rag_service.store_documents, doc_list)
         
         return {
             "message": "Documents stored successfully",
@@ -178,11 +404,13 @@ async def store_documents(documents: List[DocumentData]):
             "count": len(document_ids)
         }
         
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Error storing documents: {e}")
         raise HTTPException(status_code=500, detail="Document storage failed")
 
-@app.post("/rag/documents/upload")
+@app.post("/rag/documents/upload", dependencies=[Depends(require_ready)])
 async def upload_document(file: UploadFile = File(...)):
     """Upload and process a document"""
     try:
@@ -211,7 +439,7 @@ async def upload_document(file: UploadFile = File(...)):
         )
         
         # Store document
-        document_ids = rag_service.store_documents([document.dict()])
+        document_ids = await execution.run("ingest", rag_service.store_documents, [document.dict()])
         
         return {
             "message": "Document uploaded and processed successfully",
@@ -219,12 +447,56 @@ async def upload_document(file: UploadFile = File(...)):
             "filename": file.filename
         }
         
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Error uploading document: {e}")
         raise HTTPException(status_code=500, detail="Document upload failed")
 
+@app.post("/rag/snapshot")
+async def save_snapshot():
+    """Publish the current RAG index as a new snapshot"""
+    try:
+        if not RAG_SNAPSHOT_DIR:
+            raise HTTPException(status_code=400, detail="RAG_SNAPSHOT_DIR is not configured")
+        
+        path = await execution.run("ingest", rag_service.save_snapshot, RAG_SNAPSHOT_DIR)
+        
+        return {
+            "message": "Snapshot published successfully",
+            "version": rag_service.snapshot_version,
+            "path": path
+        }
+        
+    except (HTTPException, PoolSaturatedError):
+        raise
+    except Exception as e:
+        logger.error(f"Error saving snapshot: {e}")
+        raise HTTPException(status_code=500, detail="Snapshot save failed")
+
+@app.post("/rag/snapshot/reload")
+async def reload_snapshot():
+    """Swap to the latest published snapshot without restarting"""
+    try:
+        if not RAG_SNAPSHOT_DIR:
+            raise HTTPException(status_code=400, detail="RAG_SNAPSHOT_DIR is not configured")
+        
+        swapped = await execution.run("ingest", rag_service.refresh_snapshot, RAG_SNAPSHOT_DIR)
+        
+        return {
+            "message": "Snapshot reloaded" if swapped else "Snapshot already current",
+            "version": rag_service.snapshot_version,
+            "swapped": swapped
+        }
+        
+    except (HTTPException, PoolSaturatedError):
+        raise
+    except Exception as e:
+        logger.error(f"Error reloading snapshot: {e}")
+        raise HTTPException(status_code=500, detail="Snapshot reload failed")
+
 # Model management endpoints
-@app.post("/models/train")
+@app.post("/models/train", dependencies=[Depends(require_ready)])
 async def train_classifier():
     """Train the transaction classifier"""
     try:
@@ -233,14 +505,15 @@ async def train_classifier():
         if not os.path.exists(data_path):
             raise HTTPException(status_code=404, detail="Training data not found")
         
+        import pandas as pd
         df = pd.read_csv(data_path)
         
         # Train model
-        accuracy = classifier.train(df)
+        accuracy = await execution.run("classify", classifier.train, df)
         
         # Save model
         os.makedirs("models", exist_ok=True)
-        classifier.save_model("models/transaction_classifier.pkl")
+        await execution.run("classify", classifier.save_model, "models/transaction_classifier.pkl")
         
         return {
             "message": "Model trained successfully",
@@ -248,29 +521,33 @@ async def train_classifier():
             "model_path": "models/transaction_classifier.pkl"
         }
         
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Error training model: {e}")
         raise HTTPException(status_code=500, detail="Model training failed")
 
-@app.post("/models/load")
+@app.post("/models/load", dependencies=[Depends(require_ready)])
 async def load_classifier(model_path: str = "models/transaction_classifier.pkl"):
     """Load a trained classifier"""
     try:
         if not os.path.exists(model_path):
             raise HTTPException(status_code=404, detail="Model file not found")
         
-        classifier.load_model(model_path)
+        await execution.run("classify", classifier.load_model, model_path)
         
         return {
             "message": "Model loaded successfully",
             "model_path": model_path
         }
         
+    except (HTTPException, PoolSaturatedError):
+        raise
     except Exception as e:
         logger.error(f"Error loading model: {e}")
         raise HTTPException(status_code=500, detail="Model loading failed")
 
-@app.get("/models/info")
+@app.get("/models/info", dependencies=[Depends(require_ready)])
 async def get_model_info():
     """Get information about the loaded model"""
     try:
@@ -299,22 +576,27 @@ async def get_model_info():
 async def get_stats():
     """Get service statistics"""
     try:
-        rag_stats = rag_service.get_document_stats()
+        # Stats can catch the chunk store up with the index, an O(n) pass
+        # after a snapshot load, so keep it off the event loop
+        rag_stats = await execution.run("query", rag_service.get_document_stats)
         
         return {
             "timestamp": datetime.now().isoformat(),
             "rag_service": rag_stats,
+            "execution_pools": execution.stats(),
             "classifier": {
-                "model_loaded": classifier.model is not None,
-                "feature_count": len(classifier.feature_columns) if classifier.feature_columns else 0
+                "model_loaded": getattr(classifier, "model", None) is not None,
+                "feature_count": len(getattr(classifier, "feature_columns", None) or [])
             }
         }
         
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         raise HTTPException(status_code=500, detail="Failed to get stats")
 
-@app.post("/predict/batch")
+@app.post("/predict/batch", dependencies=[Depends(require_ready)])
 async def batch_predict(transactions: List[TransactionData]):
     """Batch prediction endpoint for better performance"""
     try:
@@ -322,11 +604,10 @@ async def batch_predict(transactions: List[TransactionData]):
             raise HTTPException(status_code=400, detail="No transactions provided")
         
         # Convert to DataFrame
-        df = pd.DataFrame([t.dict() for t in transactions])
+        df = _dataframe([t.dict() for t in transactions])
         
         # Make predictions
-        predictions = classifier.predict(df)
-        probabilities = classifier.predict_proba(df)
+        predictions, probabilities = await execution.run("classify", _predict_with_proba, df)
         
         # Format response
         results = []
@@ -346,11 +627,21 @@ async def batch_predict(transactions: List[TransactionData]):
             "count": len(results)
         }
         
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Error in batch prediction: {e}")
         raise HTTPException(status_code=500, detail="Batch prediction failed")
 
 # Error handlers
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Service busy", "detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
     return {"error": "Endpoint not found", "detail": str(exc)}
@@ -360,6 +651,11 @@ async def internal_error_handler(request, exc):
     logger.error(f"Internal server error: {exc}")
     return {"error": "Internal server error", "detail": "An unexpected error occurred"}
 
+@app.on_event("shutdown")
+async def shutdown_pools():
+    await rag_service.query_batcher.close()
+    execution.shutdown(wait=False)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
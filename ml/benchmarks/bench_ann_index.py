@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Approximate Index Recall/Latency Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Compares the IVF index at several nprobe settings against exact search on
+clustered synthetic embeddings, reporting recall@k and p50/p99 latency so an
+operating point can be picked for the query SLO.
+
+Usage:
+    python benchmarks/bench_ann_index.py --size 1000000 --nlist 2048 --nprobe 4 8 16 32 64
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+from ann_index import IVFIndex
+from bench_utils import synthetic_embeddings, measure_latency, recall_at_k, slots
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='IVF recall@k vs latency benchmark')
+    parser.add_argument('--size', type=int, default=200_000,
+                        help='Number of chunks in the corpus')
+    parser.add_argument('--dimension', type=int, default=384,
+                        help='Embedding dimension')
+    parser.add_argument('--nlist', type=int, default=1024,
+                        help='Number of IVF lists')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32, 64],
+                        help='nprobe values to evaluate')
+    parser.add_argument('--queries', type=int, default=200,
+                        help='Number of timed queries')
+    parser.add_argument('--k', type=int, default=10,
+                        help='Number of results per query')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_embeddings(args.size, args.dimension, rng)
+    queries = synthetic_embeddings(args.queries, args.dimension, np.random.default_rng(args.seed + 1))
+    ids = [str(i) for i in range(args.size)]
+
+    exact = VectorIndex(dimension=args.dimension)
+    exact.add(ids, ids, corpus, [{}] * args.size)
+
+    start = time.perf_counter()
+    ivf = IVFIndex(dimension=args.dimension, nlist=args.nlist, train_size=min(args.size, 64 * args.nlist))
+    ivf.train(corpus)
+    ivf.add(ids, ids, corpus, [{}] * args.size)
+    build_seconds = time.perf_counter() - start
+    print(f"IVF build ({args.size} chunks, nlist={args.nlist}): {build_seconds:.2f}s")
+
+    truth = [slots(exact.search(q, args.k)) for q in queries]
+    exact_latency = measure_latency(lambda q: exact.search(q, args.k), queries)
+
+    print(f"{'mode':>12} {'recall@k':>9} {'p50_ms':>8} {'p99_ms':>8}")
+    print(f"{'exact':>12} {1.0:>9.3f} {np.percentile(exact_latency, 50):>8.2f} "
+          f"{np.percentile(exact_latency, 99):>8.2f}")
+
+    for nprobe in args.nprobe:
+        found = [slots(ivf.search(q, args.k, nprobe=nprobe)) for q in queries]
+        latency = measure_latency(lambda q: ivf.search(q, args.k, nprobe=nprobe), queries)
+        print(f"{'nprobe=' + str(nprobe):>12} {recall_at_k(truth, found):>9.3f} "
+              f"{np.percentile(latency, 50):>8.2f} {np.percentile(latency, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
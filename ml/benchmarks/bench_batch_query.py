@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Batch RAG Query Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Compares answering N questions with N sequential run_pipeline calls (one
+encode and one matrix-vector search each) against one run_pipeline_batch
+call (one encode and one matrix-matrix search), and the bare vector search
+with N search calls against one search_batch. By default the encoder is
+simulated with a fixed per-call overhead plus a per-item cost; pass --model
+to use a real SentenceTransformer.
+
+Usage:
+    python benchmarks/bench_batch_query.py --size 200000 --batch 8 32 128
+    python benchmarks/bench_batch_query.py --model all-MiniLM-L6-v2 --no-hybrid
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_service import RAGService
+from bench_utils import synthetic_embeddings
+
+
+class SimulatedEncoder:
+    """Encoder whose cost is dominated by per-call overhead, like a small transformer on CPU"""
+
+    def __init__(self, call_overhead_ms: float, per_item_ms: float, dimension: int, seed: int):
+        self.call_overhead_ms = call_overhead_ms
+        self.per_item_ms = per_item_ms
+        self.dimension = dimension
+        self.rng = np.random.default_rng(seed)
+
+    def encode(self, texts, **kwargs):
+        time.sleep((self.call_overhead_ms + self.per_item_ms * len(texts)) / 1000)
+        return synthetic_embeddings(len(texts), self.dimension, self.rng)
+
+
+def queries_per_second(fn, num_queries: int, repeats: int) -> float:
+    """Best-of-repeats throughput of fn answering num_queries questions"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return num_queries / best
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Batch vs sequential RAG query throughput')
+    parser.add_argument('--size', type=int, default=200_000, help='Number of chunks')
+    parser.add_argument('--dimension', type=int, default=384, help='Embedding dimension')
+    parser.add_argument('--batch', type=int, nargs='+', default=[8, 32, 128], help='Questions per batch')
+    parser.add_argument('--k', type=int, default=5, help='Number of chunks per question')
+    parser.add_argument('--call-overhead-ms', type=float, default=8.0, help='Simulated encoder per-call cost')
+    parser.add_argument('--per-item-ms', type=float, default=0.5, help='Simulated encoder per-text cost')
+    parser.add_argument('--model', default=None, help='Use this SentenceTransformer instead of the simulation')
+    parser.add_argument('--no-hybrid', action='store_true', help='Vector retrieval only')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed repetitions per measurement')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    service = RAGService(load_models=False, hybrid=not args.no_hybrid, answer_cache_params={'max_entries': 0})
+    service.llm_model = service._initialize_llm()
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        service.embedding_model = SentenceTransformer(args.model)
+        args.dimension = service.embedding_model.get_sentence_embedding_dimension()
+    else:
+        service.embedding_model = SimulatedEncoder(args.call_overhead_ms, args.per_item_ms, args.dimension, args.seed)
+
+    rng = np.random.default_rng(args.seed)
+    ids = [f"{i}_chunk_0" for i in range(args.size)]
+    texts = [f"note {i} on section 80C, GST filing and SIP investing" for i in range(args.size)]
+    service.vector_store.add(ids, texts, synthetic_embeddings(args.size, args.dimension, rng),
+                             [{'document_id': str(i)} for i in range(args.size)])
+    service._chunk_store(service.vector_store)
+
+    print(f"{'batch':>6} {'stage':>9} {'seq_qps':>9} {'batch_qps':>10} {'speedup':>8}")
+    for batch_size in args.batch:
+        questions = [f"question {args.seed}-{n}: how does section {n % 90}C work?" for n in range(batch_size)]
+        embeddings = synthetic_embeddings(batch_size, args.dimension, np.random.default_rng(args.seed + 1))
+        index = service.vector_store
+
+        rows = {
+            'search': (lambda: [index.search(q, args.k) for q in embeddings],
+                       lambda: index.search_batch(embeddings, args.k)),
+            'pipeline': (lambda: [service.run_pipeline(q, args.k) for q in questions],
+                         lambda: service.run_pipeline_batch(questions, args.k)),
+        }
+        for stage, (sequential, batched) in rows.items():
+            service.query_cache.clear()
+            seq_qps = queries_per_second(lambda: (service.query_cache.clear(), sequential()), batch_size, args.repeats)
+            batch_qps = queries_per_second(lambda: (service.query_cache.clear(), batched()), batch_size, args.repeats)
+            print(f"{batch_size:>6} {stage:>9} {seq_qps:>9.1f} {batch_qps:>10.1f} {batch_qps / seq_qps:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
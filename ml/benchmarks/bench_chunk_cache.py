@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Chunk Embedding Cache Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Encodes a filing-like corpus, where a share of the chunks is boilerplate
+repeated across documents, three ways:
+
+    uncached     every chunk through the batched encoder
+    cold cache   first run against an empty ChunkEmbeddingCache file
+    warm cache   the same corpus again, as a re-ingestion would
+
+The encoder is SimulatedEncoder from bench_embedding_batcher unless --model
+names a sentence-transformers model. Reports chunks/s and encoder calls saved.
+
+Usage:
+    python benchmarks/bench_chunk_cache.py --chunks 20000 --boilerplate 0.3
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_embedding_cache import ChunkEmbeddingCache
+from embedding_batcher import EmbeddingBatcher
+from bench_embedding_batcher import SimulatedEncoder
+
+
+def filing_chunks(num_chunks: int, boilerplate: float, seed: int):
+    """Chunks of which a `boilerplate` share is drawn from 50 recurring paragraphs"""
+    rng = np.random.default_rng(seed)
+    words = ['tax', 'deduction', 'section', '80C', 'GST', 'return', 'filing', 'assessee', 'rebate', 'TDS']
+    recurring = [' '.join(rng.choice(words, size=60)) for _ in range(50)]
+    chunks = []
+    for i in range(num_chunks):
+        if rng.random() < boilerplate:
+            chunks.append(recurring[int(rng.integers(len(recurring)))])
+        else:
+            chunks.append(f"Clause {i}: " + ' '.join(rng.choice(words, size=int(rng.integers(20, 120)))))
+    return chunks
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Chunk embedding cache benchmark')
+    parser.add_argument('--chunks', type=int, default=20000, help='Chunks in the corpus')
+    parser.add_argument('--boilerplate', type=float, default=0.3, help='Share of recurring boilerplate chunks')
+    parser.add_argument('--batch', type=int, default=1024, help='Chunks per ingestion call')
+    parser.add_argument('--model', default=None, help='sentence-transformers model (default: simulated)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        batcher = EmbeddingBatcher(model.encode, max_tokens=model.max_seq_length)
+    else:
+        batcher = EmbeddingBatcher(SimulatedEncoder().encode)
+
+    chunks = filing_chunks(args.chunks, args.boilerplate, args.seed)
+    batches = [chunks[i:i + args.batch] for i in range(0, len(chunks), args.batch)]
+    print(f"{len(chunks)} chunks, {len(set(chunks))} distinct")
+
+    start = time.perf_counter()
+    for batch in batches:
+        batcher.encode(batch)
+    uncached = time.perf_counter() - start
+    print(f"{'uncached':>12} {len(chunks) / uncached:>10.0f} chunks/s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ChunkEmbeddingCache(os.path.join(directory, 'embeddings.sqlite3'), model_name='bench')
+        for label in ('cold cache', 'warm cache'):
+            before = cache.stats()
+            start = time.perf_counter()
+            for batch in batches:
+                cache.encode(batch, batcher.encode)
+            seconds = time.perf_counter() - start
+            stats = cache.stats()
+            hits = stats['hits'] - before['hits']
+            misses = stats['misses'] - before['misses']
+            print(f"{label:>12} {len(chunks) / seconds:>10.0f} chunks/s ({uncached / seconds:.2f}x)  "
+                  f"hits {hits}  encoded {misses}  {stats['bytes'] / 2**20:.1f} MiB")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Chunker Throughput Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Measures chunking throughput (MB/s) of the streaming regex chunker against
+the previous character-scanning loop on synthetic multi-megabyte filings,
+and the cost of counting tokens per chunk with a whitespace tokenizer or,
+with --tokenizer, a Hugging Face tokenizer.
+
+The legacy loop is only run with overlap smaller than its lookback window:
+a boundary found early enough makes `start = end - overlap` move backwards
+and the loop never terminates.
+
+Usage:
+    python benchmarks/bench_chunker.py --megabytes 1 4 16
+    python benchmarks/bench_chunker.py --style ledger
+    python benchmarks/bench_chunker.py --tokenizer sentence-transformers/all-MiniLM-L6-v2
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_chunker import iter_chunks
+
+
+def synthetic_filing(megabytes: float, rng: np.random.Generator) -> str:
+    """Filing-like text: sentences of varied length with section numbers and paragraphs"""
+    words = np.array(['income', 'tax', 'section', '80C', 'deduction', 'GSTR-3B', 'return', 'Rs.1.5',
+                      'lakh', 'assessee', 'liable', 'under', 'the', 'provisions', 'of', 'clause'])
+    sentences, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        sentence = ' '.join(rng.choice(words, rng.integers(6, 40))).capitalize() + '.'
+        if rng.random() < 0.05:
+            sentence += '\n\n'
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return ' '.join(sentences)
+
+
+def synthetic_ledger(megabytes: float, rng: np.random.Generator) -> str:
+    """Schedule/table-like text with no sentence punctuation, the legacy loop's worst case"""
+    rows, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        row = f"| {rng.integers(1, 10**6)} | INV{rng.integers(10**8)} | {rng.integers(10**5)} | GST 18 |"
+        rows.append(row)
+        size += len(row) + 1
+    return '\n'.join(rows)
+
+
+def legacy_chunk_document(document: str, chunk_size: int = 500, overlap: int = 50):
+    """The character-scanning loop RAGService.chunk_document used before the streaming chunker"""
+    if len(document) <= chunk_size:
+        return [document]
+    chunks = []
+    start = 0
+    while start < len(document):
+        end = start + chunk_size
+        if end < len(document):
+            for i in range(end, max(start + chunk_size - 100, start), -1):
+                if document[i] in '.!?':
+                    end = i + 1
+                    break
+        chunk = document[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end - overlap
+    return chunks
+
+
+def throughput(fn, text: str, repeat: int = 3):
+    """Best-of-repeat MB/s and the number of chunks produced"""
+    best, count = float('inf'), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in fn(text))
+        best = min(best, time.perf_counter() - start)
+    return len(text) / (1024 * 1024) / best, count
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Chunker throughput benchmark')
+    parser.add_argument('--megabytes', type=float, nargs='+', default=[1, 4, 16], help='Document sizes')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Chunk size in characters')
+    parser.add_argument('--overlap', type=int, default=50, help='Chunk overlap in characters')
+    parser.add_argument('--style', choices=['filing', 'ledger'], default='filing',
+                        help='Prose with sentences, or tables without sentence punctuation')
+    parser.add_argument('--tokenizer', default=None, help='Hugging Face tokenizer for token counting')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    counter = lambda text: len(text.split())
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+        counter = lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'size_mb':>8} {'chunker':>16} {'MB/s':>8} {'chunks':>8}")
+    for megabytes in args.megabytes:
+        text = synthetic_filing(megabytes, rng) if args.style == 'filing' else synthetic_ledger(megabytes, rng)
+        modes = {
+            'streaming': lambda t: iter_chunks(t, args.chunk_size, args.overlap),
+            'streaming+tokens': lambda t: iter_chunks(t, args.chunk_size, args.overlap, token_counter=counter),
+        }
+        if args.overlap < args.chunk_size - 100:
+            modes['legacy'] = lambda t: legacy_chunk_document(t, args.chunk_size, args.overlap)
+
+        for name, fn in modes.items():
+            rate, count = throughput(fn, text)
+            print(f"{megabytes:>8g} {name:>16} {rate:>8.1f} {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
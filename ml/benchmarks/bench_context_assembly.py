@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Context Assembly Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Indexes a corpus of policy-style documents in which every document also
+appears as a lightly edited revision (the near-duplicates a circulars
+archive is full of), chunked with overlap, on the hashing embedding
+backend. For each query the top-k chunks are retrieved once, then turned
+into a context two ways:
+
+    join        every retrieved chunk joined whole (the previous behaviour)
+    assembler   ContextAssembler: MMR + near-duplicate removal + token budget
+
+Reports mean prompt tokens, tokens saved, duplicates dropped and assembly
+latency at several budgets. Prompt tokens are what a local LLM's prefill
+time scales with.
+
+Usage:
+    python benchmarks/bench_context_assembly.py --documents 2000 --k 10 --budgets 512 1024 2048
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_service import RAGService
+from context_assembler import ContextAssembler
+from embedding_batcher import approximate_tokens
+
+TOPICS = ['80C deduction', 'GST return', 'HRA exemption', 'capital gains', 'TDS on salary',
+          'advance tax', 'ELSS lock-in', 'NPS contribution', 'home loan interest', 'section 87A rebate']
+FILLER = ['The limit applies per financial year.', 'Documents must be retained for audit.',
+          'Late filing attracts interest and a fee.', 'The rules changed in the last budget.',
+          'Salaried and self-employed taxpayers are treated differently.', 'Refer to the notified forms.']
+
+
+def synthetic_documents(num_documents: int, rng: np.random.Generator):
+    """Documents of ~20 sentences, each followed by a revision differing in one sentence"""
+    documents = []
+    for i in range(num_documents):
+        topic = TOPICS[i % len(TOPICS)]
+        sentences = [f"Rules on {topic} for case {i}." if j % 4 == 0 else str(rng.choice(FILLER))
+                     for j in range(20)]
+        documents.append({'id': f'{i}', 'content': ' '.join(sentences), 'metadata': {'topic': topic}})
+        sentences[int(rng.integers(20))] = f"Revised guidance on {topic} for case {i}."
+        documents.append({'id': f'{i}-rev', 'content': ' '.join(sentences), 'metadata': {'topic': topic}})
+    return documents
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Token-budgeted context assembly benchmark')
+    parser.add_argument('--documents', type=int, default=2000, help='Documents (each also gets a revision)')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('--k', type=int, default=10, help='Chunks retrieved per query')
+    parser.add_argument('--budgets', type=int, nargs='+', default=[256, 512, 1024, 2048],
+                        help='Context token budgets to evaluate')
+    parser.add_argument('--duplicate-threshold', type=float, default=0.95,
+                        help='Cosine similarity at which a chunk counts as a near-duplicate')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    service = RAGService(embedding_backend='hashing', compaction_threshold=None)
+    service.store_documents(synthetic_documents(args.documents, rng))
+
+    queries = [f"{TOPICS[i % len(TOPICS)]} rules case {int(rng.integers(args.documents))}"
+               for i in range(args.queries)]
+    embeddings = service.generate_embeddings(queries)
+    retrieved, vectors = service._search_similar_documents_batch(embeddings, args.k, None, queries,
+                                                                 return_vectors=True)
+
+    joined = [sum(approximate_tokens(doc['content']) for doc in docs) for docs in retrieved]
+    print(f"{len(service.vector_store)} chunks, {args.queries} queries, k={args.k}")
+    print(f"{'setting':>14} {'tokens':>8} {'saved':>7} {'dups':>6} {'trimmed':>8} {'p50_ms':>7}")
+    print(f"{'join':>14} {np.mean(joined):>8.1f} {0:>6.1%} {0:>6.2f} {0:>8.2f} {'-':>7}")
+
+    for budget in [None] + args.budgets:
+        assembler = ContextAssembler(max_tokens=budget, duplicate_threshold=args.duplicate_threshold)
+        latencies, contexts = [], []
+        for query, docs, chunk_vectors in zip(queries, retrieved, vectors):
+            start = time.perf_counter()
+            contexts.append(assembler.assemble(docs, query, chunk_vectors))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        tokens = np.mean([context.tokens for context in contexts])
+        label = 'dedup only' if budget is None else f'budget {budget}'
+        print(f"{label:>14} {tokens:>8.1f} {1 - tokens / np.mean(joined):>6.1%} "
+              f"{np.mean([c.duplicates_dropped for c in contexts]):>6.2f} "
+              f"{np.mean([c.chunks_truncated for c in contexts]):>8.2f} {np.percentile(latencies, 50):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
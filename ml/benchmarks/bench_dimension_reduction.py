@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Dimensionality Reduction Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Reports recall@k against full-dimension exact search, index memory and
+query latency for PCA and prefix truncation at several output dimensions.
+Synthetic clustered embeddings are used unless --embeddings points to an
+.npy matrix of real encoder output (truncation only makes sense for
+Matryoshka-style encoders, so expect it to trail PCA on anything else).
+
+Usage:
+    python benchmarks/bench_dimension_reduction.py --size 200000 --dimensions 64 128 256 384
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+from dimension_reduction import PROJECTIONS
+from bench_utils import synthetic_embeddings, measure_latency, recall_at_k, slots
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Dimensionality reduction recall/latency benchmark')
+    parser.add_argument('--size', type=int, default=200_000,
+                        help='Number of chunks in the corpus (synthetic data only)')
+    parser.add_argument('--dimension', type=int, default=384,
+                        help='Embedding dimension (synthetic data only)')
+    parser.add_argument('--embeddings', type=str, default=None,
+                        help='Optional .npy corpus of real embeddings; queries are held-out rows')
+    parser.add_argument('--dimensions', type=int, nargs='+', default=[64, 128, 256, 384],
+                        help='Reduced dimensions to evaluate')
+    parser.add_argument('--methods', nargs='+', default=['pca', 'truncate'], choices=sorted(PROJECTIONS),
+                        help='Reduction methods to evaluate')
+    parser.add_argument('--train-size', type=int, default=10_000,
+                        help='Corpus sample used to fit PCA')
+    parser.add_argument('--queries', type=int, default=200,
+                        help='Number of timed queries')
+    parser.add_argument('--k', type=int, default=10,
+                        help='Number of results per query')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.embeddings:
+        data = np.load(args.embeddings).astype(np.float32)
+        order = rng.permutation(len(data))
+        queries, corpus = data[order[:args.queries]], data[order[args.queries:]]
+    else:
+        corpus = synthetic_embeddings(args.size, args.dimension, rng)
+        queries = synthetic_embeddings(args.queries, args.dimension, np.random.default_rng(args.seed + 1))
+    size, dimension = corpus.shape
+    ids = [str(i) for i in range(size)]
+    sample = corpus[np.sort(rng.choice(size, min(args.train_size, size), replace=False))]
+
+    exact = VectorIndex(dimension=dimension)
+    exact.add(ids, ids, corpus, [{}] * size)
+    truth = [slots(exact.search(q, args.k)) for q in queries]
+    latencies = measure_latency(lambda q: exact.search(q, args.k), queries)
+
+    print(f"corpus: {size} x {dimension}, k={args.k}")
+    print(f"{'method':>9} {'dims':>5} {'MB':>8} {'recall@k':>9} {'p50_ms':>8} {'p99_ms':>8}")
+    print(f"{'full':>9} {dimension:>5} {exact.vectors.nbytes / 2**20:>8.1f} {1.0:>9.3f} "
+          f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}")
+    del exact
+
+    for method in args.methods:
+        for dims in args.dimensions:
+            if dims > dimension:
+                continue
+            projection = PROJECTIONS[method](dims)
+            projection.train(sample)
+
+            index = VectorIndex(dimension=dims)
+            index.add(ids, ids, projection.transform(corpus), [{}] * size)
+            reduced_queries = projection.transform(queries)
+
+            found = [slots(index.search(q, args.k)) for q in reduced_queries]
+            latencies = measure_latency(lambda q: index.search(q, args.k), reduced_queries)
+            print(f"{method:>9} {dims:>5} {index.vectors.nbytes / 2**20:>8.1f} {recall_at_k(truth, found):>9.3f} "
+                  f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}")
+            del index
+
+
+if __name__ == "__main__":
+    main()
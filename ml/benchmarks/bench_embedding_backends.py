@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Encodes the same mixed-length chunk corpus with each embedding backend and
+reports load time, chunks/s and, for the model backends, how closely the
+int8 quantized encoder agrees with the float one (mean cosine between their
+embeddings of the same chunk). Backends whose dependencies or model weights
+are not available are reported as skipped.
+
+Usage:
+    python benchmarks/bench_embedding_backends.py --chunks 2000
+    python benchmarks/bench_embedding_backends.py --backends hashing --chunks 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_backends import EMBEDDING_BACKENDS, create_backend
+from embedding_batcher import EmbeddingBatcher
+from vector_index import normalize_rows
+from bench_embedding_batcher import synthetic_chunks
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Embedding backend throughput benchmark')
+    parser.add_argument('--backends', nargs='+', default=['sentence-transformers', 'quantized', 'hashing'],
+                        choices=sorted(EMBEDDING_BACKENDS), help='Backends to compare')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2',
+                        help='SentenceTransformer model for the model backends')
+    parser.add_argument('--chunks', type=int, default=2000,
+                        help='Number of chunks to encode')
+    parser.add_argument('--max-batch-tokens', type=int, default=16384,
+                        help='Cap on padded tokens per encoder call')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed')
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks, args.seed)
+    embeddings = {}
+
+    print(f"{'backend':>22} {'load_s':>8} {'chunks/s':>10} {'dims':>5}")
+    for name in args.backends:
+        backend = create_backend(name) if name == 'hashing' else create_backend(name, model_name=args.model)
+        try:
+            start = time.perf_counter()
+            backend.load()
+            load_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"{name:>22} skipped: {e}")
+            continue
+
+        batcher = EmbeddingBatcher(backend.encode, max_batch_tokens=args.max_batch_tokens,
+                                   max_tokens=backend.max_seq_length)
+        batcher.encode(chunks[:32])
+        start = time.perf_counter()
+        embeddings[name] = np.asarray(batcher.encode(chunks), dtype=np.float32)
+        seconds = time.perf_counter() - start
+        print(f"{name:>22} {load_seconds:>8.2f} {len(chunks) / seconds:>10.1f} {embeddings[name].shape[1]:>5}")
+
+    if 'sentence-transformers' in embeddings and 'quantized' in embeddings:
+        agreement = np.sum(normalize_rows(embeddings['sentence-transformers']) *
+                           normalize_rows(embeddings['quantized']), axis=1)
+        print(f"int8 vs float cosine: mean {agreement.mean():.4f}, min {agreement.min():.4f}")
+
+
+if __name__ == "__main__":
+    main()
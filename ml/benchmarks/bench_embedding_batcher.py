@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Document Embedding Batching Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Encodes a corpus of mixed-length chunks three ways and reports chunks/s,
+padding overhead and peak RSS:
+
+    single     every chunk in one encoder call (today's store_documents)
+    fixed      fixed-size batches in input order
+    bucketed   EmbeddingBatcher: length-sorted batches under a token budget
+
+Each strategy runs in a fresh interpreter so peak RSS is its own. By default
+the encoder is simulated: it materializes padded (batch, tokens, hidden)
+activations like a transformer does; pass --model to use a real
+SentenceTransformer.
+
+Usage:
+    python benchmarks/bench_embedding_batcher.py --chunks 20000 --max-batch-tokens 16384
+    python benchmarks/bench_embedding_batcher.py --model all-MiniLM-L6-v2 --chunks 5000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_batcher import EmbeddingBatcher, approximate_tokens, peak_rss_bytes
+
+STRATEGIES = ('single', 'fixed', 'bucketed')
+
+
+def synthetic_chunks(num_chunks: int, seed: int):
+    """Chunks with a long-tailed length distribution, from a short table row to a full section"""
+    rng = np.random.default_rng(seed)
+    words = ['tax', 'deduction', 'section', '80C', 'GST', 'return', 'filing', 'mutual', 'fund', 'SIP']
+    lengths = np.clip(rng.lognormal(3.5, 1.0, size=num_chunks).astype(int), 3, 400)
+    return [' '.join(rng.choice(words, size=n)) for n in lengths]
+
+
+class SimulatedEncoder:
+    """Pads each batch to its longest text and runs a transformer-like block over the activations"""
+
+    def __init__(self, hidden: int = 384, max_tokens: int = 256):
+        self.hidden = hidden
+        self.max_tokens = max_tokens
+        self.projection = np.random.default_rng(0).standard_normal((hidden, hidden)).astype(np.float32) / hidden
+
+    def encode(self, texts, **kwargs):
+        tokens = min(self.max_tokens, max(approximate_tokens(text) for text in texts))
+        activations = np.ones((len(texts), tokens, self.hidden), dtype=np.float32)
+        activations = np.tanh(activations @ self.projection)
+        return activations.mean(axis=1)
+
+
+def run_strategy(strategy: str, args) -> dict:
+    """Encode the corpus with one strategy in this process"""
+    texts = synthetic_chunks(args.chunks, args.seed)
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        encode, max_tokens = model.encode, model.max_seq_length
+    else:
+        encoder = SimulatedEncoder()
+        encode, max_tokens = encoder.encode, encoder.max_tokens
+
+    baseline_rss = peak_rss_bytes()
+    batcher = EmbeddingBatcher(encode, max_batch_tokens=args.max_batch_tokens,
+                               max_batch_size=args.max_batch_size, max_tokens=max_tokens)
+    lengths = batcher.token_lengths(texts)
+
+    start = time.perf_counter()
+    if strategy == 'bucketed':
+        embeddings = batcher.encode(texts)
+        padded = batcher.stats()['padded_tokens']
+    else:
+        step = len(texts) if strategy == 'single' else args.fixed_batch_size
+        embeddings = np.vstack([encode(texts[i:i + step]) for i in range(0, len(texts), step)])
+        padded = sum(int(lengths[i:i + step].max()) * len(lengths[i:i + step]) for i in range(0, len(texts), step))
+    elapsed = time.perf_counter() - start
+
+    assert embeddings.shape[0] == len(texts)
+    return {
+        'chunks_per_second': len(texts) / elapsed,
+        'padding_ratio': padded / int(lengths.sum()),
+        'peak_rss_mib': peak_rss_bytes() / 2**20,
+        'encode_rss_mib': (peak_rss_bytes() - baseline_rss) / 2**20,
+    }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Length-bucketed vs naive embedding batching')
+    parser.add_argument('--chunks', type=int, default=20_000, help='Number of chunks to encode')
+    parser.add_argument('--max-batch-tokens', type=int, default=16384, help='Bucketed padded-token budget')
+    parser.add_argument('--max-batch-size', type=int, default=128, help='Bucketed texts per batch cap')
+    parser.add_argument('--fixed-batch-size', type=int, default=64, help='Texts per batch for "fixed"')
+    parser.add_argument('--model', default=None, help='Use this SentenceTransformer instead of the simulation')
+    parser.add_argument('--strategy', choices=STRATEGIES, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    if args.strategy:
+        print(json.dumps(run_strategy(args.strategy, args)))
+        return
+
+    print(f"{'strategy':>9} {'chunks/s':>10} {'padding':>8} {'peak_rss_MiB':>13} {'encode_rss_MiB':>15}")
+    for strategy in STRATEGIES:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), '--strategy', strategy] + sys.argv[1:],
+                                capture_output=True, text=True, check=True)
+        row = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{strategy:>9} {row['chunks_per_second']:>10.1f} {row['padding_ratio']:>8.2f} "
+              f"{row['peak_rss_mib']:>13.0f} {row['encode_rss_mib']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
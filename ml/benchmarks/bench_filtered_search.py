@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Metadata-Filtered Search Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Measures filtered top-k latency and recall at several filter selectivities
+(fraction of chunks matching the filter) for four strategies:
+
+    postfilter   over-fetch k * overfetch results, then drop non-matching ones
+    prefilter    score only the matching rows
+    mask         exact full scan with non-matching scores masked out
+    auto         the index's own choice between prefilter and mask
+
+Recall is measured against exact search over the matching chunks. Filter
+masks come from a MetadataIndex so bitset evaluation is part of the timing.
+
+Usage:
+    python benchmarks/bench_filtered_search.py --size 200000 --selectivity 0.01 0.1 0.5
+    python benchmarks/bench_filtered_search.py --index ivf --nlist 1024 --nprobe 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex, normalize_rows, top_k_indices
+from ann_index import IVFIndex
+from metadata_index import MetadataIndex
+from bench_utils import synthetic_embeddings, measure_latency, recall_at_k, slots
+
+
+def selectivity_labels(size: int, selectivities, rng: np.random.Generator):
+    """Per-chunk metadata with one field per selectivity, independent of the embeddings"""
+    records = [{} for _ in range(size)]
+    for selectivity in selectivities:
+        field = f"sel_{selectivity:g}"
+        for slot in np.flatnonzero(rng.random(size) < selectivity):
+            records[slot][field] = 'yes'
+    return records
+
+
+def postfilter(index, query, k, mask, overfetch):
+    """Today's approach: search without the filter and drop non-matching results"""
+    return [(slot, score) for slot, score in index.search(query, k * overfetch) if mask[slot]][:k]
+
+
+def masked(index, query, k, mask):
+    """Full scan with non-matching scores masked out, bypassing the pre-filter decision"""
+    scores = np.where(mask, index.vectors @ normalize_rows(query)[0], -np.inf)
+    return [(int(i), float(scores[i])) for i in top_k_indices(scores, k) if mask[i]]
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Filtered vector search latency vs selectivity')
+    parser.add_argument('--size', type=int, default=200_000, help='Number of chunks')
+    parser.add_argument('--dimension', type=int, default=384, help='Embedding dimension')
+    parser.add_argument('--selectivity', type=float, nargs='+', default=[0.01, 0.1, 0.5],
+                        help='Fractions of chunks matching the filter')
+    parser.add_argument('--index', choices=['exact', 'ivf'], default='exact', help='Index type')
+    parser.add_argument('--nlist', type=int, default=1024, help='IVF lists')
+    parser.add_argument('--nprobe', type=int, default=16, help='IVF lists probed per query')
+    parser.add_argument('--overfetch', type=int, default=10, help='Post-filter over-fetch factor')
+    parser.add_argument('--queries', type=int, default=100, help='Number of timed queries')
+    parser.add_argument('--k', type=int, default=10, help='Number of results per query')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_embeddings(args.size, args.dimension, rng)
+    queries = synthetic_embeddings(args.queries, args.dimension, np.random.default_rng(args.seed + 1))
+    ids = [str(i) for i in range(args.size)]
+
+    exact = VectorIndex(dimension=args.dimension)
+    exact.add(ids, ids, corpus)
+    if args.index == 'ivf':
+        index = IVFIndex(dimension=args.dimension, nlist=args.nlist, nprobe=args.nprobe,
+                         train_size=min(args.size, 64 * args.nlist))
+        index.train(corpus)
+        index.add(ids, ids, corpus)
+    else:
+        index = exact
+
+    metadata = MetadataIndex()
+    start = time.perf_counter()
+    metadata.add(range(args.size), selectivity_labels(args.size, args.selectivity, rng))
+    print(f"Metadata index build ({args.size} chunks): {time.perf_counter() - start:.2f}s, "
+          f"{metadata.stats()['bytes'] / 2**20:.1f} MiB of bitsets")
+
+    print(f"{'selectivity':>11} {'strategy':>11} {'recall@k':>9} {'p50_ms':>8} {'p99_ms':>8}")
+    for selectivity in args.selectivity:
+        filters = {f"sel_{selectivity:g}": 'yes'}
+        mask = metadata.mask(filters, len(index))
+        matching = np.flatnonzero(mask)
+        truth = [slots(exact.search_slots(q, args.k, matching)) for q in queries]
+
+        strategies = {
+            'postfilter': lambda q: postfilter(index, q, args.k, mask, args.overfetch),
+            'prefilter': lambda q: index.search_slots(q, args.k, np.flatnonzero(metadata.mask(filters, len(index)))),
+            'mask': lambda q: masked(index, q, args.k, metadata.mask(filters, len(index))),
+            'auto': lambda q: index.search(q, args.k, mask=metadata.mask(filters, len(index))),
+        }
+
+        for name, search in strategies.items():
+            found = [slots(search(q)) for q in queries]
+            latency = measure_latency(search, queries)
+            print(f"{selectivity:>11.0%} {name:>11} {recall_at_k(truth, found):>9.3f} "
+                  f"{np.percentile(latency, 50):>8.2f} {np.percentile(latency, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
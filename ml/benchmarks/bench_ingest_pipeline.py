@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Pipelined Ingestion Benchmark
+FinTwin AI Financial Twin - Document Processing Pipeline
+
+Ingests a directory of generated regulation-style markdown files two ways:
+
+    sequential   parse, embed, write one file at a time (the previous loop)
+    pipelined    ingest_pipeline.run_pipeline with the given stage settings
+
+Parsing uses the real rag_ingest.parse_file. The encoder is simulated like
+in bench_embedding_batcher (padded transformer-like activations) and the
+database write is simulated as a per-file round-trip plus per-row latency,
+during which the writer thread holds no CPU, as with a real connection.
+Reports files/s and each stage's utilization.
+
+Usage:
+    python benchmarks/bench_ingest_pipeline.py --files 200 --parse-workers 2 --embed-workers 1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_ingest import parse_file
+from ingest_pipeline import run_pipeline, STAGES
+from embedding_batcher import EmbeddingBatcher
+from bench_embedding_batcher import SimulatedEncoder
+
+
+def write_corpus(directory: Path, num_files: int, rng: np.random.Generator):
+    """Markdown files of 5-40 sections each"""
+    words = ['tax', 'deduction', 'section', '80C', 'GST', 'return', 'filing', 'assessee', 'rebate', 'TDS']
+    for i in range(num_files):
+        sections = [f"# Circular {i}"]
+        for j in range(int(rng.integers(5, 40))):
+            sections.append(f"## Clause {j}\n" + ' '.join(rng.choice(words, size=int(rng.integers(20, 120)))))
+        (directory / f"circular_{i:04d}.md").write_text('\n\n'.join(sections))
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Pipelined ingestion benchmark')
+    parser.add_argument('--files', type=int, default=200, help='Markdown files to ingest')
+    parser.add_argument('--parse-workers', type=int, default=2, help='Parser processes')
+    parser.add_argument('--embed-workers', type=int, default=1, help='Encoder threads')
+    parser.add_argument('--queue-size', type=int, default=8, help='Files buffered between stages')
+    parser.add_argument('--embed-batch-chunks', type=int, default=256, help='Chunks per encoder call')
+    parser.add_argument('--write-ms', type=float, default=5.0, help='Simulated round-trip per file write')
+    parser.add_argument('--write-row-ms', type=float, default=0.2, help='Simulated latency per written row')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    batcher = EmbeddingBatcher(SimulatedEncoder().encode)
+
+    def embed(chunks):
+        return batcher.encode([chunk['content'] for chunk in chunks])
+
+    def write(chunks, embeddings, name):
+        time.sleep((args.write_ms + args.write_row_ms * len(chunks)) / 1000)
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        write_corpus(directory, args.files, np.random.default_rng(args.seed))
+        files = sorted(directory.glob('*.md'))
+
+        start = time.perf_counter()
+        chunks = 0
+        for path in files:
+            parsed = parse_file(path)
+            write(parsed, embed(parsed), path.name)
+            chunks += len(parsed)
+        sequential = time.perf_counter() - start
+        print(f"{len(files)} files, {chunks} chunks")
+        print(f"{'sequential':>12} {len(files) / sequential:>8.1f} files/s {chunks / sequential:>9.1f} chunks/s")
+
+        result = run_pipeline(files, parse_file, embed, write, parse_workers=args.parse_workers,
+                              embed_workers=args.embed_workers, queue_size=args.queue_size,
+                              embed_batch_chunks=args.embed_batch_chunks)
+        wall = result['wall_seconds']
+        print(f"{'pipelined':>12} {result['files'] / wall:>8.1f} files/s {result['chunks'] / wall:>9.1f} chunks/s "
+              f"({sequential / wall:.2f}x)")
+        for stage in STAGES:
+            stage_stats = result['stages'][stage]
+            print(f"{stage:>12} utilization {stage_stats['utilization']:>5.0%}  "
+                  f"busy {stage_stats['busy_seconds']:>6.2f}s  blocked {stage_stats['blocked_seconds']:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Query Micro-Batching Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Drives the MicroBatcher with N concurrent clients and reports throughput and
+per-request latency for several batching windows, against max_batch_size=1
+(no coalescing). By default the encoder is simulated with a fixed per-call
+overhead plus a per-item cost; pass --model to use a real SentenceTransformer.
+
+Usage:
+    python benchmarks/bench_micro_batcher.py --concurrency 64 --wait-ms 0 2 5
+    python benchmarks/bench_micro_batcher.py --model all-MiniLM-L6-v2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from micro_batcher import MicroBatcher
+
+
+def simulated_encoder(call_overhead_ms: float, per_item_ms: float, dimension: int = 384):
+    """Encoder whose cost is dominated by per-call overhead, like a small transformer on CPU"""
+    def encode(texts):
+        time.sleep((call_overhead_ms + per_item_ms * len(texts)) / 1000)
+        return np.zeros((len(texts), dimension), dtype=np.float32)
+    return encode
+
+
+async def drive(batcher: MicroBatcher, concurrency: int, requests_per_client: int):
+    """Run closed-loop clients; return (elapsed seconds, latencies in ms)"""
+    latencies = []
+
+    async def client(client_id: int):
+        for i in range(requests_per_client):
+            start = time.perf_counter()
+            await batcher.submit(f"client {client_id} question {i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(c) for c in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    await batcher.close()
+    return elapsed, np.array(latencies)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Micro-batching throughput vs latency benchmark')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64],
+                        help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=20,
+                        help='Requests per client')
+    parser.add_argument('--max-batch-size', type=int, default=32,
+                        help='Largest coalesced batch')
+    parser.add_argument('--wait-ms', type=float, nargs='+', default=[0.0, 2.0, 5.0],
+                        help='Batching windows to evaluate')
+    parser.add_argument('--call-overhead-ms', type=float, default=8.0,
+                        help='Simulated fixed cost per encoder call')
+    parser.add_argument('--per-item-ms', type=float, default=0.5,
+                        help='Simulated cost per encoded text')
+    parser.add_argument('--model', default=None,
+                        help='Use this SentenceTransformer model instead of the simulation')
+    args = parser.parse_args()
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        encode = lambda texts: model.encode(texts, convert_to_tensor=False)
+    else:
+        encode = simulated_encoder(args.call_overhead_ms, args.per_item_ms)
+
+    print(f"{'clients':>7} {'mode':>16} {'qps':>9} {'p50_ms':>8} {'p99_ms':>8} {'batch':>6}")
+    for concurrency in args.concurrency:
+        modes = [('unbatched', 1, 0.0)] + [
+            (f"batched {wait:g}ms", args.max_batch_size, wait) for wait in args.wait_ms
+        ]
+        for label, batch_size, wait in modes:
+            batcher = MicroBatcher(encode, max_batch_size=batch_size, max_wait_ms=wait)
+            elapsed, latencies = asyncio.run(drive(batcher, concurrency, args.requests))
+            print(f"{concurrency:>7} {label:>16} {len(latencies) / elapsed:>9.1f} "
+                  f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f} "
+                  f"{batcher.stats()['mean_batch_size']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
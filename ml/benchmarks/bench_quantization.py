@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Quantized Index Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Reports memory reduction, recall@k against exact search and query speedup
+for int8 scalar quantization and product quantization at several code sizes.
+
+Usage:
+    python benchmarks/bench_quantization.py --size 200000 --pq-subspaces 96 48 24 12
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+from quantization import QuantizedIndex
+from bench_utils import synthetic_embeddings, measure_latency, recall_at_k, slots
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Quantized index recall/memory/speed benchmark')
+    parser.add_argument('--size', type=int, default=200_000,
+                        help='Number of chunks in the corpus')
+    parser.add_argument('--dimension', type=int, default=384,
+                        help='Embedding dimension')
+    parser.add_argument('--pq-subspaces', type=int, nargs='+', default=[96, 48, 24, 12],
+                        help='PQ code sizes (bytes per vector) to evaluate')
+    parser.add_argument('--rescore-factor', type=int, default=4,
+                        help='Candidates rescored exactly per result')
+    parser.add_argument('--train-size', type=int, default=50_000,
+                        help='Vectors used to train each quantizer')
+    parser.add_argument('--queries', type=int, default=100,
+                        help='Number of timed queries')
+    parser.add_argument('--k', type=int, default=10,
+                        help='Number of results per query')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_embeddings(args.size, args.dimension, rng)
+    queries = synthetic_embeddings(args.queries, args.dimension, np.random.default_rng(args.seed + 1))
+    ids = [str(i) for i in range(args.size)]
+
+    exact = VectorIndex(dimension=args.dimension)
+    exact.add(ids, ids, corpus, [{}] * args.size)
+    truth = [slots(exact.search(q, args.k)) for q in queries]
+    exact_p50 = np.percentile(measure_latency(lambda q: exact.search(q, args.k), queries), 50)
+    full_bytes = exact.vectors.nbytes
+
+    settings = [('int8', {})] + [('pq', {'num_subspaces': m}) for m in args.pq_subspaces]
+
+    print(f"{'setting':>10} {'bytes/vec':>9} {'reduction':>9} {'recall@k':>9} {'p50_ms':>8} {'speedup':>8}")
+    print(f"{'float32':>10} {args.dimension * 4:>9} {1.0:>8.1f}x {1.0:>9.3f} {exact_p50:>8.2f} {1.0:>7.2f}x")
+
+    for quantization, params in settings:
+        with tempfile.TemporaryDirectory() as storage_dir:
+            index = QuantizedIndex(dimension=args.dimension, quantization=quantization,
+                                   quantizer_params=params, rescore_factor=args.rescore_factor,
+                                   train_size=args.train_size, storage_dir=storage_dir)
+            index.add(ids, ids, corpus, [{}] * args.size)
+            if not index.is_trained:
+                index.train()
+
+            found = [slots(index.search(q, args.k)) for q in queries]
+            p50 = np.percentile(measure_latency(lambda q: index.search(q, args.k), queries), 50)
+            code_bytes = index.memory_usage()['codes_bytes']
+
+            label = quantization if quantization == 'int8' else f"pq{params['num_subspaces']}"
+            print(f"{label:>10} {code_bytes // args.size:>9} {full_bytes / code_bytes:>8.1f}x "
+                  f"{recall_at_k(truth, found):>9.3f} {p50:>8.2f} {exact_p50 / p50:>7.2f}x")
+            del index
+
+
+if __name__ == "__main__":
+    main()
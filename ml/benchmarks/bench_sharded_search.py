@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Sharded Vector Search Scaling Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Measures exact top-k latency and single-client throughput of the
+ShardedIndex at several shard counts against the in-process VectorIndex
+scan, and checks every sharded result list is identical to the
+single-shard one.
+
+Usage:
+    python benchmarks/bench_sharded_search.py --size 1000000 --shards 1 2 4 8 16
+    python benchmarks/bench_sharded_search.py --size 200000 --dimension 768
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+from sharded_index import ShardedIndex
+from bench_utils import synthetic_embeddings, measure_latency
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Sharded exact search scaling')
+    parser.add_argument('--size', type=int, default=1_000_000, help='Number of chunks')
+    parser.add_argument('--dimension', type=int, default=384, help='Embedding dimension')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='Shard counts')
+    parser.add_argument('--queries', type=int, default=100, help='Number of timed queries')
+    parser.add_argument('--k', type=int, default=10, help='Number of results per query')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_embeddings(args.size, args.dimension, rng)
+    queries = synthetic_embeddings(args.queries, args.dimension, np.random.default_rng(args.seed + 1))
+    ids = [str(i) for i in range(args.size)]
+
+    exact = VectorIndex(dimension=args.dimension)
+    exact.add(ids, ids, corpus)
+    baseline = [exact.search(q, args.k) for q in queries]
+    latency = measure_latency(lambda q: exact.search(q, args.k), queries)
+    base_p50 = np.percentile(latency, 50)
+
+    print(f"Cores: {os.cpu_count()}, chunks: {args.size}, dimension: {args.dimension}")
+    print(f"{'shards':>8} {'p50_ms':>8} {'p99_ms':>8} {'qps':>8} {'speedup':>8} {'exact':>6}")
+    print(f"{'inproc':>8} {base_p50:>8.2f} {np.percentile(latency, 99):>8.2f} "
+          f"{1000 / latency.mean():>8.1f} {1.0:>8.2f} {'yes':>6}")
+
+    for num_shards in args.shards:
+        index = ShardedIndex(num_shards=num_shards, min_shard_rows=1, dimension=args.dimension)
+        index.add(ids, ids, corpus)
+        # First query spawns and warms the worker processes
+        found = [index.search(q, args.k) for q in queries]
+        identical = found == baseline
+
+        latency = measure_latency(lambda q: index.search(q, args.k), queries)
+        p50 = np.percentile(latency, 50)
+        print(f"{num_shards:>8} {p50:>8.2f} {np.percentile(latency, 99):>8.2f} "
+              f"{1000 / latency.mean():>8.1f} {base_p50 / p50:>8.2f} {'yes' if identical else 'NO':>6}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Index Snapshot Open-Time Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Compares opening a memory-mapped snapshot against a heap np.load of the same
+vector block, plus the first-query latency on the mapped index.
+
+Usage:
+    python benchmarks/bench_snapshot.py --size 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+from index_snapshot import write_snapshot, read_snapshot
+from bench_utils import synthetic_embeddings
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Snapshot open-time benchmark')
+    parser.add_argument('--size', type=int, default=200_000,
+                        help='Number of chunks in the corpus')
+    parser.add_argument('--dimension', type=int, default=384,
+                        help='Embedding dimension')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_embeddings(args.size, args.dimension, rng)
+    ids = [f"doc_{i}_chunk_0" for i in range(args.size)]
+
+    index = VectorIndex(dimension=args.dimension)
+    index.add(ids, ids, corpus, [{'document_id': i} for i in ids])
+
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        path = write_snapshot(index, root)
+        print(f"write snapshot:      {time.perf_counter() - start:8.3f}s")
+
+        start = time.perf_counter()
+        np.load(os.path.join(path, 'vectors.npy'))
+        print(f"np.load (heap):      {(time.perf_counter() - start) * 1000:8.2f}ms")
+
+        start = time.perf_counter()
+        mapped = read_snapshot(path)
+        print(f"read_snapshot (mmap):{(time.perf_counter() - start) * 1000:8.2f}ms")
+
+        start = time.perf_counter()
+        mapped.search(corpus[0], k=5)
+        print(f"first query:         {(time.perf_counter() - start) * 1000:8.2f}ms")
+
+        start = time.perf_counter()
+        mapped.search(corpus[1], k=5)
+        print(f"warm query:          {(time.perf_counter() - start) * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+FinTwin AI Financial Twin - ML Service
+
+Measures how long a fresh interpreter takes to import the service modules
+(time until uvicorn can bind) and, optionally, how long background model
+loading takes until the readiness gate opens. Exits non-zero when the import
+time exceeds --budget-ms, so it can guard against heavy imports creeping back
+onto the startup path.
+
+Usage:
+    python benchmarks/bench_startup.py --module app --budget-ms 1500
+    python benchmarks/bench_startup.py --module rag_service --importtime
+    python benchmarks/bench_startup.py --load-models
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_import(module: str) -> float:
+    """Wall time in ms for a fresh interpreter to import module"""
+    script = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=ML_DIR,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int = 15):
+    """Parse `python -X importtime` output into the slowest cumulative imports"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=ML_DIR, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        rows.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def time_model_loading() -> float:
+    """Wall time in ms for RAGService model loading plus warm-up"""
+    script = (
+        "import time\n"
+        "from rag_service import RAGService\n"
+        "service = RAGService(load_models=False)\n"
+        "start = time.perf_counter()\n"
+        "service.initialize_models(warm_up=True)\n"
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=ML_DIR,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Service import-time and model-loading benchmark')
+    parser.add_argument('--module', default='app', help='Module to import')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to time')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='Fail if the median import time exceeds this')
+    parser.add_argument('--importtime', action='store_true',
+                        help='Show the slowest imports from -X importtime')
+    parser.add_argument('--load-models', action='store_true',
+                        help='Also time background model loading and warm-up')
+    args = parser.parse_args()
+
+    timings = np.array([time_import(args.module) for _ in range(args.repeat)])
+    median = float(np.median(timings))
+    print(f"import {args.module}: median {median:.1f} ms, "
+          f"min {timings.min():.1f} ms, max {timings.max():.1f} ms over {args.repeat} runs")
+
+    if args.importtime:
+        print("\nSlowest imports (cumulative ms):")
+        for cumulative_ms, name in slowest_imports(args.module):
+            print(f"  {cumulative_ms:>9.1f}  {name}")
+
+    if args.load_models:
+        print(f"\nmodel loading + warm-up: {time_model_loading():.1f} ms")
+
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"\nFAIL: import time {median:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Shared helpers for the retrieval benchmarks
+FinTwin AI Financial Twin - Retrieval Layer
+"""
+
+import time
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+
+def synthetic_embeddings(num_vectors: int,
+                         dimension: int,
+                         rng: np.random.Generator,
+                         num_clusters: int = 256,
+                         noise: float = 0.35) -> np.ndarray:
+    """
+    Generate clustered float32 embeddings
+
+    Real sentence embeddings are far from uniform on the sphere; a gaussian
+    mixture gives approximate indexes a realistic amount of structure.
+    """
+    centres = rng.standard_normal((num_clusters, dimension), dtype=np.float32)
+    vectors = np.empty((num_vectors, dimension), dtype=np.float32)
+    batch = 100_000
+    for start in range(0, num_vectors, batch):
+        count = min(batch, num_vectors - start)
+        labels = rng.integers(0, num_clusters, size=count)
+        vectors[start:start + count] = centres[labels] + noise * rng.standard_normal(
+            (count, dimension), dtype=np.float32)
+    return vectors
+
+
+def measure_latency(search: Callable[[np.ndarray], object], queries: np.ndarray) -> np.ndarray:
+    """Return per-query latencies in milliseconds"""
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        search(query)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return latencies
+
+
+def recall_at_k(truth: Sequence[Sequence[int]], found: Sequence[Sequence[int]]) -> float:
+    """Mean fraction of the true top-k slots present in each result list"""
+    hits = [len(set(t) & set(f)) / max(len(t), 1) for t, f in zip(truth, found)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def slots(results: List[tuple]) -> List[int]:
+    """Row slots from a list of (slot, score) search results"""
+    return [slot for slot, _ in results]
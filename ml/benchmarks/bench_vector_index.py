@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Vector Index Query Latency Benchmark
+FinTwin AI Financial Twin - Retrieval Layer
+
+Measures p50/p99 query latency of the exact in-memory VectorIndex on random
+unit vectors. Defaults match all-MiniLM-L6-v2 (384 dimensions).
+
+Usage:
+    python benchmarks/bench_vector_index.py --sizes 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the ml directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import VectorIndex
+
+
+def build_index(num_chunks: int, dimension: int, batch_size: int, rng: np.random.Generator) -> VectorIndex:
+    """Populate an index with random chunks in batches, as store_documents would"""
+    index = VectorIndex(dimension=dimension)
+    for start in range(0, num_chunks, batch_size):
+        count = min(batch_size, num_chunks - start)
+        embeddings = rng.standard_normal((count, dimension), dtype=np.float32)
+        ids = [f"doc_{start + i}_chunk_0" for i in range(count)]
+        index.add(ids, ids, embeddings, [{} for _ in range(count)])
+    return index
+
+
+def measure_latency(index: VectorIndex, queries: np.ndarray, k: int) -> np.ndarray:
+    """Return per-query latencies in milliseconds"""
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        index.search(query, k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return latencies
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Vector index query latency benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='Corpus sizes (number of chunks) to benchmark')
+    parser.add_argument('--dimension', type=int, default=384,
+                        help='Embedding dimension')
+    parser.add_argument('--queries', type=int, default=200,
+                        help='Number of timed queries per corpus size')
+    parser.add_argument('--k', type=int, default=5,
+                        help='Number of results per query')
+    parser.add_argument('--batch-size', type=int, default=10_000,
+                        help='Chunks inserted per add() call while building')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'chunks':>10} {'build_s':>8} {'p50_ms':>8} {'p99_ms':>8} {'mem_mb':>8}")
+    for size in args.sizes:
+        start = time.perf_counter()
+        index = build_index(size, args.dimension, args.batch_size, rng)
+        build_seconds = time.perf_counter() - start
+
+        queries = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+        measure_latency(index, queries[:10], args.k)  # warm-up
+        latencies = measure_latency(index, queries, args.k)
+
+        memory_mb = index.vectors.nbytes / (1024 * 1024)
+        print(f"{size:>10} {build_seconds:>8.2f} {np.percentile(latencies, 50):>8.2f} "
+              f"{np.percentile(latencies, 99):>8.2f} {memory_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
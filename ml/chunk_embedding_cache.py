@@ -0,0 +1,213 @@
+"""
+Content-addressed chunk embedding cache
+FinTwin AI Financial Twin - Retrieval Layer
+
+Persistent map from (embedding model, hash of chunk text) to the chunk's
+embedding, kept in a local SQLite file so it survives restarts and is shared
+by ingestion runs and the RAG service. Boilerplate that repeats across
+filings, and documents that are stored again unchanged, are encoded once per
+model instead of once per copy.
+
+Entries are evicted least-recently-used first once the stored vectors exceed
+max_bytes, measured in the database itself since other processes write to the
+same file. Vectors are stored as raw float32 bytes; the model name is part
+of the key, so switching models never returns a stale embedding.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of host parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def text_key(text: str) -> bytes:
+    """Content address of a chunk's text"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class ChunkEmbeddingCache:
+    """
+    Thread-safe SQLite-backed cache of chunk embeddings with a size cap
+    """
+
+    def __init__(self,
+                 path: str = ':memory:',
+                 model_name: str = '',
+                 max_bytes: int = 1024 * 1024 * 1024,
+                 evict_fraction: float = 0.1):
+        """
+        Args:
+            path: SQLite database file; ':memory:' keeps the cache in-process
+            model_name: Embedding model the vectors come from; part of every key
+            max_bytes: Cap on the bytes of stored vectors
+            evict_fraction: Share of max_bytes freed below the cap when
+                evicting, so eviction runs once per batch rather than per entry
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
+        if not 0 <= evict_fraction < 1:
+            raise ValueError("evict_fraction must be in [0, 1)")
+
+        self.path = path
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.evict_fraction = evict_fraction
+
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            # Readers in other processes don't block the writer
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key BLOB NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+        self._bytes = self._stored_bytes()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.encode_seconds = 0.0
+
+    def _stored_bytes(self) -> int:
+        """Bytes of vectors in the database, including those written by other processes"""
+        return self._db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """Cached embeddings for the given keys, marking them recently used"""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for offset in range(0, len(keys), _LOOKUP_BATCH):
+                batch = list(keys[offset:offset + _LOOKUP_BATCH])
+                placeholders = ','.join('?' * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    [self.model_name] + batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+                self._db.executemany("UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                                     [(now, self.model_name, key) for key, _ in rows])
+            self._db.commit()
+        return found
+
+    def put_many(self, keys: Sequence[bytes], embeddings: np.ndarray):
+        """Store embeddings, evicting least-recently-used entries past max_bytes"""
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(keys), -1)
+        now = time.time()
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings (model, key, vector, last_used) "
+                                 "VALUES (?, ?, ?, ?)",
+                                 [(self.model_name, key, embedding.tobytes(), now)
+                                  for key, embedding in zip(keys, embeddings)])
+            # The inserts hold the write lock until commit, so this total counts
+            # every process's entries and cannot move before eviction is done
+            self._bytes = self._stored_bytes()
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop the least recently used entries until below the eviction target (lock held)"""
+        target = self.max_bytes * (1 - self.evict_fraction)
+        while self._bytes > target:
+            rows = self._db.execute("SELECT rowid, LENGTH(vector) FROM embeddings "
+                                    "ORDER BY last_used LIMIT ?", (_LOOKUP_BATCH,)).fetchall()
+            if not rows:
+                break
+            victims = []
+            for rowid, size in rows:
+                if self._bytes <= target:
+                    break
+                victims.append((rowid,))
+                self._bytes -= size
+            self._db.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+            self.evictions += len(victims)
+
+    def encode(self, texts: Sequence[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Embeddings for texts, encoding only those not cached
+
+        Args:
+            texts: Chunk texts
+            encode_fn: Maps a list of texts to an array of embeddings
+
+        Returns:
+            float32 array with one row per text, in input order
+        """
+        if not texts:
+            return np.array([])
+
+        keys = [text_key(text) for text in texts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+
+        # Each distinct missing text is encoded once, however often it repeats
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        seconds = 0.0
+        if missing:
+            start = time.perf_counter()
+            encoded = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            seconds = time.perf_counter() - start
+            self.put_many(list(missing), encoded)
+            found.update(zip(missing, encoded))
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+            self.encode_seconds += seconds
+        return np.vstack([found[key] for key in keys])
+
+    def clear(self):
+        """Drop every entry for every model; counters are kept"""
+        with self._lock:
+            self._db.execute("DELETE FROM embeddings")
+            self._db.commit()
+            self._bytes = 0
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'model_name': self.model_name,
+                'bytes': self._stored_bytes(),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'encode_seconds': self.encode_seconds,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
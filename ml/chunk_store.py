@@ -0,0 +1,100 @@
+"""
+Chunk store for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+Everything the service keeps next to a vector index, keyed by the index's
+row slots: the document -> chunk slots map used for O(chunks in doc)
+updates and deletes, the metadata bitsets used for filtering and the BM25
+postings used for hybrid retrieval. A ChunkStore belongs to exactly one
+index and is caught up with the rows appended to it since the last sync.
+It also records the projection (if any) the index's vectors were reduced
+with, so chunks and queries for that index always go through the same one.
+"""
+
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from metadata_index import MetadataIndex
+from lexical_index import BM25Index
+from dimension_reduction import projection_version
+
+
+def filter_fields(chunk_metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Filterable fields of a chunk: its document id plus the document's metadata"""
+    return {'document_id': chunk_metadata.get('document_id'), **chunk_metadata.get('metadata', {})}
+
+
+class ChunkStore:
+    """
+    Document map, metadata index and BM25 index over one vector index's row slots
+    """
+
+    def __init__(self, lexical_params: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            lexical_params: Keyword arguments for the BM25Index
+        """
+        self.metadata_index = MetadataIndex()
+        self.lexical_index = BM25Index(**(lexical_params or {}))
+        self._document_slots: Dict[str, List[int]] = {}
+        self._indexed_slots = 0
+        self._lock = threading.Lock()
+
+        # Dimensionality reduction applied to embeddings before they reach the index
+        self.projection = None
+
+    @property
+    def num_documents(self) -> int:
+        return len(self._document_slots)
+
+    def sync(self, index):
+        """Index the chunks appended to the vector index since the last call"""
+        with self._lock:
+            if len(index) < self._indexed_slots:
+                # The index was cleared; start over
+                self._clear()
+
+            start, end = self._indexed_slots, len(index)
+            if end <= start:
+                return
+
+            slots = range(start, end)
+            records = [filter_fields(index.metadatas[slot]) for slot in slots]
+            for slot, record in zip(slots, records):
+                if record['document_id'] is not None:
+                    self._document_slots.setdefault(str(record['document_id']), []).append(slot)
+            self.metadata_index.add(slots, records)
+            self.lexical_index.add(slots, index.texts[start:end])
+            self._indexed_slots = end
+
+    def document_slots(self, document_id: str) -> List[int]:
+        """Row slots of a document's chunks"""
+        with self._lock:
+            return list(self._document_slots.get(str(document_id), []))
+
+    def pop_document(self, document_id: str) -> List[int]:
+        """Forget a document, returning the row slots its chunks occupied"""
+        with self._lock:
+            return self._document_slots.pop(str(document_id), [])
+
+    def _clear(self):
+        self.metadata_index.clear()
+        self.lexical_index.clear()
+        self._document_slots = {}
+        self._indexed_slots = 0
+
+    def project(self, embeddings: np.ndarray) -> np.ndarray:
+        """Embeddings in the index's vector space"""
+        if self.projection is None:
+            return embeddings
+        return self.projection.transform(embeddings)
+
+    def stats(self) -> Dict[str, Any]:
+        """Document count plus the metadata and BM25 index stats"""
+        return {
+            'documents': self.num_documents,
+            'projection': projection_version(self.projection) if self.projection is not None else None,
+            'metadata_index': self.metadata_index.stats(),
+            'lexical_index': self.lexical_index.stats()
+        }
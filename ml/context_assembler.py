@@ -0,0 +1,205 @@
+"""
+Token-budgeted context assembly for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+Prompt length is what drives generation latency, and retrieved chunks are
+often long and overlapping (the same paragraph from two versions of a
+circular, neighbouring chunks sharing their overlap). The ContextAssembler
+orders the retrieved chunks by maximal marginal relevance over the chunk
+embeddings the index already holds, drops near-duplicates of chunks already
+taken, and fills a token budget; a chunk that no longer fits is cut down to
+its sentences that share the most terms with the query.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from vector_index import normalize_rows
+from embedding_batcher import approximate_tokens
+from lexical_index import tokenize
+from text_chunker import sentence_boundaries
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = "\n\n"
+
+
+@dataclass
+class AssembledContext:
+    """LLM context built from retrieved chunks, with what it cost and saved"""
+    text: str
+    sources: List[Dict[str, Any]]
+    tokens: int
+    retrieved_tokens: int
+    duplicates_dropped: int = 0
+    chunks_truncated: int = 0
+    chunks_over_budget: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.retrieved_tokens - self.tokens
+
+    def stats(self) -> Dict[str, int]:
+        """Prompt tokens used and saved, and why chunks were left out"""
+        return {
+            'tokens': self.tokens,
+            'retrieved_tokens': self.retrieved_tokens,
+            'saved_tokens': self.saved_tokens,
+            'chunks': len(self.sources),
+            'duplicates_dropped': self.duplicates_dropped,
+            'chunks_truncated': self.chunks_truncated,
+            'chunks_over_budget': self.chunks_over_budget
+        }
+
+
+class ContextAssembler:
+    """
+    Builds a de-duplicated, token-budgeted context from ranked chunks
+    """
+
+    def __init__(self,
+                 max_tokens: Optional[int] = 2048,
+                 mmr_lambda: float = 0.7,
+                 duplicate_threshold: float = 0.95,
+                 min_trim_tokens: int = 32,
+                 token_counter: Optional[Callable[[str], int]] = None):
+        """
+        Args:
+            max_tokens: Context token budget; None for no budget (de-duplication only)
+            mmr_lambda: Relevance weight in maximal marginal relevance; 1.0 ranks
+                by relevance alone, lower values favour chunks unlike those taken
+            duplicate_threshold: Chunks at least this cosine-similar to a chunk
+                already taken are dropped
+            min_trim_tokens: Smallest remaining budget worth filling with a
+                chunk's best sentences
+            token_counter: Token count of a text; approximate_tokens if None
+        """
+        if not 0.0 <= mmr_lambda <= 1.0:
+            raise ValueError("mmr_lambda must be between 0 and 1")
+
+        self.max_tokens = max_tokens
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+        self.min_trim_tokens = min_trim_tokens
+        self.token_counter = token_counter or approximate_tokens
+
+        self._lock = threading.Lock()
+        self.contexts = 0
+        self.tokens = 0
+        self.saved_tokens = 0
+        self.duplicates_dropped = 0
+        self.chunks_truncated = 0
+
+    def _trim(self, text: str, query_terms: set, budget: int) -> str:
+        """The sentences of text sharing most terms with the query that fit the budget, in text order"""
+        edges = [0] + sentence_boundaries(text) + [len(text)]
+        sentences = [text[lo:hi].strip() for lo, hi in zip(edges[:-1], edges[1:])]
+        sentences = [sentence for sentence in sentences if sentence]
+        overlap = [len(query_terms.intersection(tokenize(sentence))) for sentence in sentences]
+
+        kept, used = [], 0
+        # Best overlap first; ties keep the earlier sentence
+        for i in sorted(range(len(sentences)), key=lambda i: (-overlap[i], i)):
+            cost = self.token_counter(sentences[i])
+            if used + cost <= budget:
+                kept.append(i)
+                used += cost
+        return ' '.join(sentences[i] for i in sorted(kept))
+
+    def assemble(self,
+                 sources: Sequence[Dict[str, Any]],
+                 query: Optional[str] = None,
+                 chunk_embeddings: Optional[np.ndarray] = None) -> AssembledContext:
+        """
+        Build the context for one query
+
+        Args:
+            sources: Retrieved chunks, best first, with 'content' and (optionally)
+                'similarity_score'
+            query: Query text, used to pick sentences when a chunk is trimmed
+            chunk_embeddings: Index vectors of the sources, one row each; without
+                them only exact duplicate texts are dropped
+
+        Returns:
+            AssembledContext with the selected chunks in selection order
+        """
+        texts = [source['content'] for source in sources]
+        lengths = [self.token_counter(text) for text in texts]
+        count = len(texts)
+        relevance = np.array([float(source.get('similarity_score', 0.0)) for source in sources])
+        similarity = None
+        if chunk_embeddings is not None and count:
+            vectors = normalize_rows(chunk_embeddings)
+            similarity = vectors @ vectors.T
+        redundancy = np.zeros(count)
+
+        query_terms = set(tokenize(query)) if query else set()
+        budget = self.max_tokens if self.max_tokens is not None else float('inf')
+        remaining = list(range(count))
+        seen_texts = set()
+        selected, parts = [], []
+        used = duplicates = truncated = over_budget = 0
+
+        while remaining and used < budget:
+            scores = relevance[remaining]
+            if similarity is not None and selected:
+                scores = self.mmr_lambda * scores - (1 - self.mmr_lambda) * redundancy[remaining]
+            # argmax takes the first of equal scores, so rank order breaks ties
+            best = remaining.pop(int(np.argmax(scores)))
+
+            if texts[best] in seen_texts or (selected and redundancy[best] >= self.duplicate_threshold):
+                duplicates += 1
+                continue
+
+            text, cost = texts[best], lengths[best]
+            if used + cost > budget:
+                left = budget - used
+                text = self._trim(text, query_terms, left) if left >= self.min_trim_tokens else ''
+                if not text:
+                    over_budget += 1
+                    continue
+                truncated += 1
+                cost = self.token_counter(text)
+
+            seen_texts.add(texts[best])
+            selected.append(best)
+            parts.append(text)
+            used += cost
+            if similarity is not None:
+                np.maximum(redundancy, similarity[best], out=redundancy)
+
+        over_budget += len(remaining)
+        context = AssembledContext(
+            text=SEPARATOR.join(parts),
+            sources=[sources[i] for i in selected],
+            tokens=used,
+            retrieved_tokens=sum(lengths),
+            duplicates_dropped=duplicates,
+            chunks_truncated=truncated,
+            chunks_over_budget=over_budget
+        )
+
+        with self._lock:
+            self.contexts += 1
+            self.tokens += context.tokens
+            self.saved_tokens += context.saved_tokens
+            self.duplicates_dropped += duplicates
+            self.chunks_truncated += truncated
+        return context
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals over every context assembled"""
+        with self._lock:
+            return {
+                'contexts': self.contexts,
+                'tokens': self.tokens,
+                'saved_tokens': self.saved_tokens,
+                'mean_tokens': self.tokens / self.contexts if self.contexts else 0.0,
+                'duplicates_dropped': self.duplicates_dropped,
+                'chunks_truncated': self.chunks_truncated,
+                'max_tokens': self.max_tokens
+            }
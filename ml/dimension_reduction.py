@@ -0,0 +1,149 @@
+"""
+Embedding dimensionality reduction for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+A projection maps full encoder embeddings to fewer dimensions before they
+are indexed, and every query through the same projection before it is
+searched, cutting index memory and scan cost proportionally:
+
+    pca        orthogonal projection onto the top principal components of a
+               corpus sample
+    truncate   keep the leading dimensions (for Matryoshka-style encoders)
+
+Each trained projection has a version derived from its parameters. It is
+saved next to the vectors it produced (see index_snapshot) so a corpus is
+only ever queried through the projection it was built with.
+"""
+
+import hashlib
+import numpy as np
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PCAProjection:
+    """
+    Projection onto the top principal components of a training sample
+
+    Components are fitted on the centred sample but applied without
+    re-centring: the projection is then a partial rotation, so inner
+    products (and cosine ranking, which the index computes after
+    normalizing) are preserved exactly at full rank.
+    """
+
+    method = 'pca'
+
+    def __init__(self, dimensions: int = 128):
+        """
+        Args:
+            dimensions: Output dimension
+        """
+        if dimensions < 1:
+            raise ValueError("dimensions must be at least 1")
+        self.dimensions = dimensions
+        self.components: Optional[np.ndarray] = None
+        self.explained_variance_ratio: Optional[float] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.components is not None
+
+    def train(self, vectors: np.ndarray):
+        """Fit the principal components of the sample"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[1] < self.dimensions:
+            raise ValueError(f"Cannot project {vectors.shape[1]} dimensions down to {self.dimensions}")
+        if vectors.shape[0] < self.dimensions:
+            raise ValueError(f"PCA to {self.dimensions} dimensions needs at least {self.dimensions} training vectors")
+
+        _, singular_values, vt = np.linalg.svd(vectors - vectors.mean(axis=0), full_matrices=False)
+        self.components = np.ascontiguousarray(vt[:self.dimensions], dtype=np.float32)
+        variance = singular_values ** 2
+        self.explained_variance_ratio = float(variance[:self.dimensions].sum() / variance.sum())
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to rebuild the trained projection"""
+        return {'components': self.components}
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """Restore a projection saved with get_state"""
+        self.components = np.asarray(state['components'], dtype=np.float32)
+        self.dimensions = self.components.shape[0]
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Project vectors of shape (n, input dimension) to (n, dimensions)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors @ self.components.T
+
+
+class TruncationProjection:
+    """
+    Prefix truncation to the leading dimensions; needs no training
+    """
+
+    method = 'truncate'
+
+    def __init__(self, dimensions: int = 128):
+        """
+        Args:
+            dimensions: Output dimension
+        """
+        if dimensions < 1:
+            raise ValueError("dimensions must be at least 1")
+        self.dimensions = dimensions
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    def train(self, vectors: np.ndarray):
+        """Nothing to learn"""
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to rebuild the projection"""
+        return {'dimensions': np.array(self.dimensions)}
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """Restore a projection saved with get_state"""
+        self.dimensions = int(state['dimensions'])
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Keep the first `dimensions` columns"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[-1] < self.dimensions:
+            raise ValueError(f"Cannot truncate {vectors.shape[-1]} dimensions to {self.dimensions}")
+        return np.ascontiguousarray(vectors[..., :self.dimensions])
+
+
+PROJECTIONS = {
+    'pca': PCAProjection,
+    'truncate': TruncationProjection,
+}
+
+
+def projection_version(projection) -> str:
+    """Short content hash identifying a trained projection"""
+    digest = hashlib.sha256(projection.method.encode('utf-8'))
+    for name, array in sorted(projection.get_state().items()):
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return f"{projection.method}-{projection.dimensions}-{digest.hexdigest()[:12]}"
+
+
+def save_projection(projection, path: str):
+    """Write a trained projection to an .npz file"""
+    np.savez(path, method=np.array(projection.method), version=np.array(projection_version(projection)),
+             **projection.get_state())
+
+
+def load_projection(path: str):
+    """Read a projection written by save_projection, checking its version"""
+    with np.load(path) as archive:
+        projection = PROJECTIONS[str(archive['method'])]()
+        projection.set_state(archive)
+        version = str(archive['version'])
+    if projection_version(projection) != version:
+        raise ValueError(f"Projection in {path} does not match its recorded version {version}")
+    return projection
@@ -0,0 +1,201 @@
+"""
+Embedding backends for the RAG service and ingestion pipeline
+FinTwin AI Financial Twin - Retrieval Layer
+
+Every component that embeds text talks to an EmbeddingBackend rather than
+a concrete model class, so the encoder is chosen by configuration:
+
+    sentence-transformers   the SentenceTransformer model (default)
+    quantized               the same model with its Linear layers dynamically
+                            quantized to int8 for faster CPU inference
+    hashing                 deterministic feature hashing of word unigrams and
+                            bigrams; no model, no dependencies, for offline
+                            benchmarks and fast tests
+
+Backends are cheap to construct; the model is only loaded by load().
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from typing import Any, List, Optional, Protocol, Sequence
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+
+class EmbeddingBackend(Protocol):
+    """What the service, batchers and ingestion need from an encoder"""
+
+    name: str
+    dimension: Optional[int]
+    max_seq_length: Optional[int]
+
+    def load(self):
+        """Load the model; called once before the first encode"""
+
+    def encode(self, texts: Sequence[str], **kwargs) -> np.ndarray:
+        """Embed texts into a (len(texts), dimension) matrix"""
+
+
+class SentenceTransformerBackend:
+    """
+    SentenceTransformer encoder
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, device: Optional[str] = None):
+        """
+        Args:
+            model_name: SentenceTransformer model name or path
+            device: Torch device; the library picks one if None
+        """
+        self.model_name = model_name
+        self.device = device
+        self.model = None
+        self.dimension: Optional[int] = None
+        self.max_seq_length: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return self.model_name
+
+    def _load_model(self):
+        # Imported here: sentence-transformers pulls in torch, which dominates import time
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name, device=self.device)
+
+    def load(self):
+        """Load the model and read its output dimension and truncation length"""
+        self.model = self._load_model()
+        dimension = self.model.get_sentence_embedding_dimension()
+        if isinstance(dimension, int):
+            self.dimension = dimension
+        max_seq_length = getattr(self.model, 'max_seq_length', None)
+        if isinstance(max_seq_length, int):
+            self.max_seq_length = max_seq_length
+        logger.info(f"Loaded embedding backend {self.name}")
+
+    def encode(self, texts: Sequence[str], **kwargs) -> np.ndarray:
+        """Embed texts; extra keyword arguments are passed to SentenceTransformer.encode"""
+        if self.model is None:
+            raise ValueError(f"Embedding backend {self.name} is not loaded")
+        kwargs.setdefault('convert_to_tensor', False)
+        return self.model.encode(list(texts), **kwargs)
+
+
+class QuantizedSentenceTransformerBackend(SentenceTransformerBackend):
+    """
+    SentenceTransformer with int8 dynamically quantized Linear layers, on CPU
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, num_threads: Optional[int] = None):
+        """
+        Args:
+            model_name: SentenceTransformer model name or path
+            num_threads: Torch intra-op threads; left unchanged if None
+        """
+        super().__init__(model_name, device='cpu')
+        self.num_threads = num_threads
+
+    @property
+    def name(self) -> str:
+        return f"{self.model_name}-int8"
+
+    def _load_model(self):
+        import torch
+
+        model = super()._load_model()
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        # Weights are quantized once; activations are quantized per batch at run time
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1 << 16)
+def _feature_hash(feature: str) -> int:
+    """Stable 64-bit hash of a feature string (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HashingBackend:
+    """
+    Deterministic feature-hashing encoder
+
+    Each word unigram and bigram is hashed to a signed bucket; a text's
+    embedding is the L2-normalized sum of its features. Texts sharing words
+    score higher, which is enough for pipeline tests and for benchmarks that
+    measure everything but the model.
+    """
+
+    max_seq_length: Optional[int] = None
+
+    def __init__(self, dimension: int = 384, ngram_range: Sequence[int] = (1, 2)):
+        """
+        Args:
+            dimension: Output dimension
+            ngram_range: (min, max) word n-gram lengths hashed as features
+        """
+        if dimension < 1:
+            raise ValueError("dimension must be at least 1")
+        self.dimension = dimension
+        self.ngram_range = tuple(ngram_range)
+
+    @property
+    def name(self) -> str:
+        return f"hashing-{self.dimension}"
+
+    def load(self):
+        """Nothing to load"""
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        low, high = self.ngram_range
+        return [' '.join(tokens[i:i + n]) for n in range(low, high + 1) for i in range(len(tokens) - n + 1)]
+
+    def encode(self, texts: Sequence[str], **kwargs) -> np.ndarray:
+        """Embed texts; keyword arguments are accepted for interface compatibility and ignored"""
+        texts = list(texts)
+        rows: List[int] = []
+        hashes: List[int] = []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(map(_feature_hash, features))
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if hashes:
+            hashes = np.array(hashes, dtype=np.uint64)
+            buckets = (hashes % np.uint64(self.dimension)).astype(np.intp)
+            signs = np.where(hashes >> np.uint64(63), -1.0, 1.0).astype(np.float32)
+            np.add.at(embeddings, (np.array(rows, dtype=np.intp), buckets), signs)
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+        return embeddings
+
+
+EMBEDDING_BACKENDS = {
+    'sentence-transformers': SentenceTransformerBackend,
+    'quantized': QuantizedSentenceTransformerBackend,
+    'hashing': HashingBackend,
+}
+
+
+def create_backend(backend: str = 'sentence-transformers', **params: Any) -> EmbeddingBackend:
+    """
+    Construct an (unloaded) embedding backend by name
+
+    Args:
+        backend: Key of EMBEDDING_BACKENDS
+        **params: Passed to the backend constructor
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    return EMBEDDING_BACKENDS[backend](**params)
@@ -0,0 +1,155 @@
+"""
+Length-bucketed embedding batching for document ingestion
+FinTwin AI Financial Twin - Retrieval Layer
+
+Transformer encoders pad every text in a batch to the longest one, so a
+batch mixing a 10-token chunk with a 500-token chunk pays for 1000 tokens.
+The EmbeddingBatcher sorts texts by (estimated) token length, cuts the
+sorted run into batches whose padded size stays under a token budget, and
+writes each batch's rows back to the texts' original positions. The budget
+bounds the encoder's activation memory however large the upload is.
+"""
+
+import resource
+import sys
+import threading
+import time
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def approximate_tokens(text: str) -> int:
+    """Cheap token count estimate: about four characters per subword token"""
+    return len(text) // 4 + 1
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def plan_batches(lengths: Sequence[int], max_batch_tokens: int, max_batch_size: int) -> List[np.ndarray]:
+    """
+    Group texts into batches of similar length
+
+    Args:
+        lengths: Token length of every text
+        max_batch_tokens: Cap on padded tokens per batch (batch size x longest text);
+            a single text longer than the cap gets a batch of its own
+        max_batch_size: Cap on texts per batch
+
+    Returns:
+        Index arrays into lengths, one per batch, shortest texts first
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    order = np.argsort(lengths, kind='stable')
+    sorted_lengths = lengths[order]
+
+    batches = []
+    start = 0
+    while start < order.shape[0]:
+        # Sorted ascending, so a batch [start, end) pads to sorted_lengths[end - 1]
+        end = start + 1
+        limit = min(order.shape[0], start + max_batch_size)
+        while end < limit and sorted_lengths[end] * (end + 1 - start) <= max_batch_tokens:
+            end += 1
+        batches.append(order[start:end])
+        start = end
+    return batches
+
+
+class EmbeddingBatcher:
+    """
+    Encodes large text lists in length-sorted, token-budgeted batches
+    """
+
+    def __init__(self,
+                 encode_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_tokens: int = 16384,
+                 max_batch_size: int = 128,
+                 token_counter: Optional[Callable[[str], int]] = None,
+                 max_tokens: Optional[int] = None):
+        """
+        Args:
+            encode_fn: Blocking function mapping a list of texts to an embedding matrix
+            max_batch_tokens: Cap on padded tokens per encoder call
+            max_batch_size: Cap on texts per encoder call
+            token_counter: Token count of a text; approximate_tokens if None
+            max_tokens: Encoder truncation length; longer texts are costed at this length
+        """
+        if max_batch_tokens < 1 or max_batch_size < 1:
+            raise ValueError("max_batch_tokens and max_batch_size must be at least 1")
+
+        self.encode_fn = encode_fn
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.token_counter = token_counter or approximate_tokens
+        self.max_tokens = max_tokens
+
+        self._lock = threading.Lock()
+        self.texts = 0
+        self.batches = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self.seconds = 0.0
+
+    def token_lengths(self, texts: Sequence[str]) -> np.ndarray:
+        """Token length of each text as the encoder will see it"""
+        lengths = np.fromiter(map(self.token_counter, texts), dtype=np.int64, count=len(texts))
+        if self.max_tokens is not None:
+            np.minimum(lengths, self.max_tokens, out=lengths)
+        return lengths
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts in length-bucketed batches
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Embedding matrix with one row per text, in the order given
+        """
+        texts = list(texts)
+        if not texts:
+            return np.array([])
+
+        start = time.perf_counter()
+        lengths = self.token_lengths(texts)
+        batches = plan_batches(lengths, self.max_batch_tokens, self.max_batch_size)
+        embeddings: Optional[np.ndarray] = None
+        padded = 0
+
+        for batch in batches:
+            encoded = np.asarray(self.encode_fn([texts[i] for i in batch]))
+            if embeddings is None:
+                embeddings = np.empty((len(texts),) + encoded.shape[1:], dtype=encoded.dtype)
+            embeddings[batch] = encoded
+            padded += int(lengths[batch].max()) * len(batch)
+
+        with self._lock:
+            self.texts += len(texts)
+            self.batches += len(batches)
+            self.tokens += int(lengths.sum())
+            self.padded_tokens += padded
+            self.seconds += time.perf_counter() - start
+        return embeddings
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput, padding overhead and peak memory"""
+        with self._lock:
+            return {
+                'texts': self.texts,
+                'batches': self.batches,
+                'tokens': self.tokens,
+                'padded_tokens': self.padded_tokens,
+                'padding_ratio': self.padded_tokens / self.tokens if self.tokens else 0.0,
+                'texts_per_second': self.texts / self.seconds if self.seconds else 0.0,
+                'max_batch_tokens': self.max_batch_tokens,
+                'peak_rss_bytes': peak_rss_bytes()
+            }
@@ -0,0 +1,124 @@
+"""
+Query embedding cache for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+Bounded LRU cache from normalized query text to its embedding, with a TTL
+and a memory cap, so repeated questions skip the encoder forward pass.
+"""
+
+import re
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a query: case-folded with collapsed whitespace"""
+    return _WHITESPACE.sub(' ', text).strip().casefold()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of query embeddings with TTL and memory cap
+    """
+
+    def __init__(self,
+                 max_entries: int = 10000,
+                 ttl_seconds: Optional[float] = 3600,
+                 max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Maximum number of cached queries
+            ttl_seconds: Seconds an entry stays valid; None disables expiry
+            max_bytes: Approximate cap on memory held by keys and vectors
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._entries: 'OrderedDict[str, Tuple[np.ndarray, float]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(key: str, embedding: np.ndarray) -> int:
+        return len(key) + embedding.nbytes
+
+    def _remove(self, key: str):
+        embedding, _ = self._entries.pop(key)
+        self._bytes -= self._entry_size(key, embedding)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for a query, or None"""
+        key = normalize_query(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            embedding, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, text: str, embedding: np.ndarray):
+        """Cache an embedding, evicting least-recently-used entries as needed"""
+        key = normalize_query(text)
+        embedding = np.array(embedding, dtype=np.float32, copy=True)
+        embedding.flags.writeable = False
+        size = self._entry_size(key, embedding)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (embedding, time.monotonic())
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry; counters are kept"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
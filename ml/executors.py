@@ -0,0 +1,175 @@
+"""
+Bounded execution pools for blocking model work
+FinTwin AI Financial Twin - ML Service
+
+Model inference and ingestion are synchronous and CPU-heavy. Running them on
+the FastAPI event loop stalls every other request, so each kind of work gets
+its own bounded pool. A pool accepts at most `max_workers + max_queue` tasks
+at a time; beyond that, submit raises PoolSaturatedError so the API can shed
+load with a 503 instead of queueing without limit.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default pool layout; override per deployment with ML_POOL_<NAME>_{WORKERS,QUEUE,KIND}.
+# The service's pools run bound methods and read module globals (the loaded
+# classifier), neither of which survives pickling into a spawned worker, so
+# from_env only accepts KIND=process for pools named in process_safe.
+DEFAULT_POOLS = {
+    'encode': {'max_workers': 2, 'max_queue': 64, 'kind': 'thread'},
+    'query': {'max_workers': 4, 'max_queue': 128, 'kind': 'thread'},
+    'classify': {'max_workers': 2, 'max_queue': 32, 'kind': 'thread'},
+    'ingest': {'max_workers': 1, 'max_queue': 4, 'kind': 'thread'},
+}
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool's workers and queue are all occupied"""
+
+    def __init__(self, pool_name: str):
+        super().__init__(f"Execution pool '{pool_name}' is saturated")
+        self.pool_name = pool_name
+
+
+class BoundedExecutor(Executor):
+    """
+    Executor with a hard cap on running plus queued tasks
+    """
+
+    def __init__(self, name: str, max_workers: int = 1, max_queue: int = 0, kind: str = 'thread'):
+        """
+        Args:
+            name: Pool name used in errors and stats
+            max_workers: Concurrent tasks
+            max_queue: Tasks allowed to wait for a free worker
+            kind: 'thread' or 'process'; process pools need picklable callables
+        """
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max(0, max_queue)
+
+        if kind == 'thread':
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"ml-{name}")
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=max_workers)
+
+        self._slots = threading.BoundedSemaphore(max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule fn, or raise PoolSaturatedError if the pool is full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturatedError(self.name)
+
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: Optional[Future]):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def shutdown(self, wait: bool = True, **kwargs):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Occupancy and rejection counters"""
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected
+            }
+
+
+class ExecutionManager:
+    """
+    Named bounded pools for encode, query, classify and ingest work
+    """
+
+    def __init__(self, pools: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            pools: Mapping of pool name to BoundedExecutor settings
+        """
+        self.pools: Dict[str, BoundedExecutor] = {
+            name: BoundedExecutor(name, **settings)
+            for name, settings in (pools or DEFAULT_POOLS).items()
+        }
+
+    @classmethod
+    def from_env(cls,
+                 environ: Optional[Dict[str, str]] = None,
+                 process_safe: Iterable[str] = ()) -> 'ExecutionManager':
+        """
+        Build pools from DEFAULT_POOLS overridden by ML_POOL_<NAME>_* variables
+
+        Args:
+            environ: Variables to read; defaults to os.environ
+            process_safe: Pools whose callables are picklable module-level
+                functions that don't depend on process state
+
+        Raises:
+            ValueError: KIND=process for a pool not listed in process_safe
+        """
+        environ = os.environ if environ is None else environ
+        process_safe = set(process_safe)
+        pools = {}
+        for name, defaults in DEFAULT_POOLS.items():
+            prefix = f"ML_POOL_{name.upper()}_"
+            kind = environ.get(prefix + 'KIND', defaults['kind'])
+            if kind == 'process' and name not in process_safe:
+                raise ValueError(f"{prefix}KIND=process is not supported: the '{name}' pool runs "
+                                 f"callables that cannot be sent to a worker process")
+            pools[name] = {
+                'max_workers': int(environ.get(prefix + 'WORKERS', defaults['max_workers'])),
+                'max_queue': int(environ.get(prefix + 'QUEUE', defaults['max_queue'])),
+                'kind': kind
+            }
+        return cls(pools)
+
+    def get(self, name: str) -> BoundedExecutor:
+        if name not in self.pools:
+            raise KeyError(f"Unknown execution pool: {name}")
+        return self.pools[name]
+
+    async def run(self, name: str, fn: Callable, *args) -> Any:
+        """Run a blocking callable in the named pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get(name), fn, *args)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def shutdown(self, wait: bool = True):
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait)
@@ -0,0 +1,232 @@
+"""
+Memory-mapped vector index snapshots
+FinTwin AI Financial Twin - Retrieval Layer
+
+A snapshot is a directory holding:
+
+    manifest.json               format version, chunk count, dimension, index type
+    vectors.npy                 normalized float32 vector block (opened with mmap)
+    ids.bin / ids.idx.npy       utf-8 chunk ids and their int64 byte offsets
+    texts.bin / texts.idx.npy   utf-8 chunk text and offsets
+    meta.bin / meta.idx.npy     JSON-encoded chunk metadata and offsets
+    projection.npz              optional dimensionality reduction the vectors
+                                were produced with; queries must use it too
+
+Every file is opened memory-mapped, so a replica can serve a snapshot within
+milliseconds and workers on the same host share pages via the OS page cache.
+Snapshots live under a root directory next to a CURRENT file naming the
+active version; publishing a snapshot writes it to a temporary directory,
+renames it into place and then atomically replaces CURRENT.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+from vector_index import VectorIndex
+from dimension_reduction import projection_version, save_projection, load_projection
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+PROJECTION_FILE = 'projection.npz'
+
+
+class MappedColumn(Sequence):
+    """
+    Read-mostly column of variable-length values backed by a memory-mapped blob
+
+    Values are decoded on access. Values appended after loading are kept in
+    an in-memory overflow list so the owning index stays writable.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, decode: Callable[[bytes], Any]):
+        self._data = data
+        self._offsets = offsets
+        self._decode = decode
+        self._base_size = len(offsets) - 1
+        self._appended: List[Any] = []
+
+    def __len__(self) -> int:
+        return self._base_size + len(self._appended)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("column index out of range")
+        if position >= self._base_size:
+            return self._appended[position - self._base_size]
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return self._decode(self._data[start:end].tobytes())
+
+    def append(self, value: Any):
+        self._appended.append(value)
+
+    def extend(self, values: Iterable[Any]):
+        self._appended.extend(values)
+
+
+def _write_column(directory: str, name: str, values: Iterable[bytes]):
+    """Write a blob file plus an int64 offsets file"""
+    encoded = list(values)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    with open(os.path.join(directory, f"{name}.bin"), 'wb') as f:
+        for value in encoded:
+            f.write(value)
+    np.save(os.path.join(directory, f"{name}.idx.npy"), offsets)
+
+
+def _read_column(directory: str, name: str, decode: Callable[[bytes], Any]) -> MappedColumn:
+    """Open a column written by _write_column without reading it into memory"""
+    offsets = np.load(os.path.join(directory, f"{name}.idx.npy"), mmap_mode='r')
+    blob_path = os.path.join(directory, f"{name}.bin")
+    if os.path.getsize(blob_path) == 0:
+        data = np.zeros(0, dtype=np.uint8)
+    else:
+        data = np.memmap(blob_path, dtype=np.uint8, mode='r')
+    return MappedColumn(data, offsets, decode)
+
+
+def _decode_text(value: bytes) -> str:
+    return value.decode('utf-8')
+
+
+def _decode_json(value: bytes) -> Dict[str, Any]:
+    return json.loads(value)
+
+
+def write_snapshot(index: VectorIndex,
+                   root_dir: str,
+                   index_type: str = 'exact',
+                   version: Optional[str] = None,
+                   projection=None) -> str:
+    """
+    Publish an index as a new snapshot version under root_dir
+
+    Args:
+        index: Index whose chunks are written
+        root_dir: Snapshot root directory
+        index_type: Index type recorded in the manifest
+        version: Version name; defaults to a UTC timestamp
+        projection: Dimensionality reduction the index vectors were produced with
+
+    Returns:
+        Path of the published snapshot directory
+    """
+    os.makedirs(root_dir, exist_ok=True)
+    version = version or datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    target = os.path.join(root_dir, version)
+    if os.path.exists(target):
+        raise FileExistsError(f"Snapshot version already exists: {version}")
+
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=root_dir)
+    try:
+        np.save(os.path.join(staging, 'vectors.npy'), np.ascontiguousarray(index.vectors))
+        _write_column(staging, 'ids', (value.encode('utf-8') for value in index.ids))
+        _write_column(staging, 'texts', (value.encode('utf-8') for value in index.texts))
+        _write_column(staging, 'meta', (json.dumps(value, default=str).encode('utf-8')
+                                        for value in index.metadatas))
+        if projection is not None:
+            save_projection(projection, os.path.join(staging, PROJECTION_FILE))
+
+        manifest = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'version': version,
+            'num_chunks': len(index),
+            'dimension': index.dimension or 0,
+            'index_type': index_type,
+            'projection': projection_version(projection) if projection is not None else None,
+            'created_at': datetime.utcnow().isoformat()
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Point CURRENT at the new version with an atomic rename
+    pointer = os.path.join(root_dir, f".{CURRENT_FILE}.tmp")
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root_dir, CURRENT_FILE))
+
+    logger.info(f"Published snapshot {version} with {len(index)} chunks")
+    return target
+
+
+def current_snapshot(root_dir: str) -> Optional[str]:
+    """Version named by the CURRENT pointer, or None"""
+    pointer = os.path.join(root_dir, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        return f.read().strip() or None
+
+
+def read_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    """Load and validate a snapshot manifest"""
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+    return manifest
+
+
+def read_projection(snapshot_dir: str):
+    """
+    Projection a snapshot's vectors were produced with, or None
+
+    Raises:
+        ValueError: If the projection file does not match the manifest
+    """
+    manifest = read_manifest(snapshot_dir)
+    expected = manifest.get('projection')
+    if expected is None:
+        return None
+
+    projection = load_projection(os.path.join(snapshot_dir, PROJECTION_FILE))
+    if projection_version(projection) != expected:
+        raise ValueError(f"Snapshot projection does not match manifest in {snapshot_dir}")
+    if manifest['num_chunks'] and projection.dimensions != manifest['dimension']:
+        raise ValueError(f"Snapshot projection dimension does not match its vectors in {snapshot_dir}")
+    return projection
+
+
+def read_snapshot(snapshot_dir: str) -> VectorIndex:
+    """
+    Open a snapshot directory as a memory-mapped exact index
+
+    Args:
+        snapshot_dir: Path of a published snapshot version
+
+    Returns:
+        VectorIndex whose vectors and columns are backed by the snapshot files
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest['num_chunks'] == 0:
+        return VectorIndex()
+
+    vectors = np.load(os.path.join(snapshot_dir, 'vectors.npy'), mmap_mode='r')
+    if vectors.shape != (manifest['num_chunks'], manifest['dimension']):
+        raise ValueError(f"Snapshot vectors do not match manifest in {snapshot_dir}")
+
+    return VectorIndex.from_storage(
+        vectors,
+        _read_column(snapshot_dir, 'ids', _decode_text),
+        _read_column(snapshot_dir, 'texts', _decode_text),
+        _read_column(snapshot_dir, 'meta', _decode_json)
+    )
@@ -0,0 +1,248 @@
+"""
+Incremental ingestion manifest
+FinTwin AI Financial Twin - Document Processing Pipeline
+
+A database table remembers, for every ingested source file, its size,
+mtime, content hash, the pipeline version (chunker settings and embedding
+model) it was processed with, and the ids of the chunks it produced. A run
+then only does work proportional to what changed:
+
+    unchanged   same size, mtime and pipeline version: skipped on a stat()
+    touched     stat changed but the content hash did not: only the
+                manifest row is refreshed
+    changed     new, edited, or built by another pipeline version: parsed;
+                chunks whose content-addressed id is already stored keep
+                their row (embedding and metadata), new ones are embedded
+                and stale ones deleted
+    removed     in the manifest, in the documents directory being ingested,
+                but no longer on disk: every chunk of every removed file is
+                deleted in one statement
+
+Chunk id lists are only read for changed files; planning needs the stat and
+version columns alone.
+"""
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+@dataclass
+class ManifestEntry:
+    """What the last successful ingestion of one source file produced"""
+    source_path: str
+    content_hash: str
+    size: int
+    mtime_ns: int
+    pipeline_version: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FileChange:
+    """A file that has to be (re)ingested, and its previous manifest entry if any"""
+    path: Path
+    entry: ManifestEntry
+    previous: Optional[ManifestEntry] = None
+    reuse: bool = True
+
+    @property
+    def reusable_chunk_ids(self) -> FrozenSet[str]:
+        """Stored chunks whose rows and embeddings can be kept as they are"""
+        # Chunks built by another pipeline version cannot be reused
+        if not self.reuse or self.previous is None or self.previous.pipeline_version != self.entry.pipeline_version:
+            return frozenset()
+        return frozenset(self.previous.chunk_ids)
+
+    def stale_chunk_ids(self, chunk_ids: Iterable[str]) -> List[str]:
+        """Previously stored chunks of this file that the new version no longer has"""
+        if self.previous is None:
+            return []
+        return sorted(set(self.previous.chunk_ids) - set(chunk_ids))
+
+
+@dataclass
+class IngestPlan:
+    """How each file in a run will be handled"""
+    unchanged: List[ManifestEntry] = field(default_factory=list)
+    touched: List[ManifestEntry] = field(default_factory=list)
+    changed: List[FileChange] = field(default_factory=list)
+    removed: List[ManifestEntry] = field(default_factory=list)
+
+
+def source_key(path: Path) -> str:
+    """Manifest key of a source file"""
+    return str(Path(path).resolve())
+
+
+def file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def plan_ingest(paths: Sequence[Path],
+                manifest: Dict[str, ManifestEntry],
+                pipeline_version: str,
+                root: Path,
+                force: bool = False) -> IngestPlan:
+    """
+    Classify files against the manifest
+
+    Args:
+        paths: Files currently in the documents directory
+        manifest: Manifest entries by source key
+        pipeline_version: Version string of the current chunker and embedding model
+        root: Documents directory the paths were listed from; only manifest
+            entries of files directly in it can be classified as removed, so
+            a run over another directory leaves that directory's chunks alone
+        force: Treat every file as changed and re-embed all of its chunks;
+            stale chunks and removed files are still cleaned up
+
+    Returns:
+        IngestPlan; only unchanged files are classified without reading them
+    """
+    plan = IngestPlan()
+    seen = set()
+    for path in paths:
+        key = source_key(path)
+        seen.add(key)
+        stat = os.stat(path)
+        previous = manifest.get(key)
+        current = previous is not None and previous.pipeline_version == pipeline_version and not force
+        if current and previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns:
+            plan.unchanged.append(previous)
+            continue
+
+        content_hash = file_hash(path)
+        if current and previous.content_hash == content_hash:
+            plan.touched.append(replace(previous, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+            continue
+
+        entry = ManifestEntry(key, content_hash, stat.st_size, stat.st_mtime_ns, pipeline_version)
+        plan.changed.append(FileChange(Path(path), entry, previous, reuse=not force))
+
+    root = Path(source_key(root))
+    plan.removed = [entry for key, entry in manifest.items() if key not in seen and Path(key).parent == root]
+    return plan
+
+
+class IngestManifest:
+    """
+    Manifest table access; callers own transactions except where noted
+    """
+
+    def __init__(self, connection, table: str = 'ingest_manifest', chunks_table: str = 'vector_embeddings'):
+        """
+        Args:
+            connection: Open psycopg2 connection
+            table: Manifest table name
+            chunks_table: Table holding the chunk rows the manifest points at
+        """
+        if not _IDENTIFIER.match(table) or not _IDENTIFIER.match(chunks_table):
+            raise ValueError("Invalid table name")
+        self.connection = connection
+        self.table = table
+        self.chunks_table = chunks_table
+
+    def create_table(self):
+        """Create the manifest table if it doesn't exist (commits)"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    source_path TEXT PRIMARY KEY,
+                    content_hash CHAR(64) NOT NULL,
+                    size BIGINT NOT NULL,
+                    mtime_ns BIGINT NOT NULL,
+                    pipeline_version TEXT NOT NULL,
+                    chunk_ids TEXT[] NOT NULL,
+                    updated_at TIMESTAMP DEFAULT NOW()
+                )
+            """)
+        self.connection.commit()
+
+    def load(self) -> Dict[str, ManifestEntry]:
+        """Every manifest entry, by source key, in one query; chunk_ids are left empty (see load_chunk_ids)"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT source_path, content_hash, size, mtime_ns, pipeline_version FROM {self.table}")
+            return {row[0]: ManifestEntry(*row) for row in cursor.fetchall()}
+
+    def load_chunk_ids(self, entries: Sequence[ManifestEntry]):
+        """Fill in the stored chunk ids of loaded entries, in one query"""
+        if not entries:
+            return
+        by_path = {entry.source_path: entry for entry in entries}
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT source_path, chunk_ids FROM {self.table} WHERE source_path = ANY(%s)",
+                           (list(by_path),))
+            for source_path, chunk_ids in cursor.fetchall():
+                by_path[source_path].chunk_ids = list(chunk_ids)
+
+    def save(self, cursor, entries: Iterable[ManifestEntry]):
+        """Insert or replace manifest entries (no commit)"""
+        cursor.executemany(f"""
+            INSERT INTO {self.table} (source_path, content_hash, size, mtime_ns, pipeline_version, chunk_ids)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (source_path) DO UPDATE SET
+                content_hash = EXCLUDED.content_hash,
+                size = EXCLUDED.size,
+                mtime_ns = EXCLUDED.mtime_ns,
+                pipeline_version = EXCLUDED.pipeline_version,
+                chunk_ids = EXCLUDED.chunk_ids,
+                updated_at = NOW()
+        """, [(entry.source_path, entry.content_hash, entry.size, entry.mtime_ns, entry.pipeline_version,
+               list(entry.chunk_ids)) for entry in entries])
+
+    def delete_chunks(self, cursor, chunk_ids: Sequence[str]) -> int:
+        """Delete chunk rows by id in one statement (no commit)"""
+        if not chunk_ids:
+            return 0
+        cursor.execute(f"DELETE FROM {self.chunks_table} WHERE id = ANY(%s)", (list(chunk_ids),))
+        return cursor.rowcount
+
+    def touch(self, entries: Sequence[ManifestEntry]):
+        """Record new stat data for files whose content did not change (commits)"""
+        if not entries:
+            return
+        # Stat columns only: the entries' chunk ids were never loaded
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"UPDATE {self.table} SET size = %s, mtime_ns = %s, updated_at = NOW() "
+                               f"WHERE source_path = %s",
+                               [(entry.size, entry.mtime_ns, entry.source_path) for entry in entries])
+        self.connection.commit()
+
+    def purge(self, entries: Sequence[ManifestEntry]) -> int:
+        """
+        Delete removed files' chunks and manifest entries in one transaction (commits)
+
+        Returns:
+            Number of chunk rows deleted
+        """
+        if not entries:
+            return 0
+        source_paths = [entry.source_path for entry in entries]
+        try:
+            with self.connection.cursor() as cursor:
+                # Chunk ids are resolved in the database rather than loaded
+                cursor.execute(f"DELETE FROM {self.chunks_table} WHERE id IN "
+                               f"(SELECT unnest(chunk_ids) FROM {self.table} WHERE source_path = ANY(%s))",
+                               (source_paths,))
+                deleted = cursor.rowcount
+                cursor.execute(f"DELETE FROM {self.table} WHERE source_path = ANY(%s)", (source_paths,))
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        logger.info(f"Purged {deleted} chunks of {len(entries)} removed files")
+        return deleted
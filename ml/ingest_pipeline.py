@@ -0,0 +1,340 @@
+"""
+Staged, pipelined document ingestion
+FinTwin AI Financial Twin - Document Processing Pipeline
+
+Files move through three stages connected by bounded queues, so parsing,
+encoding and database writes overlap instead of taking turns:
+
+    parse   a process pool turns files into chunks; large files can instead
+            be streamed by a reader thread as a sequence of chunk batches
+    embed   worker threads encode chunks, packing small files together so
+            encoder batches stay full
+    write   one thread, the only user of the database connection, stores
+            each file's chunks and embeddings
+
+A file travels as one or more parts (one per streamed batch). The queues
+hold at most queue_size parts each, which bounds memory however far one
+stage runs ahead of the next and however large a streamed file is. A failure
+is recorded against the file it happened on and the rest of the run carries
+on; a file counts as written once all of its parts are. Files that failed
+after some of their parts were written are handed to abort_fn at the end of
+the run, so those parts can be removed again.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('parse', 'embed', 'write')
+
+# End-of-stream marker passed down each queue
+_DONE = object()
+
+
+class StageStats:
+    """Thread-safe counters for one pipeline stage"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.files = 0
+        self.chunks = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, files: int, chunks: int, busy_seconds: float):
+        with self._lock:
+            self.files += files
+            self.chunks += chunks
+            self.busy_seconds += busy_seconds
+
+    def blocked(self, seconds: float):
+        with self._lock:
+            self.blocked_seconds += seconds
+
+    def to_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'files': self.files,
+                'chunks': self.chunks,
+                'busy_seconds': self.busy_seconds,
+                'blocked_seconds': self.blocked_seconds,
+                'chunks_per_second': self.chunks / wall_seconds if wall_seconds else 0.0,
+                # Fraction of the stage's worker time spent working
+                'utilization': self.busy_seconds / (wall_seconds * self.workers) if wall_seconds else 0.0
+            }
+
+
+def _timed(parse_fn: Callable[[Any], List[Dict[str, Any]]], path) -> Tuple[List[Dict[str, Any]], float]:
+    """Run parse_fn in a worker, returning its chunks and how long it took"""
+    start = time.perf_counter()
+    chunks = parse_fn(path)
+    return chunks, time.perf_counter() - start
+
+
+def _put(target: queue.Queue, item, stats: StageStats):
+    """Put onto a bounded queue, counting time blocked on a slow downstream stage"""
+    start = time.perf_counter()
+    target.put(item)
+    stats.blocked(time.perf_counter() - start)
+
+
+def _name(path) -> str:
+    return getattr(path, 'name', str(path))
+
+
+def run_pipeline(paths: Sequence[Any],
+                 parse_fn: Callable[[Any], List[Dict[str, Any]]],
+                 embed_fn: Callable[[List[Dict[str, Any]]], Sequence[Any]],
+                 write_fn: Callable[[List[Dict[str, Any]], Sequence[Any], str], None],
+                 parse_workers: int = 2,
+                 embed_workers: int = 1,
+                 queue_size: int = 8,
+                 embed_batch_chunks: int = 256,
+                 stream_paths: Sequence[Any] = (),
+                 stream_fn: Optional[Callable[[Any], Iterable[List[Dict[str, Any]]]]] = None,
+                 finish_fn: Optional[Callable[[str], None]] = None,
+                 abort_fn: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Parse, embed and write every file with the stages running concurrently
+
+    Args:
+        paths: Files to ingest (pathlib.Path or str)
+        parse_fn: Module-level function mapping a path to its chunks; runs in
+            a worker process, so it and its result must be picklable
+        embed_fn: Maps a list of chunks to one embedding per chunk
+        write_fn: Stores (chunks, embeddings, file name) for one part of a
+            file; called from one thread only, for every parsed file
+            including those without chunks
+        parse_workers: Parser processes; 0 parses in the calling thread
+        embed_workers: Encoder threads
+        queue_size: File parts buffered between consecutive stages
+        embed_batch_chunks: Encoder calls take queued parts until they hold
+            at least this many chunks
+        stream_paths: Files read incrementally by stream_fn instead of parse_fn
+        stream_fn: Maps a path to an iterable of chunk batches; runs in a
+            reader thread, so only a few batches of a file are held at once
+        finish_fn: Called from the writer thread with the file name once
+            every part of a file has been written
+        abort_fn: Called from the writer thread, once the queues are
+            drained, with the name of each file that failed in any stage
+            after some of its parts were written
+
+    Returns:
+        Per-file outcome counts, errors and per-stage throughput
+    """
+    if embed_workers < 1 or queue_size < 1:
+        raise ValueError("embed_workers and queue_size must be at least 1")
+    if stream_paths and stream_fn is None:
+        raise ValueError("stream_paths requires stream_fn")
+
+    stats = {
+        'parse': StageStats(max(parse_workers, 1) + (1 if stream_paths else 0)),
+        'embed': StageStats(embed_workers),
+        'write': StageStats(1)
+    }
+    errors: List[str] = []
+    failed = set()
+    written = {'files': 0, 'chunks': 0}
+    lock = threading.Lock()
+    # Parts are (file name, part number, is last part, chunks[, embeddings])
+    embed_queue: queue.Queue = queue.Queue(queue_size)
+    write_queue: queue.Queue = queue.Queue(queue_size)
+
+    def fail(name: str, error: Exception):
+        with lock:
+            if name in failed:
+                return  # later parts of a file that already failed
+            failed.add(name)
+            message = f"Error processing {name}: {error}"
+            errors.append(message)
+        logger.error(message)
+
+    def dispatch(name: str, part: int, last: bool, chunks: List[Dict[str, Any]], source: StageStats):
+        if chunks:
+            _put(embed_queue, (name, part, last, chunks), source)
+        else:
+            # Nothing to embed, but the writer may still have rows of an older version to drop
+            _put(write_queue, (name, part, last, chunks, []), source)
+
+    def embed_loop():
+        while True:
+            item = embed_queue.get()
+            if item is _DONE:
+                embed_queue.put(_DONE)  # for the other embed workers
+                return
+
+            # Pack already-parsed parts into one encoder call
+            batch = [item]
+            count = len(item[3])
+            while count < embed_batch_chunks:
+                try:
+                    item = embed_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    embed_queue.put(_DONE)
+                    break
+                batch.append(item)
+                count += len(item[3])
+
+            start = time.perf_counter()
+            try:
+                embeddings = embed_fn([chunk for *_, chunks in batch for chunk in chunks])
+            except Exception as e:
+                for name, *_ in batch:
+                    fail(name, e)
+                continue
+            stats['embed'].record(sum(1 for _, _, last, _ in batch if last), count,
+                                  time.perf_counter() - start)
+
+            offset = 0
+            for name, part, last, chunks in batch:
+                _put(write_queue, (name, part, last, chunks, embeddings[offset:offset + len(chunks)]),
+                     stats['embed'])
+                offset += len(chunks)
+
+    def abort(names: Iterable[str]):
+        for name in names:
+            try:
+                abort_fn(name)
+            except Exception as e:
+                message = f"Error removing written parts of {name}: {e}"
+                with lock:
+                    errors.append(message)
+                logger.error(message)
+
+    def write_loop():
+        # Per file: parts written, total parts once the last one is seen, chunks
+        progress: Dict[str, List[Any]] = {}
+        while True:
+            item = write_queue.get()
+            if item is _DONE:
+                # Every part has arrived, so unfinished files are failed ones
+                # that may have parts written; done last, as a failure in an
+                # earlier stage can overtake parts still queued behind it
+                if abort_fn is not None:
+                    abort(progress)
+                return
+            name, part, last, chunks, embeddings = item
+            with lock:
+                if name in failed:
+                    continue
+            start = time.perf_counter()
+            try:
+                write_fn(chunks, embeddings, name)
+                state = progress.setdefault(name, [0, None, 0])
+                state[0] += 1
+                state[2] += len(chunks)
+                if last:
+                    state[1] = part + 1
+                # Parts can arrive out of order with several embed workers
+                done = state[0] == state[1]
+                if done:
+                    if finish_fn is not None:
+                        finish_fn(name)
+                    del progress[name]
+            except Exception as e:
+                fail(name, e)
+                continue
+            stats['write'].record(int(done), len(chunks), time.perf_counter() - start)
+            if done:
+                with lock:
+                    written['files'] += 1
+                    written['chunks'] += state[2]
+
+    def parsed(path, chunks: List[Dict[str, Any]], seconds: float):
+        stats['parse'].record(1, len(chunks), seconds)
+        dispatch(_name(path), 0, True, chunks, stats['parse'])
+
+    def stream_loop():
+        for path in stream_paths:
+            name = _name(path)
+            part = 0
+            count = 0
+            busy = 0.0
+            held = None
+            try:
+                batches = iter(stream_fn(path))
+                while True:
+                    start = time.perf_counter()
+                    batch = next(batches, _DONE)
+                    busy += time.perf_counter() - start
+                    if batch is _DONE:
+                        break
+                    # Hold one batch back so the last part can be flagged as such
+                    if held is not None:
+                        dispatch(name, part, False, held, stats['parse'])
+                        part += 1
+                    held = batch
+                    count += len(batch)
+            except Exception as e:
+                fail(name, e)
+                continue
+            stats['parse'].record(1, count, busy)
+            dispatch(name, part, True, held or [], stats['parse'])
+
+    start = time.perf_counter()
+    embedders = [threading.Thread(target=embed_loop, name=f'ingest-embed-{i}', daemon=True)
+                 for i in range(embed_workers)]
+    writer = threading.Thread(target=write_loop, name='ingest-writer', daemon=True)
+    reader = threading.Thread(target=stream_loop, name='ingest-reader', daemon=True)
+    for thread in embedders + [writer, reader]:
+        thread.start()
+
+    try:
+        if parse_workers > 0:
+            # spawn: the embed and writer threads are already running
+            with ProcessPoolExecutor(max_workers=parse_workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                pending = {}
+                remaining = iter(paths)
+                exhausted = False
+                while not exhausted or pending:
+                    # At most queue_size files in flight in the pool
+                    while not exhausted and len(pending) < queue_size:
+                        path = next(remaining, _DONE)
+                        if path is _DONE:
+                            exhausted = True
+                            break
+                        pending[pool.submit(_timed, parse_fn, path)] = path
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = pending.pop(future)
+                        try:
+                            chunks, seconds = future.result()
+                        except Exception as e:
+                            fail(_name(path), e)
+                            continue
+                        parsed(path, chunks, seconds)
+        else:
+            for path in paths:
+                try:
+                    chunks, seconds = _timed(parse_fn, path)
+                except Exception as e:
+                    fail(_name(path), e)
+                    continue
+                parsed(path, chunks, seconds)
+    finally:
+        reader.join()
+        embed_queue.put(_DONE)
+        for thread in embedders:
+            thread.join()
+        write_queue.put(_DONE)
+        writer.join()
+
+    wall_seconds = time.perf_counter() - start
+    return {
+        'files': written['files'],
+        'chunks': written['chunks'],
+        'errors': errors,
+        'wall_seconds': wall_seconds,
+        'stages': {stage: stats[stage].to_dict(wall_seconds) for stage in STAGES}
+    }
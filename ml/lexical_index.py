@@ -0,0 +1,236 @@
+"""
+In-memory BM25 lexical index and rank fusion for hybrid retrieval
+FinTwin AI Financial Twin - Retrieval Layer
+
+Exact identifiers such as section numbers ("80C"), form names ("GSTR-3B")
+or merchant names are poorly served by sentence embeddings. The BM25Index
+keeps compact postings (row slot + term frequency arrays per term) over the
+same row slots as the vector index, and reciprocal_rank_fusion merges the
+lexical and vector rankings into one list.
+"""
+
+import re
+import threading
+from itertools import chain
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+from vector_index import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Alphanumeric runs, keeping joined identifiers like "gstr-3b" or "194j/194c" whole
+_TOKEN = re.compile(r'[a-z0-9]+(?:[-/.][a-z0-9]+)*')
+_JOINED = re.compile(r'(?<![a-z0-9])[a-z0-9]+(?:[-/.][a-z0-9]+)+')
+_PART = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms; joined identifiers are emitted whole and as their parts"""
+    text = text.lower()
+    tokens = _TOKEN.findall(text)
+    for joined in _JOINED.findall(text):
+        tokens.extend(_PART.findall(joined))
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]],
+                           k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked slot lists by summing weight / (k + rank)
+
+    Args:
+        rankings: Ranked lists of row slots, best first
+        k: RRF smoothing constant; larger values flatten the rank curve
+        weights: Per-list weights; all 1.0 if None
+
+    Returns:
+        List of (row slot, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, slot in enumerate(ranking, start=1):
+            fused[slot] = fused.get(slot, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+class BM25Index:
+    """
+    Incrementally updated BM25 index over chunk text
+    """
+
+    def __init__(self,
+                 k1: float = 1.5,
+                 b: float = 0.75,
+                 max_df: float = 0.5,
+                 initial_posting_capacity: int = 8):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization strength
+            max_df: Query terms found in more than this fraction of chunks are
+                skipped; their IDF is near zero but their postings are the longest
+            initial_posting_capacity: Entries allocated when a term is first seen
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_df = max_df
+        self.initial_posting_capacity = max(1, initial_posting_capacity)
+
+        # Parallel per-term arrays: posting slots, term frequencies and fill level
+        self._terms: Dict[str, int] = {}
+        self._postings: List[np.ndarray] = []
+        self._frequencies: List[np.ndarray] = []
+        self._posting_sizes: List[int] = []
+
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._size = 0
+        self._num_docs = 0
+        self._total_length = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def num_terms(self) -> int:
+        return len(self._terms)
+
+    def _append(self, term_id: int, slots: np.ndarray, frequencies: np.ndarray):
+        """Append postings for one term, growing its arrays geometrically"""
+        if term_id == len(self._postings):
+            capacity = max(self.initial_posting_capacity, len(slots))
+            self._postings.append(np.empty(capacity, dtype=np.int64))
+            self._frequencies.append(np.empty(capacity, dtype=np.float32))
+            self._posting_sizes.append(0)
+
+        start = self._posting_sizes[term_id]
+        end = start + len(slots)
+        if end > self._postings[term_id].shape[0]:
+            capacity = max(end, 2 * self._postings[term_id].shape[0])
+            for arrays in (self._postings, self._frequencies):
+                grown = np.empty(capacity, dtype=arrays[term_id].dtype)
+                grown[:start] = arrays[term_id][:start]
+                arrays[term_id] = grown
+
+        self._postings[term_id][start:end] = slots
+        self._frequencies[term_id][start:end] = frequencies
+        self._posting_sizes[term_id] = end
+
+    def add(self, slots: Sequence[int], texts: Sequence[str]):
+        """
+        Index chunk text stored at the given row slots
+
+        Args:
+            slots: Row slots shared with the vector index
+            texts: Chunk text, one per slot
+        """
+        tokenized = [tokenize(text) for text in texts]
+        if not tokenized:
+            return
+        slots = np.asarray(slots, dtype=np.int64)
+        lengths = np.array([len(tokens) for tokens in tokenized], dtype=np.float32)
+
+        with self._lock:
+            # One (term id, slot) pair per token, then term frequencies via a sort
+            terms = self._terms
+            flat = list(chain.from_iterable(tokenized))
+            for token in set(flat).difference(terms):
+                terms[token] = len(terms)
+            term_ids = np.fromiter(map(terms.__getitem__, flat), dtype=np.int64, count=len(flat))
+            token_slots = np.repeat(slots, lengths.astype(np.int64))
+            pairs, frequencies = np.unique(term_ids * (int(slots.max()) + 1) + token_slots, return_counts=True)
+            pair_terms, pair_slots = np.divmod(pairs, int(slots.max()) + 1)
+
+            boundaries = np.flatnonzero(np.diff(pair_terms)) + 1
+            for begin, finish in zip(np.r_[0, boundaries], np.r_[boundaries, len(pairs)]):
+                self._append(int(pair_terms[begin]), pair_slots[begin:finish], frequencies[begin:finish])
+
+            end = max(self._size, int(slots.max()) + 1)
+            if end > self._lengths.shape[0]:
+                grown = np.zeros(max(end, 2 * self._lengths.shape[0]), dtype=np.float32)
+                grown[:self._size] = self._lengths[:self._size]
+                self._lengths = grown
+            self._lengths[slots] = lengths
+
+            self._num_docs += len(tokenized)
+            self._total_length += float(lengths.sum())
+            self._size = end
+
+    def search(self, query: str, k: int = 5, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Rank chunks by BM25 score against the query terms
+
+        Args:
+            query: Query text
+            k: Number of results to return
+            mask: Optional boolean row mask; only rows where it is True are returned
+
+        Returns:
+            List of (row slot, BM25 score) pairs, best first; chunks sharing
+            no term with the query are never returned
+        """
+        if k <= 0:
+            return []
+
+        with self._lock:
+            size = self._size
+            if self._num_docs == 0:
+                return []
+            average_length = self._total_length / self._num_docs
+
+            slot_blocks, weight_blocks = [], []
+            for term in set(tokenize(query)):
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    continue
+                count = self._posting_sizes[term_id]
+                if count > self.max_df * self._num_docs:
+                    continue
+                slots = self._postings[term_id][:count]
+                frequencies = self._frequencies[term_id][:count]
+
+                idf = np.log(1.0 + (self._num_docs - count + 0.5) / (count + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths[slots] / average_length)
+                slot_blocks.append(slots)
+                weight_blocks.append(idf * frequencies * (self.k1 + 1.0) / (frequencies + norm))
+
+        if not slot_blocks:
+            return []
+
+        scores = np.bincount(np.concatenate(slot_blocks),
+                             weights=np.concatenate(weight_blocks), minlength=size)
+        if mask is not None:
+            mask = np.asarray(mask, dtype=np.bool_)[:size]
+            scores[:mask.shape[0]] *= mask
+            scores[mask.shape[0]:] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        top = top_k_indices(scores[candidates], k)
+        return [(int(candidates[i]), float(scores[candidates[i]])) for i in top]
+
+    def clear(self):
+        """Remove every posting"""
+        with self._lock:
+            self._terms = {}
+            self._postings = []
+            self._frequencies = []
+            self._posting_sizes = []
+            self._lengths = np.zeros(0, dtype=np.float32)
+            self._size = 0
+            self._num_docs = 0
+            self._total_length = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Vocabulary and posting sizes"""
+        with self._lock:
+            return {
+                'indexed_chunks': self._num_docs,
+                'terms': len(self._terms),
+                'postings': int(sum(self._posting_sizes)),
+                'bytes': int(sum(p.nbytes for p in self._postings) +
+                             sum(f.nbytes for f in self._frequencies) + self._lengths.nbytes)
+            }
@@ -0,0 +1,144 @@
+"""
+Inverted metadata index for filtered vector search
+FinTwin AI Financial Twin - Retrieval Layer
+
+Maps each (field, value) pair in chunk metadata to a bitset over index row
+slots. A filter such as {'type': 'regulation', 'year': [2022, 2023]} becomes
+an OR of bitsets within a field and an AND across fields, producing a boolean
+row mask the vector indexes can use as a pre-filter or an in-search mask.
+"""
+
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Metadata values that can be filtered on; lists/tuples index every element
+SCALAR_TYPES = (str, int, float, bool)
+
+
+def value_key(value: Any) -> str:
+    """Posting key for a metadata value; 2023 and '2023' match each other"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _grow(words: np.ndarray, required: int) -> np.ndarray:
+    """Return a word array holding at least `required` words, doubling as needed"""
+    if required <= words.shape[0]:
+        return words
+    grown = np.zeros(max(required, 2 * words.shape[0]), dtype=np.uint64)
+    grown[:words.shape[0]] = words
+    return grown
+
+
+def _set_bits(words: np.ndarray, slots: np.ndarray):
+    """Set the bits for row slots in a uint64 word array"""
+    np.bitwise_or.at(words, slots >> 6, np.left_shift(np.uint64(1), (slots & 63).astype(np.uint64)))
+
+
+def _to_mask(words: np.ndarray, size: int) -> np.ndarray:
+    """Expand a uint64 bitset into a boolean row mask of length size"""
+    bits = np.unpackbits(words.view(np.uint8), bitorder='little', count=size)
+    return bits.view(np.bool_)
+
+
+class MetadataIndex:
+    """
+    Inverted index from metadata values to row-slot bitsets
+    """
+
+    def __init__(self, fields: Optional[Sequence[str]] = None):
+        """
+        Args:
+            fields: Metadata fields to index; every scalar field if None
+        """
+        self.fields = set(fields) if fields is not None else None
+        self._postings: Dict[str, Dict[str, np.ndarray]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, slots: Sequence[int], records: Sequence[Dict[str, Any]]):
+        """
+        Index the filterable fields of chunks stored at the given row slots
+
+        Args:
+            slots: Row slots of the chunks
+            records: Flat field -> value mappings, one per slot
+        """
+        grouped: Dict[Tuple[str, str], List[int]] = {}
+        for slot, record in zip(slots, records):
+            for field, value in record.items():
+                if self.fields is not None and field not in self.fields:
+                    continue
+                values = value if isinstance(value, (list, tuple)) else [value]
+                for item in values:
+                    if isinstance(item, SCALAR_TYPES):
+                        grouped.setdefault((field, value_key(item)), []).append(slot)
+
+        with self._lock:
+            for (field, key), posting_slots in grouped.items():
+                slot_array = np.asarray(posting_slots, dtype=np.int64)
+                values = self._postings.setdefault(field, {})
+                words = values.get(key, np.zeros(0, dtype=np.uint64))
+                words = _grow(words, int(slot_array.max() >> 6) + 1)
+                _set_bits(words, slot_array)
+                values[key] = words
+            if len(slots):
+                self._size = max(self._size, int(max(slots)) + 1)
+
+    def mask(self, filters: Dict[str, Any], size: Optional[int] = None) -> np.ndarray:
+        """
+        Boolean row mask of chunks matching every filter
+
+        Args:
+            filters: field -> value, or field -> list of accepted values
+            size: Mask length; defaults to the number of indexed slots
+
+        Returns:
+            Boolean array of length size
+        """
+        size = self._size if size is None else size
+        num_words = (size + 63) // 64
+        result: Optional[np.ndarray] = None
+
+        with self._lock:
+            for field, accepted in filters.items():
+                values = self._postings.get(field, {})
+                accepted = accepted if isinstance(accepted, (list, tuple, set)) else [accepted]
+
+                field_words = np.zeros(num_words, dtype=np.uint64)
+                for value in accepted:
+                    words = values.get(value_key(value))
+                    if words is not None:
+                        count = min(num_words, words.shape[0])
+                        field_words[:count] |= words[:count]
+
+                result = field_words if result is None else result & field_words
+
+        if result is None:
+            return np.ones(size, dtype=np.bool_)
+        return _to_mask(result, size)
+
+    def values(self, field: str) -> List[str]:
+        """Distinct indexed values of a field"""
+        with self._lock:
+            return sorted(self._postings.get(field, {}))
+
+    def clear(self):
+        """Drop every posting"""
+        with self._lock:
+            self._postings = {}
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Indexed slot count and distinct values per field"""
+        with self._lock:
+            return {
+                'indexed_chunks': self._size,
+                'fields': {field: len(values) for field, values in self._postings.items()},
+                'bytes': sum(words.nbytes for values in self._postings.values() for words in values.values())
+            }
@@ -0,0 +1,142 @@
+"""
+Asyncio micro-batching for query embeddings
+FinTwin AI Financial Twin - Retrieval Layer
+
+Concurrent requests each need a single-row encode. The MicroBatcher collects
+them for up to `max_wait_ms` (or until `max_batch_size` items are waiting),
+runs one batched encoder call in a worker thread and fans the rows back out
+to the awaiting callers.
+"""
+
+import asyncio
+import time
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent encode requests into batched encoder calls
+    """
+
+    def __init__(self,
+                 encode_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 3.0,
+                 executor: Optional[Any] = None):
+        """
+        Args:
+            encode_fn: Blocking function mapping a list of texts to an embedding matrix
+            max_batch_size: Largest batch sent to the encoder
+            max_wait_ms: Longest time the first request in a batch waits for company
+            executor: concurrent.futures executor for encoder calls; default loop executor if None
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+
+        # Created on first use so they bind to the serving event loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.encoded = 0
+
+    async def submit(self, text: str) -> np.ndarray:
+        """Queue a text and wait for its embedding"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for one request, then gather more until the batch is full or the window closes"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Whatever is already queued rides along without extra waiting
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            pending = [(text, future) for text, future in batch if not future.cancelled()]
+            if not pending:
+                continue
+
+            # A failed batch fails its callers, never the worker
+            try:
+                await self._dispatch(loop, pending)
+            except asyncio.CancelledError:
+                for _, future in pending:
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Batched encode of {len(pending)} queries failed: {e}")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _dispatch(self, loop: asyncio.AbstractEventLoop, pending: List[Tuple[str, asyncio.Future]]):
+        """Encode one batch and resolve its futures"""
+        # Identical concurrent queries are encoded once
+        unique = list(dict.fromkeys(text for text, _ in pending))
+        embeddings = await loop.run_in_executor(self.executor, self.encode_fn, unique)
+        if len(embeddings) != len(unique):
+            raise ValueError(f"Encoder returned {len(embeddings)} rows for {len(unique)} texts")
+
+        rows = dict(zip(unique, embeddings))
+        for text, future in pending:
+            if not future.done():
+                future.set_result(rows[text])
+
+        self.batches += 1
+        self.items += len(pending)
+        self.encoded += len(unique)
+
+    async def close(self):
+        """Stop the background worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counters"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'batches': self.batches,
+            'items': self.items,
+            'encoded': self.encoded,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,194 @@
+"""
+Bulk pgvector writes for document ingestion
+FinTwin AI Financial Twin - Document Processing Pipeline
+
+Upserts chunk rows (id, content, embedding, metadata) into a pgvector table
+in one of three modes:
+
+    copy     binary COPY of each batch into a temporary staging table, then
+             one set-based INSERT ... SELECT ... ON CONFLICT (default)
+    values   multi-row INSERT ... ON CONFLICT pages via execute_values, with
+             vectors sent as float4 arrays
+    row      one INSERT ... ON CONFLICT round-trip per row with the vector as
+             JSON text (the original write path, kept as a baseline)
+
+In copy mode vectors travel in pgvector's binary wire format (big-endian
+int16 dimension, int16 unused, float4 values), so the server never parses
+decimal text. The writer never commits; the caller owns the transaction.
+"""
+
+import io
+import json
+import re
+import struct
+import time
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WRITE_MODES = ('copy', 'values', 'row')
+
+# PGCOPY binary header: signature, flags, header extension length
+_COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+_COPY_TRAILER = struct.pack('>h', -1)
+_JSONB_VERSION = b'\x01'
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+Row = Tuple[str, str, Any, Dict[str, Any]]
+
+
+def copy_binary(rows: Sequence[Row]) -> bytes:
+    """
+    PGCOPY binary stream of (id text, content text, embedding vector, metadata jsonb) tuples
+    """
+    out = io.BytesIO()
+    out.write(_COPY_HEADER)
+    if not rows:
+        out.write(_COPY_TRAILER)
+        return out.getvalue()
+
+    # Every vector in a batch has the same dimension, so its field prefix is shared
+    vectors = np.asarray([row[2] for row in rows], dtype='>f4').reshape(len(rows), -1)
+    vector_header = struct.pack('>HH', vectors.shape[1], 0)
+    vector_field = struct.pack('>i', len(vector_header) + vectors.shape[1] * vectors.itemsize)
+
+    for (chunk_id, content, _, metadata), vector in zip(rows, vectors):
+        fields = (chunk_id.encode('utf-8'), content.encode('utf-8'),
+                  _JSONB_VERSION + json.dumps(metadata, default=str).encode('utf-8'))
+        out.write(struct.pack('>hi', 4, len(fields[0])))
+        out.write(fields[0])
+        out.write(struct.pack('>i', len(fields[1])))
+        out.write(fields[1])
+        out.write(vector_field)
+        out.write(vector_header)
+        out.write(vector.tobytes())
+        out.write(struct.pack('>i', len(fields[2])))
+        out.write(fields[2])
+    out.write(_COPY_TRAILER)
+    return out.getvalue()
+
+
+def unique_rows(rows: Iterable[Row]) -> List[Row]:
+    """Rows with duplicate ids collapsed to the last one, as sequential upserts would leave them"""
+    latest: Dict[str, Row] = {}
+    for row in rows:
+        latest.pop(row[0], None)
+        latest[row[0]] = row
+    return list(latest.values())
+
+
+class PGVectorWriter:
+    """
+    Batched upserts of chunk embeddings into a pgvector table
+    """
+
+    def __init__(self,
+                 connection,
+                 table: str = 'vector_embeddings',
+                 mode: str = 'copy',
+                 batch_size: int = 5000):
+        """
+        Args:
+            connection: Open psycopg2 connection
+            table: Target table with (id, content, embedding, metadata, created_at, updated_at)
+            mode: One of WRITE_MODES
+            batch_size: Rows per COPY batch or execute_values page
+        """
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Unknown write mode: {mode}")
+        if not _IDENTIFIER.match(table):
+            raise ValueError(f"Invalid table name: {table}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.connection = connection
+        self.table = table
+        self.mode = mode
+        self.batch_size = batch_size
+
+        self.rows = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def _upsert_sql(self, source: str) -> str:
+        return f"""
+            INSERT INTO {self.table} (id, content, embedding, metadata, created_at)
+            {source}
+            ON CONFLICT (id) DO UPDATE SET
+                content = EXCLUDED.content,
+                embedding = EXCLUDED.embedding,
+                metadata = EXCLUDED.metadata,
+                updated_at = NOW()
+        """
+
+    def _write_copy(self, cursor, batch: Sequence[Row]):
+        staging = f"{self.table}_staging"
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {staging} (
+                id VARCHAR(255), content TEXT, embedding VECTOR, metadata JSONB
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert(f"COPY {staging} (id, content, embedding, metadata) FROM STDIN WITH (FORMAT BINARY)",
+                           io.BytesIO(copy_binary(batch)))
+        cursor.execute(self._upsert_sql(f"SELECT id, content, embedding, metadata, NOW() FROM {staging}"))
+        cursor.execute(f"TRUNCATE {staging}")
+
+    def _write_values(self, cursor, batch: Sequence[Row]):
+        from psycopg2.extras import execute_values
+
+        vectors = np.asarray([row[2] for row in batch], dtype=np.float32).tolist()
+        execute_values(
+            cursor,
+            self._upsert_sql("VALUES %s"),
+            [(chunk_id, content, vector, json.dumps(metadata, default=str))
+             for (chunk_id, content, _, metadata), vector in zip(batch, vectors)],
+            template="(%s, %s, %s::float4[]::vector, %s::jsonb, NOW())",
+            page_size=self.batch_size
+        )
+
+    def _write_rows(self, cursor, batch: Sequence[Row]):
+        query = self._upsert_sql("VALUES (%s, %s, %s, %s, NOW())")
+        for chunk_id, content, vector, metadata in batch:
+            cursor.execute(query, (chunk_id, content, json.dumps(np.asarray(vector).tolist()),
+                                   json.dumps(metadata, default=str)))
+
+    def upsert(self, rows: Iterable[Row]) -> int:
+        """
+        Insert or update rows in batches, without committing
+
+        Args:
+            rows: (id, content, embedding, metadata) tuples; a repeated id keeps its last row
+
+        Returns:
+            Number of distinct rows written
+        """
+        rows = unique_rows(rows)
+        if not rows:
+            return 0
+
+        write = {'copy': self._write_copy, 'values': self._write_values, 'row': self._write_rows}[self.mode]
+        start = time.perf_counter()
+        cursor = self.connection.cursor()
+        try:
+            for offset in range(0, len(rows), self.batch_size):
+                write(cursor, rows[offset:offset + self.batch_size])
+                self.batches += 1
+        finally:
+            cursor.close()
+
+        self.rows += len(rows)
+        self.seconds += time.perf_counter() - start
+        return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """Rows written and write throughput"""
+        return {
+            'mode': self.mode,
+            'rows': self.rows,
+            'batches': self.batches,
+            'rows_per_second': self.rows / self.seconds if self.seconds else 0.0,
+            'batch_size': self.batch_size
+        }
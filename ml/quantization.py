@@ -0,0 +1,389 @@
+"""
+Compressed embedding storage for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+Scalar (int8) and product quantizers for chunk embeddings, and an index that
+searches over the compressed codes before rescoring the best candidates
+against the full-precision vectors. The full-precision block can be kept on
+disk (memory-mapped) so that only the codes stay resident.
+"""
+
+import os
+import tempfile
+import weakref
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+from vector_index import VectorIndex, normalize_rows, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block when scanning codes; bounds temporary memory per query
+SCAN_BLOCK_SIZE = 65536
+
+
+def _remove_file(path: str):
+    """Delete a released vector block"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def kmeans(vectors: np.ndarray, num_clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Euclidean k-means (Lloyd) returning the centroid matrix"""
+    rng = np.random.default_rng(seed)
+    num_clusters = min(num_clusters, vectors.shape[0])
+    centroids = vectors[rng.choice(vectors.shape[0], num_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        # argmin ||x - c||^2 == argmax (x.c - ||c||^2 / 2)
+        half_norms = 0.5 * np.einsum('ij,ij->i', centroids, centroids)
+        assignments = np.argmax(vectors @ centroids.T - half_norms, axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=num_clusters)
+
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()), replace=False)]
+
+    return centroids.astype(np.float32)
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension int8 scalar quantizer (4x smaller than float32)
+    """
+
+    def __init__(self):
+        self.minimum: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.minimum is not None
+
+    def code_size(self, dimension: int) -> int:
+        """Bytes per encoded vector"""
+        return dimension
+
+    def train(self, vectors: np.ndarray):
+        """Learn the per-dimension value range"""
+        self.minimum = vectors.min(axis=0).astype(np.float32)
+        spread = vectors.max(axis=0) - self.minimum
+        spread[spread == 0] = 1.0
+        self.scale = (spread / 255.0).astype(np.float32)
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to rebuild the trained quantizer"""
+        return {'minimum': self.minimum, 'scale': self.scale}
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """Restore a quantizer saved with get_state"""
+        self.minimum = np.asarray(state['minimum'], dtype=np.float32)
+        self.scale = np.asarray(state['scale'], dtype=np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Quantize float vectors to uint8 codes"""
+        codes = np.rint((vectors - self.minimum) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate float vectors from codes"""
+        return codes.astype(np.float32) * self.scale + self.minimum
+
+    def score(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Approximate inner products between a query and encoded vectors"""
+        # q . (min + scale * c) == q . min + (q * scale) . c
+        weights = query * self.scale
+        bias = float(query @ self.minimum)
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], SCAN_BLOCK_SIZE):
+            block = codes[start:start + SCAN_BLOCK_SIZE]
+            scores[start:start + SCAN_BLOCK_SIZE] = block.astype(np.float32) @ weights
+        return scores + bias
+
+
+class ProductQuantizer:
+    """
+    Product quantizer with one 256-entry codebook per subspace
+    """
+
+    def __init__(self, num_subspaces: int = 48, iterations: int = 10, seed: int = 0):
+        """
+        Args:
+            num_subspaces: Number of sub-vectors (bytes per encoded vector)
+            iterations: k-means iterations per codebook
+            seed: Random seed for codebook training
+        """
+        self.num_subspaces = num_subspaces
+        self.num_centroids = 256
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    def code_size(self, dimension: int) -> int:
+        """Bytes per encoded vector"""
+        return self.num_subspaces
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """View vectors as (n, num_subspaces, sub_dimension)"""
+        return vectors.reshape(vectors.shape[0], self.num_subspaces, -1)
+
+    def train(self, vectors: np.ndarray):
+        """Learn one codebook per subspace"""
+        if vectors.shape[1] % self.num_subspaces != 0:
+            raise ValueError(
+                f"Dimension {vectors.shape[1]} is not divisible by {self.num_subspaces} subspaces"
+            )
+        if vectors.shape[0] < self.num_centroids:
+            raise ValueError(f"Product quantizer needs at least {self.num_centroids} training vectors")
+
+        subvectors = self._split(vectors)
+        self.codebooks = np.stack([
+            kmeans(np.ascontiguousarray(subvectors[:, m]), self.num_centroids, self.iterations, self.seed + m)
+            for m in range(self.num_subspaces)
+        ])
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to rebuild the trained quantizer"""
+        return {'codebooks': self.codebooks}
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """Restore a quantizer saved with get_state"""
+        self.codebooks = np.asarray(state['codebooks'], dtype=np.float32)
+        self.num_subspaces = self.codebooks.shape[0]
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Assign each sub-vector to its nearest codeword"""
+        subvectors = self._split(vectors)
+        codes = np.empty((vectors.shape[0], self.num_subspaces), dtype=np.uint8)
+        for m in range(self.num_subspaces):
+            codebook = self.codebooks[m]
+            half_norms = 0.5 * np.einsum('ij,ij->i', codebook, codebook)
+            codes[:, m] = np.argmax(subvectors[:, m] @ codebook.T - half_norms, axis=1)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate float vectors from codes"""
+        parts = self.codebooks[np.arange(self.num_subspaces), codes]
+        return parts.reshape(codes.shape[0], -1)
+
+    def score(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Asymmetric distance computation: sum of per-subspace lookup tables"""
+        query_parts = query.reshape(self.num_subspaces, -1)
+        lookup = np.einsum('md,mkd->mk', query_parts, self.codebooks)
+        # Flatten so each (subspace, code) pair is a single gather offset
+        flat_lookup = lookup.ravel()
+        offsets = (np.arange(self.num_subspaces) * self.num_centroids).astype(np.intp)
+
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], SCAN_BLOCK_SIZE):
+            block = codes[start:start + SCAN_BLOCK_SIZE]
+            scores[start:start + SCAN_BLOCK_SIZE] = flat_lookup[block + offsets].sum(axis=1)
+        return scores
+
+
+QUANTIZERS = {
+    'int8': ScalarQuantizer,
+    'pq': ProductQuantizer,
+}
+
+
+class QuantizedIndex(VectorIndex):
+    """
+    Index that scans compressed codes and rescores candidates exactly
+    """
+
+    def __init__(self,
+                 dimension: Optional[int] = None,
+                 quantization: str = 'int8',
+                 quantizer_params: Optional[Dict[str, Any]] = None,
+                 rescore_factor: int = 4,
+                 train_size: int = 10000,
+                 storage_dir: Optional[str] = None,
+                 **kwargs):
+        """
+        Initialize an empty quantized index
+
+        Args:
+            dimension: Embedding dimension; inferred from the first insert if None
+            quantization: 'int8' (scalar) or 'pq' (product quantization)
+            quantizer_params: Extra arguments for the quantizer, e.g. num_subspaces
+            rescore_factor: Candidates rescored exactly = rescore_factor * k
+            train_size: Chunks to accumulate before training the quantizer
+            storage_dir: Keep full-precision vectors memory-mapped in this directory
+                instead of on the heap
+        """
+        if quantization not in QUANTIZERS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+
+        self.quantization = quantization
+        self.quantizer_params = quantizer_params or {}
+        self.rescore_factor = max(1, rescore_factor)
+        self.train_size = train_size
+        self.storage_dir = storage_dir
+        self._storage_path: Optional[str] = None
+        # Quantizer and codes are swapped in together so lock-free searches
+        # never pair a quantizer with codes it did not encode
+        self._quantized: Tuple[Any, Optional[np.ndarray]] = (
+            QUANTIZERS[quantization](**self.quantizer_params), None
+        )
+
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+        super().__init__(dimension=dimension, **kwargs)
+
+    @property
+    def quantizer(self):
+        return self._quantized[0]
+
+    @property
+    def is_trained(self) -> bool:
+        return self.quantizer.is_trained
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Compressed codes of the populated rows"""
+        size = len(self)
+        return self._quantized[1][:size]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Resident bytes for codes and full-precision vectors"""
+        codes_bytes = self.codes.nbytes if self._quantized[1] is not None else 0
+        vector_bytes = 0 if self._storage_path else self.vectors.nbytes
+        return {'codes_bytes': codes_bytes, 'vector_bytes': vector_bytes}
+
+    def _allocate(self, rows: int) -> np.ndarray:
+        """Allocate vector storage, memory-mapped when a storage_dir is set"""
+        if not self.storage_dir:
+            return super()._allocate(rows)
+
+        # A unique file per allocation: another index on the same directory
+        # (a compaction or rebuild) must never truncate a block still mapped here
+        fd, path = tempfile.mkstemp(prefix=f"vectors_{rows}_", suffix='.npy', dir=self.storage_dir)
+        os.close(fd)
+        vectors = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                            shape=(rows, self.dimension))
+        # The file goes once the mapping is released, i.e. after the caller has
+        # copied its rows into a grown block and every view of it is gone
+        weakref.finalize(vectors, _remove_file, path)
+        self._storage_path = path
+        return vectors
+
+    def _grow_codes(self, quantizer, codes: Optional[np.ndarray], required: int) -> np.ndarray:
+        """Code matrix with room for `required` rows, grown alongside the vector matrix"""
+        if codes is not None and required <= codes.shape[0]:
+            return codes
+        grown = np.empty((max(required, self.capacity), quantizer.code_size(self.dimension)), dtype=np.uint8)
+        if codes is not None:
+            grown[:codes.shape[0]] = codes
+        return grown
+
+    def train(self, sample: Optional[np.ndarray] = None):
+        """
+        Train the quantizer and encode every stored chunk
+
+        The new quantizer and codes are built aside and published together;
+        searches keep using the previous ones until then.
+
+        Args:
+            sample: Training vectors; defaults to the chunks already stored
+        """
+        sample = self.vectors if sample is None else normalize_rows(sample)
+        if sample.shape[0] > self.train_size:
+            rng = np.random.default_rng(0)
+            sample = sample[np.sort(rng.choice(sample.shape[0], self.train_size, replace=False))]
+        quantizer = QUANTIZERS[self.quantization](**self.quantizer_params)
+        quantizer.train(np.asarray(sample))
+
+        size = len(self)
+        codes = self._grow_codes(quantizer, None, size)
+        for start in range(0, size, SCAN_BLOCK_SIZE):
+            end = min(start + SCAN_BLOCK_SIZE, size)
+            codes[start:end] = quantizer.encode(self._vectors[start:end])
+        self._quantized = (quantizer, codes)
+        logger.info(f"Trained {self.quantization} quantizer on {sample.shape[0]} vectors")
+
+    def _prepare_rows(self, start: int, end: int):
+        """Encode new rows before VectorIndex.add publishes them"""
+        quantizer, codes = self._quantized
+        if not quantizer.is_trained:
+            return
+        grown = self._grow_codes(quantizer, codes, end)
+        grown[start:end] = quantizer.encode(self._vectors[start:end])
+        if grown is not codes:
+            self._quantized = (quantizer, grown)
+
+    def add(self,
+            ids: List[str],
+            texts: List[str],
+            embeddings: np.ndarray,
+            metadatas: Optional[List[Dict[str, Any]]] = None) -> List[int]:
+        """Append chunks, training the quantizer once enough have arrived"""
+        slots = super().add(ids, texts, embeddings, metadatas)
+        if slots and not self.is_trained and len(self) >= self.train_size:
+            self.train()
+        return slots
+
+    def search(self,
+               query_embedding: np.ndarray,
+               k: int = 5,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Scan the compressed codes, then rescore the best candidates exactly
+
+        Falls back to exact search until the quantizer has been trained.
+        Selective masks are searched exactly over the matching rows; broader
+        masks are applied to the approximate scores.
+        """
+        # Rows are encoded before they are published, so codes read after the
+        # size always cover it
+        size = len(self)
+        quantizer, codes = self._quantized
+        if not quantizer.is_trained or codes is None:
+            return super().search(query_embedding, k, mask=mask)
+        if size == 0 or k <= 0:
+            return []
+
+        query = self._normalize_query(query_embedding)
+        mask = self._effective_mask(mask)
+        if mask is not None:
+            mask = self._check_mask(mask)[:size]
+            selected = np.flatnonzero(mask)
+            if selected.shape[0] <= self._prefilter_limit():
+                return self.search_slots(query, k, selected)
+
+        approximate = quantizer.score(codes[:size], query)
+        if mask is not None:
+            approximate = np.where(mask, approximate, -np.inf)
+        candidates = top_k_indices(approximate, self.rescore_factor * k)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        candidates.sort()  # sequential reads from the (possibly mmapped) vector block
+
+        scores = self._vectors[candidates] @ query
+        top = top_k_indices(scores, k)
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def search_batch(self,
+                     query_embeddings: np.ndarray,
+                     k: int = 5,
+                     mask: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """One exact matrix-matrix scan until trained, then one code scan per query"""
+        if not self.is_trained:
+            return super().search_batch(query_embeddings, k, mask=mask)
+        return [self.search(query, k, mask=mask) for query in normalize_rows(query_embeddings)]
+
+    def clear(self):
+        """Remove every chunk; the trained quantizer is kept"""
+        super().clear()
+        self._quantized = (self.quantizer, None)
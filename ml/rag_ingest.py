@@ -11,14 +11,20 @@ Date: 2024-01-15
 """
 
 import os
-import json
 import hashlib
 import logging
+from dataclasses import replace
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from functools import partial
+from typing import List, Dict, Any, Iterator, Optional
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from embedding_batcher import EmbeddingBatcher
+from embedding_backends import EMBEDDING_BACKENDS, create_backend
+from pg_writer import PGVectorWriter, WRITE_MODES
+from ingest_pipeline import run_pipeline
+from ingest_manifest import IngestManifest, plan_ingest
+from chunk_embedding_cache import ChunkEmbeddingCache
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import argparse
@@ -31,6 +37,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bump when parsing or chunking changes, so the manifest re-ingests every file
+CHUNKER_VERSION = 3
+
+# CSV columns the chunker reads; the parser skips all others
+CSV_COLUMNS = ('description', 'amount', 'date', 'category')
+# Amounts stay text: bank exports write "1,234.50" or "-", which must not fail the file
+CSV_DTYPES = {'description': 'str', 'amount': 'str', 'date': 'str', 'category': 'str'}
+
+def chunk_id(source_file: str, content: str) -> str:
+    """Unique ID per source file and chunk content"""
+    return f"{source_file}_{hashlib.md5(content.encode()).hexdigest()[:8]}"
+
 class RAGDocumentIngestion:
     """
     Document ingestion pipeline for the RAG system
@@ -40,7 +58,21 @@ class RAGDocumentIngestion:
                  model_name: str = "all-MiniLM-L6-v2",
                  chunk_size: int = 1000,
                  chunk_overlap: int = 200,
-                 db_config: Optional[Dict] = None):
+                 db_config: Optional[Dict] = None,
+                 max_batch_tokens: int = 16384,
+                 max_batch_size: int = 128,
+                 embedding_backend: str = 'sentence-transformers',
+                 embedding_backend_params: Optional[Dict] = None,
+                 write_mode: str = 'copy',
+                 write_batch_size: int = 5000,
+                 parse_workers: int = 2,
+                 embed_workers: int = 1,
+                 queue_size: int = 8,
+                 embed_batch_chunks: int = 256,
+                 csv_batch_rows: int = 10000,
+                 force_reingest: bool = False,
+                 embedding_cache_path: Optional[str] = None,
+                 embedding_cache_max_bytes: int = 1024 * 1024 * 1024):
         """
         Initialize the RAG document ingestion pipeline
         
@@ -49,10 +81,38 @@ class RAGDocumentIngestion:
             chunk_size: Maximum size of text chunks
             chunk_overlap: Overlap between chunks
             db_config: Database configuration
+            max_batch_tokens: Cap on padded tokens per encoder call
+            max_batch_size: Cap on chunks per encoder call
+            embedding_backend: Embedding backend name (see embedding_backends)
+            embedding_backend_params: Backend constructor arguments; model_name is
+                used for the sentence-transformers backends if not given here
+            write_mode: Database write path: 'copy' (binary COPY + set-based upsert),
+                'values' (multi-row execute_values pages) or 'row' (one INSERT per chunk)
+            write_batch_size: Rows per COPY batch or execute_values page
+            parse_workers: Parser processes (0 parses in the main process)
+            embed_workers: Encoder threads
+            queue_size: Files buffered between pipeline stages
+            embed_batch_chunks: Chunks packed into one encoder call across small files
+            csv_batch_rows: CSV rows read, chunked, embedded and stored at a time
+            force_reingest: Re-embed every file instead of skipping unchanged
+                files and chunks recorded in the ingestion manifest
+            embedding_cache_path: SQLite file of the content-hash -> embedding
+                cache consulted before encoding; None disables it
+            embedding_cache_max_bytes: Size cap of the embedding cache
         """
         self.model_name = model_name
+        self.embedding_backend = embedding_backend
+        self.embedding_backend_params = dict(embedding_backend_params or {})
+        if embedding_backend != 'hashing':
+            self.embedding_backend_params.setdefault('model_name', model_name)
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.parse_workers = parse_workers
+        self.embed_workers = embed_workers
+        self.queue_size = queue_size
+        self.embed_batch_chunks = embed_batch_chunks
+        self.csv_batch_rows = csv_batch_rows
+        self.force_reingest = force_reingest
         self.db_config = db_config or {
             'host': 'localhost',
             'port': 5432,
@@ -64,16 +124,41 @@ class RAGDocumentIngestion:
         # Initialize embedding model
         self.embedding_model = None
         self.load_embedding_model()
+        self.embedding_batcher = EmbeddingBatcher(
+            self.embedding_model.encode,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_size=max_batch_size,
+            max_tokens=self.embedding_model.max_seq_length
+        )
+        self.embedding_cache = (ChunkEmbeddingCache(embedding_cache_path, model_name=self.embedding_model.name,
+                                                    max_bytes=embedding_cache_max_bytes)
+                                if embedding_cache_path else None)
         
         # Initialize database connection
         self.db_connection = None
         self.connect_to_database()
+        self.writer = PGVectorWriter(self.db_connection, mode=write_mode, batch_size=write_batch_size)
+        self.manifest = IngestManifest(self.db_connection)
+        
+        # Files being re-ingested this run, by name, and their reusable chunk ids
+        self._changes = {}
+        self._reusable_ids = {}
+        self._reused_chunks = 0
+        # Ids of chunks stored so far per file, completed by finish_file
+        self._file_ids = {}
+    
+    @property
+    def pipeline_version(self) -> str:
+        """Chunker and embedding model a manifest entry was produced with"""
+        return (f"chunker-v{CHUNKER_VERSION}:{self.chunk_size}/{self.chunk_overlap}:"
+                f"{self.embedding_model.name}:{self.embedding_model.dimension}")
     
     def load_embedding_model(self):
-        """Load the sentence transformer model"""
+        """Load the configured embedding backend"""
         try:
-            logger.info(f"Loading embedding model: {self.model_name}")
-            self.embedding_model = SentenceTransformer(self.model_name)
+            logger.info(f"Loading embedding backend: {self.embedding_backend}")
+            self.embedding_model = create_backend(self.embedding_backend, **self.embedding_backend_params)
+            self.embedding_model.load()
             logger.info("Embedding model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
@@ -107,58 +192,83 @@ class RAGDocumentIngestion:
             'total_documents': 0,
             'total_chunks': 0,
             'total_embeddings': 0,
+            'skipped_documents': 0,
+            'removed_documents': 0,
+            'reused_chunks': 0,
+            'purged_chunks': 0,
             'processing_time': 0,
             'errors': []
         }
         
         start_time = datetime.now()
+        self._reused_chunks = 0
+        cache_start = self.embedding_cache.stats() if self.embedding_cache is not None else None
         
         try:
-            # Process markdown files
-            md_files = list(documents_path.glob("*.md"))
-            for md_file in md_files:
-                try:
-                    chunks = self.process_markdown_file(md_file)
-                    embeddings = self.generate_embeddings(chunks)
-                    self.store_embeddings(chunks, embeddings, md_file.name)
-                    
-                    stats['total_documents'] += 1
-                    stats['total_chunks'] += len(chunks)
-                    stats['total_embeddings'] += len(embeddings)
-                    
-                    logger.info(f"Processed {md_file.name}: {len(chunks)} chunks")
-                except Exception as e:
-                    error_msg = f"Error processing {md_file.name}: {e}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
+            # Markdown and CSV files
+            files = sorted(documents_path.glob("*.md")) + sorted(documents_path.glob("*.csv"))
             
-            # Process CSV files
-            csv_files = list(documents_path.glob("*.csv"))
-            for csv_file in csv_files:
-                try:
-                    chunks = self.process_csv_file(csv_file)
-                    embeddings = self.generate_embeddings(chunks)
-                    self.store_embeddings(chunks, embeddings, csv_file.name)
-                    
-                    stats['total_documents'] += 1
-                    stats['total_chunks'] += len(chunks)
-                    stats['total_embeddings'] += len(embeddings)
-                    
-                    logger.info(f"Processed {csv_file.name}: {len(chunks)} chunks")
-                except Exception as e:
-                    error_msg = f"Error processing {csv_file.name}: {e}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
+            # Only new and changed files are parsed; removed files' chunks go in one DELETE
+            plan = plan_ingest(files, self.manifest.load(), self.pipeline_version, documents_path,
+                               force=self.force_reingest)
+            self.manifest.load_chunk_ids([change.previous for change in plan.changed if change.previous is not None])
+            self.manifest.touch(plan.touched)
+            stats['purged_chunks'] = self.manifest.purge(plan.removed)
+            stats['skipped_documents'] = len(plan.unchanged) + len(plan.touched)
+            stats['removed_documents'] = len(plan.removed)
+            self._changes = {change.path.name: change for change in plan.changed}
+            self._reusable_ids = {name: change.reusable_chunk_ids for name, change in self._changes.items()}
+            logger.info(f"Manifest: {len(plan.changed)} new or changed, {stats['skipped_documents']} unchanged, "
+                        f"{len(plan.removed)} removed")
+            
+            # Through the parse -> embed -> write pipeline: markdown files go to
+            # the parser pool, CSV files stream through in row batches
+            changed = [change.path for change in plan.changed]
+            result = run_pipeline(
+                [path for path in changed if path.suffix != '.csv'],
+                parse_file,
+                self.generate_embeddings,
+                self.store_embeddings,
+                parse_workers=self.parse_workers,
+                embed_workers=self.embed_workers,
+                queue_size=self.queue_size,
+                embed_batch_chunks=self.embed_batch_chunks,
+                stream_paths=[path for path in changed if path.suffix == '.csv'],
+                stream_fn=partial(self.iter_csv_file, batch_rows=self.csv_batch_rows),
+                finish_fn=self.finish_file,
+                abort_fn=self.abort_file
+            )
             
+            stats['total_documents'] = result['files']
+            stats['total_chunks'] = result['chunks']
+            stats['reused_chunks'] = self._reused_chunks
+            stats['total_embeddings'] = result['chunks'] - self._reused_chunks
+            stats['errors'].extend(result['errors'])
+            stats['stages'] = result['stages']
             stats['processing_time'] = (datetime.now() - start_time).total_seconds()
             
         except Exception as e:
             logger.error(f"Error in document processing: {e}")
             stats['errors'].append(str(e))
-        
+        finally:
+            self._changes = {}
+            self._reusable_ids = {}
+            self._file_ids = {}
+        
+        stats['embedding'] = self.embedding_batcher.stats()
+        if self.embedding_cache is not None:
+            # Counters for this run only
+            cache = self.embedding_cache.stats()
+            for counter in ('hits', 'misses', 'evictions', 'encode_seconds'):
+                cache[counter] -= cache_start[counter]
+            lookups = cache['hits'] + cache['misses']
+            cache['hit_rate'] = cache['hits'] / lookups if lookups else 0.0
+            stats['embedding_cache'] = cache
+        stats['database'] = self.writer.stats()
         return stats
     
-    def process_markdown_file(self, file_path: Path) -> List[Dict[str, Any]]:
+    @staticmethod
+    def process_markdown_file(file_path: Path) -> List[Dict[str, Any]]:
         """
         Process a markdown file and extract chunks
         
@@ -172,8 +282,8 @@ class RAGDocumentIngestion:
             content = f.read()
         
         # Extract title and sections
-        title = self.extract_title(content)
-        sections = self.extract_sections(content)
+        title = RAGDocumentIngestion.extract_title(content)
+        sections = RAGDocumentIngestion.extract_sections(content)
         
         chunks = []
         for i, section in enumerate(sections):
@@ -194,7 +304,8 @@ class RAGDocumentIngestion:
         
         return chunks
     
-    def process_csv_file(self, file_path: Path) -> List[Dict[str, Any]]:
+    @staticmethod
+    def process_csv_file(file_path: Path) -> List[Dict[str, Any]]:
         """
         Process a CSV file and extract chunks
         
@@ -204,48 +315,90 @@ class RAGDocumentIngestion:
         Returns:
             List of text chunks with metadata
         """
+        return [chunk for batch in RAGDocumentIngestion.iter_csv_file(file_path) for chunk in batch]
+    
+    @staticmethod
+    def iter_csv_file(file_path: Path, batch_rows: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream chunks of a CSV file, one batch per batch_rows rows
+        
+        Only the columns the chunker uses are parsed, with fixed dtypes, and
+        chunk text is built column-wise, so memory is bounded by batch_rows
+        rather than by the file. The summary chunk comes last, in its own batch,
+        and is produced for any file with rows, whichever columns it has.
+        
+        Args:
+            file_path: Path to CSV file
+            batch_rows: Rows read and chunked at a time
+            
+        Yields:
+            Lists of text chunks with metadata
+        """
         try:
-            df = pd.read_csv(file_path)
+            header = pd.read_csv(file_path, nrows=0).columns.tolist()
+            # With none of the chunker's columns, the first one is still read so rows are counted
+            usecols = [column for column in header if column in CSV_COLUMNS] or header[:1]
+            reader = pd.read_csv(file_path, usecols=usecols, dtype=CSV_DTYPES, chunksize=batch_rows)
         except Exception as e:
             logger.error(f"Failed to read CSV file {file_path}: {e}")
-            return []
+            return
         
-        chunks = []
+        created_at = datetime.now().isoformat()
+        transaction_metadata = {
+            'title': f"Transaction Data - {file_path.stem}",
+            'section': 'transactions',
+            'source': file_path.name,
+            'type': 'financial_data',
+            'file_type': 'csv',
+            'created_at': created_at
+        }
         
-        # Create chunks from CSV data
-        if 'description' in df.columns and 'amount' in df.columns:
-            # Transaction data
-            for idx, row in df.iterrows():
-                content = f"Transaction: {row.get('description', 'N/A')} - Amount: {row.get('amount', 0)} - Date: {row.get('date', 'N/A')}"
-                if row.get('category'):
-                    content += f" - Category: {row['category']}"
+        # Running totals for the summary chunk
+        rows = 0
+        columns = set()
+        total_amount = 0.0
+        categories: Dict[str, int] = {}
+        
+        with reader:
+            for frame in reader:
+                rows += len(frame)
+                columns.update(frame.columns)
+                if 'amount' in frame.columns:
+                    total_amount += _parse_amounts(frame['amount']).sum()
+                if 'category' in frame.columns:
+                    for category, count in frame['category'].value_counts(sort=False).items():
+                        categories[category] = categories.get(category, 0) + int(count)
                 
-                chunk = {
-                    'id': f"{file_path.stem}_transaction_{idx}",
-                    'content': content,
-                    'metadata': {
-                        'title': f"Transaction Data - {file_path.stem}",
-                        'section': 'transactions',
-                        'source': file_path.name,
-                        'type': 'financial_data',
-                        'file_type': 'csv',
-                        'row_index': idx,
-                        'created_at': datetime.now().isoformat()
-                    }
-                }
-                chunks.append(chunk)
+                # Transaction data
+                if 'description' in frame.columns and 'amount' in frame.columns:
+                    content = ("Transaction: " + frame['description'].fillna('N/A') +
+                               " - Amount: " + frame['amount'].fillna('N/A') +
+                               " - Date: " + (frame['date'].fillna('N/A') if 'date' in frame.columns else 'N/A'))
+                    if 'category' in frame.columns:
+                        category = frame['category']
+                        content = content.where(category.isna() | (category == ''),
+                                                content + " - Category: " + category.fillna(''))
+                    
+                    yield [
+                        {
+                            'id': f"{file_path.stem}_transaction_{idx}",
+                            'content': text,
+                            'metadata': {**transaction_metadata, 'row_index': idx}
+                        }
+                        for idx, text in zip(frame.index.tolist(), content.tolist())
+                    ]
         
         # Create summary chunks
-        if len(df) > 0:
-            summary_content = f"Data summary: {len(df)} records from {file_path.name}. "
-            if 'amount' in df.columns:
-                total_amount = df['amount'].sum()
-                summary_content += f"Total amount: {total_amount}. "
-            if 'category' in df.columns:
-                categories = df['category'].value_counts().to_dict()
-                summary_content += f"Categories: {categories}."
+        if rows > 0:
+            summary_content = f"Data summary: {rows} records from {file_path.name}. "
+            if 'amount' in columns:
+                summary_content += f"Total amount: {_format_amount(total_amount)}. "
+            if 'category' in columns:
+                # Most frequent first, ties in order of first appearance
+                ordered = dict(sorted(categories.items(), key=lambda item: -item[1]))
+                summary_content += f"Categories: {ordered}."
             
-            chunk = {
+            yield [{
                 'id': f"{file_path.stem}_summary",
                 'content': summary_content,
                 'metadata': {
@@ -254,14 +407,12 @@ class RAGDocumentIngestion:
                     'source': file_path.name,
                     'type': 'financial_data',
                     'file_type': 'csv',
-                    'created_at': datetime.now().isoformat()
+                    'created_at': created_at
                 }
-            }
-            chunks.append(chunk)
-        
-        return chunks
+            }]
     
-    def extract_title(self, content: str) -> str:
+    @staticmethod
+    def extract_title(content: str) -> str:
         """Extract title from markdown content"""
         lines = content.split('\n')
         for line in lines:
@@ -269,7 +420,8 @@ class RAGDocumentIngestion:
                 return line[2:].strip()
         return 'Financial Document'
     
-    def extract_sections(self, content: str) -> List[Dict[str, str]]:
+    @staticmethod
+    def extract_sections(content: str) -> List[Dict[str, str]]:
         """Extract sections from markdown content"""
         sections = []
         lines = content.split('\n')
@@ -291,7 +443,7 @@ class RAGDocumentIngestion:
         
         return sections
     
-    def generate_embeddings(self, chunks: List[Dict[str, Any]]) -> List[List[float]]:
+    def generate_embeddings(self, chunks: List[Dict[str, Any]]) -> List[Optional[List[float]]]:
         """
         Generate embeddings for text chunks
         
@@ -299,63 +451,120 @@ class RAGDocumentIngestion:
             chunks: List of text chunks
             
         Returns:
-            List of embedding vectors
+            List of embedding vectors; None for chunks already stored with the
+            same content, which keep their existing embedding
         """
         if not chunks:
             return []
         
-        texts = [chunk['content'] for chunk in chunks]
-        embeddings = self.embedding_model.encode(texts)
-        
-        return embeddings.tolist()
+        embeddings = [None] * len(chunks)
+        fresh = [i for i, chunk in enumerate(chunks)
+                 if chunk_id(chunk['metadata']['source'], chunk['content'])
+                 not in self._reusable_ids.get(chunk['metadata']['source'], ())]
+        if not fresh:
+            return embeddings
+        
+        # Length-sorted, token-budgeted batches keep padding and peak memory down;
+        # texts already in the embedding cache skip the encoder
+        texts = [chunks[i]['content'] for i in fresh]
+        if self.embedding_cache is not None:
+            encoded = self.embedding_cache.encode(texts, self.embedding_batcher.encode)
+        else:
+            encoded = self.embedding_batcher.encode(texts)
+        for i, embedding in zip(fresh, encoded.tolist()):
+            embeddings[i] = embedding
+        
+        return embeddings
     
-    def store_embeddings(self, chunks: List[Dict[str, Any]], embeddings: List[List[float]], source_file: str):
+    def store_embeddings(self, chunks: List[Dict[str, Any]], embeddings: List[Optional[List[float]]],
+                         source_file: str):
         """
         Store embeddings in the database
         
         Args:
             chunks: List of text chunks
-            embeddings: List of embedding vectors
+            embeddings: List of embedding vectors, None where the stored row is kept
             source_file: Source file name
         """
-        if not chunks or not embeddings:
+        if not chunks:
             return
         
-        cursor = self.db_connection.cursor()
-        
         try:
-            for chunk, embedding in zip(chunks, embeddings):
-                # Create unique ID
-                chunk_id = f"{source_file}_{hashlib.md5(chunk['content'].encode()).hexdigest()[:8]}"
-                
-                # Store in vector_embeddings table
-                insert_query = """
-                INSERT INTO vector_embeddings (id, content, embedding, metadata, created_at)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET
-                    content = EXCLUDED.content,
-                    embedding = EXCLUDED.embedding,
-                    metadata = EXCLUDED.metadata,
-                    updated_at = NOW()
-                """
-                
-                cursor.execute(insert_query, (
-                    chunk_id,
-                    chunk['content'],
-                    json.dumps(embedding),
-                    json.dumps(chunk['metadata']),
-                    datetime.now()
-                ))
+            ids = [chunk_id(source_file, chunk['content']) for chunk in chunks]
+            rows = [
+                (row_id, chunk['content'], embedding, chunk['metadata'])
+                for row_id, chunk, embedding in zip(ids, chunks, embeddings)
+                if embedding is not None
+            ]
             
+            # Batched upserts, committed together; a streamed file commits per batch
+            written = self.writer.upsert(rows)
             self.db_connection.commit()
-            logger.info(f"Stored {len(chunks)} embeddings for {source_file}")
+            self._file_ids.setdefault(source_file, []).extend(ids)
+            self._reused_chunks += len(chunks) - len(rows)
+            logger.info(f"Stored {written} embeddings for {source_file}, kept {len(chunks) - len(rows)}")
             
         except Exception as e:
             self.db_connection.rollback()
             logger.error(f"Failed to store embeddings for {source_file}: {e}")
             raise
-        finally:
-            cursor.close()
+    
+    def finish_file(self, source_file: str):
+        """
+        Delete a stored file's stale chunks and record it in the manifest
+        
+        Called once every chunk of the file is stored; until then the manifest
+        still describes the previous version, so an interrupted run redoes the file.
+        
+        Args:
+            source_file: Source file name
+        """
+        # Kept until the manifest is saved, for abort_file should that fail
+        ids = list(dict.fromkeys(self._file_ids.get(source_file, [])))
+        change = self._changes.get(source_file)
+        if change is None:
+            self._file_ids.pop(source_file, None)
+            return
+        
+        try:
+            with self.db_connection.cursor() as cursor:
+                deleted = self.manifest.delete_chunks(cursor, change.stale_chunk_ids(ids))
+                self.manifest.save(cursor, [replace(change.entry, chunk_ids=ids)])
+            self.db_connection.commit()
+            self._file_ids.pop(source_file, None)
+            if deleted:
+                logger.info(f"Deleted {deleted} stale chunks of {source_file}")
+            
+        except Exception as e:
+            self.db_connection.rollback()
+            logger.error(f"Failed to update manifest for {source_file}: {e}")
+            raise
+    
+    def abort_file(self, source_file: str):
+        """
+        Delete the chunks a failed file's already stored parts added
+        
+        Rows its manifest entry still lists are kept, so the file is left as
+        the last successful run stored it and the next run retries it.
+        
+        Args:
+            source_file: Source file name
+        """
+        ids = set(self._file_ids.pop(source_file, []))
+        change = self._changes.get(source_file)
+        if change is not None and change.previous is not None:
+            ids -= set(change.previous.chunk_ids)
+        
+        try:
+            with self.db_connection.cursor() as cursor:
+                deleted = self.manifest.delete_chunks(cursor, sorted(ids))
+            self.db_connection.commit()
+            logger.info(f"Deleted {deleted} chunks stored for {source_file} before it failed")
+            
+        except Exception as e:
+            self.db_connection.rollback()
+            logger.error(f"Failed to delete stored chunks of {source_file}: {e}")
+            raise
     
     def create_vector_extension(self):
         """Create pgvector extension if it doesn't exist"""
@@ -400,13 +609,31 @@ class RAGDocumentIngestion:
         finally:
             cursor.close()
     
+    def create_manifest_table(self):
+        """Create the ingestion manifest table if it doesn't exist"""
+        try:
+            self.manifest.create_table()
+            logger.info("ingest_manifest table created/verified")
+        except Exception as e:
+            logger.error(f"Failed to create manifest table: {e}")
+            raise
+    
     def cleanup_old_embeddings(self, days_old: int = 30):
-        """Clean up old embeddings"""
+        """Clean up old embeddings no manifest entry refers to"""
         cursor = self.db_connection.cursor()
         try:
-            delete_query = """
+            # Unchanged chunks keep their original created_at, so age alone no longer means stale.
+            # The manifest's ids are unnested once, so the check is a hash anti-join
+            # rather than an array scan of every manifest row per chunk
+            delete_query = f"""
+            WITH referenced AS (
+                SELECT unnest(chunk_ids) AS id FROM {self.manifest.table}
+            )
             DELETE FROM vector_embeddings 
             WHERE created_at < NOW() - INTERVAL '%s days'
+            AND NOT EXISTS (
+                SELECT 1 FROM referenced WHERE referenced.id = vector_embeddings.id
+            )
             """
             cursor.execute(delete_query, (days_old,))
             deleted_count = cursor.rowcount
@@ -442,11 +669,34 @@ class RAGDocumentIngestion:
     
     def close(self):
         """Close database connection"""
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
         if self.db_connection:
             self.db_connection.close()
             logger.info("Database connection closed")
 
 
+def _format_amount(amount: float) -> str:
+    """Amount as text, without a trailing .0 on whole numbers"""
+    text = str(amount)
+    return text[:-2] if text.endswith('.0') else text
+
+
+def _parse_amounts(amounts: pd.Series) -> pd.Series:
+    """Amounts read as text as floats, ignoring thousands separators; unparseable ones are NaN"""
+    try:
+        return amounts.astype('float64')
+    except ValueError:
+        return pd.to_numeric(amounts.str.replace(',', '', regex=False), errors='coerce')
+
+
+def parse_file(file_path: Path) -> List[Dict[str, Any]]:
+    """Chunks of a markdown or CSV file; module-level so parser processes can run it"""
+    if file_path.suffix == '.csv':
+        return RAGDocumentIngestion.process_csv_file(file_path)
+    return RAGDocumentIngestion.process_markdown_file(file_path)
+
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='RAG Document Ingestion Pipeline')
@@ -470,6 +720,33 @@ def main():
                        help='Database password')
     parser.add_argument('--cleanup-days', type=int, default=30,
                        help='Days old embeddings to cleanup')
+    parser.add_argument('--embedding-backend', default='sentence-transformers',
+                       choices=sorted(EMBEDDING_BACKENDS),
+                       help='Embedding backend (quantized: int8 CPU model, hashing: no model)')
+    parser.add_argument('--write-mode', default='copy', choices=WRITE_MODES,
+                       help='Database write path: binary COPY, execute_values pages or per-row INSERTs')
+    parser.add_argument('--write-batch-size', type=int, default=5000,
+                       help='Rows per COPY batch or execute_values page')
+    parser.add_argument('--parse-workers', type=int, default=2,
+                       help='Parser processes (0 parses in the main process)')
+    parser.add_argument('--embed-workers', type=int, default=1,
+                       help='Encoder threads')
+    parser.add_argument('--queue-size', type=int, default=8,
+                       help='Files buffered between pipeline stages')
+    parser.add_argument('--embed-batch-chunks', type=int, default=256,
+                       help='Chunks packed into one encoder call across small files')
+    parser.add_argument('--csv-batch-rows', type=int, default=10000,
+                       help='CSV rows read, embedded and stored at a time')
+    parser.add_argument('--max-batch-tokens', type=int, default=16384,
+                       help='Cap on padded tokens per encoder call')
+    parser.add_argument('--max-batch-size', type=int, default=128,
+                       help='Cap on chunks per encoder call')
+    parser.add_argument('--embedding-cache', default='data/embedding_cache.sqlite3',
+                       help='SQLite file caching embeddings by model and chunk text hash (empty to disable)')
+    parser.add_argument('--embedding-cache-max-mb', type=int, default=1024,
+                       help='Size cap of the embedding cache')
+    parser.add_argument('--full-reingest', action='store_true',
+                       help='Re-embed every file, ignoring unchanged files and chunks in the manifest')
     
     args = parser.parse_args()
     
@@ -487,7 +764,20 @@ def main():
         model_name=args.model_name,
         chunk_size=args.chunk_size,
         chunk_overlap=args.chunk_overlap,
-        db_config=db_config
+        db_config=db_config,
+        max_batch_tokens=args.max_batch_tokens,
+        max_batch_size=args.max_batch_size,
+        embedding_backend=args.embedding_backend,
+        write_mode=args.write_mode,
+        write_batch_size=args.write_batch_size,
+        parse_workers=args.parse_workers,
+        embed_workers=args.embed_workers,
+        queue_size=args.queue_size,
+        embed_batch_chunks=args.embed_batch_chunks,
+        csv_batch_rows=args.csv_batch_rows,
+        force_reingest=args.full_reingest,
+        embedding_cache_path=args.embedding_cache or None,
+        embedding_cache_max_bytes=args.embedding_cache_max_mb * 1024 * 1024
     )
     
     try:
@@ -495,6 +785,7 @@ def main():
         logger.info("Setting up database...")
         ingestion.create_vector_extension()
         ingestion.create_embeddings_table()
+        ingestion.create_manifest_table()
         
         # Process documents
         logger.info(f"Processing documents from: {args.documents_dir}")
@@ -505,7 +796,26 @@ def main():
         logger.info(f"Total documents processed: {stats['total_documents']}")
         logger.info(f"Total chunks created: {stats['total_chunks']}")
         logger.info(f"Total embeddings stored: {stats['total_embeddings']}")
+        logger.info(f"Unchanged documents skipped: {stats['skipped_documents']}, "
+                    f"unchanged chunks kept: {stats['reused_chunks']}")
+        logger.info(f"Removed documents: {stats['removed_documents']} ({stats['purged_chunks']} chunks deleted)")
         logger.info(f"Processing time: {stats['processing_time']:.2f} seconds")
+        embedding = stats['embedding']
+        logger.info(f"Embedding: {embedding['texts_per_second']:.1f} chunks/s in {embedding['batches']} batches, "
+                    f"padding ratio {embedding['padding_ratio']:.2f}, "
+                    f"peak RSS {embedding['peak_rss_bytes'] / 2**20:.0f} MiB")
+        for stage, stage_stats in stats.get('stages', {}).items():
+            logger.info(f"Stage {stage}: {stage_stats['chunks_per_second']:.1f} chunks/s, "
+                        f"utilization {stage_stats['utilization']:.0%} over {stage_stats['workers']} workers, "
+                        f"blocked {stage_stats['blocked_seconds']:.1f}s")
+        if 'embedding_cache' in stats:
+            cache = stats['embedding_cache']
+            logger.info(f"Embedding cache: {cache['hits']} hits, {cache['misses']} encoded "
+                        f"({cache['hit_rate']:.0%} hit rate), {cache['evictions']} evicted, "
+                        f"{cache['bytes'] / 2**20:.0f} MiB stored")
+        database = stats['database']
+        logger.info(f"Database: {database['rows']} rows upserted at {database['rows_per_second']:.0f} rows/s "
+                    f"({database['mode']}, {database['batches']} batches)")
         
         if stats['errors']:
             logger.warning(f"Errors encountered: {len(stats['errors'])}")
@@ -0,0 +1,210 @@
+"""
+Staged RAG query pipeline
+FinTwin AI Financial Twin - Retrieval Layer
+
+Runs embed -> search -> assemble context -> generate exactly once per query
+and records how long each stage took. After the embed stage the service's
+semantic answer cache is consulted; a hit skips the remaining stages. The
+context stage de-duplicates the retrieved chunks and fits them to a token
+budget; a result's sources are the chunks that made it into the context.
+"""
+
+import asyncio
+import time
+import numpy as np
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from answer_cache import cache_scope
+from context_assembler import AssembledContext
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RAGResult:
+    """Answer, sources, per-stage timings (milliseconds) and context token stats for one query"""
+    query: str
+    response: str
+    sources: List[Dict[str, Any]]
+    timings: Dict[str, float] = field(default_factory=dict)
+    cached: bool = False
+    context: Dict[str, int] = field(default_factory=dict)
+
+
+class RAGPipeline:
+    """
+    Single-pass RAG pipeline over a RAGService's models and index
+    """
+
+    STAGES = ('embed', 'answer_cache', 'search', 'assemble_context', 'generate')
+
+    def __init__(self, service):
+        self.service = service
+
+    def embed(self, query: str) -> np.ndarray:
+        """Encode the query (served from the query cache when possible)"""
+        return self.service.generate_embeddings([query], use_cache=True)[0]
+
+    def search(self, query_embedding: np.ndarray, k: int,
+               filters: Optional[Dict[str, Any]] = None,
+               query: Optional[str] = None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Retrieve the k best chunks matching the metadata filters (hybrid when query is given), with their vectors"""
+        results, vectors = self.service._search_similar_documents_batch(
+            np.asarray(query_embedding).reshape(1, -1), k, filters, None if query is None else [query],
+            return_vectors=True
+        )
+        return results[0], vectors[0]
+
+    def assemble_context(self, query: str, sources: List[Dict[str, Any]],
+                         chunk_embeddings: Optional[np.ndarray] = None) -> AssembledContext:
+        """Build the LLM context from retrieved chunks"""
+        return self.service.build_context(sources, query, chunk_embeddings)
+
+    def generate(self, query: str, context: str) -> str:
+        """Generate the answer from the query and assembled context"""
+        return self.service.llm_model.generate(query, context)
+
+    def search_batch(self, query_embeddings: np.ndarray, k: int,
+                     filters: Optional[Dict[str, Any]] = None,
+                     queries: Optional[List[str]] = None) -> Tuple[List[List[Dict[str, Any]]], List[np.ndarray]]:
+        """Retrieve the k best chunks for every query with one matrix-matrix search, with their vectors"""
+        return self.service._search_similar_documents_batch(query_embeddings, k, filters, queries,
+                                                            return_vectors=True)
+
+    def run(self, query: str, k: int = 5, filters: Optional[Dict[str, Any]] = None) -> RAGResult:
+        """
+        Answer a query with one encode and one search
+
+        Args:
+            query: User question
+            k: Number of chunks to retrieve and use as context
+            filters: Optional metadata filters restricting the retrieved chunks
+
+        Returns:
+            RAGResult with the answer, sources and stage timings
+        """
+        if not query.strip():
+            raise ValueError("Query cannot be empty")
+
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        query_embedding = self.embed(query)
+        timings['embed'] = (time.perf_counter() - start) * 1000
+        return self._complete(query, query_embedding, k, timings, filters)
+
+    def run_batch(self, queries: List[str], k: int = 5,
+                  filters: Optional[Dict[str, Any]] = None) -> List[RAGResult]:
+        """
+        Answer several queries with one encoder call and one search
+
+        The embed, answer_cache and search timings of each result are those of
+        the whole batch; assemble_context and generate are per query.
+
+        Args:
+            queries: User questions
+            k: Number of chunks to retrieve and use as context per query
+            filters: Optional metadata filters shared by every query
+
+        Returns:
+            One RAGResult per query, in order
+        """
+        if not queries:
+            return []
+        if any(not query.strip() for query in queries):
+            raise ValueError("Query cannot be empty")
+
+        timings: Dict[str, float] = {}
+
+        def timed(stage: str, fn, *args):
+            start = time.perf_counter()
+            result = fn(*args)
+            timings[stage] = (time.perf_counter() - start) * 1000
+            return result
+
+        query_embeddings = timed('embed', self.service.generate_embeddings, queries, True)
+
+        answer_cache = self.service.answer_cache
+        scope = cache_scope(k, filters, self.service.corpus_generation)
+        cached = timed('answer_cache', lambda: [answer_cache.get(qe, scope) for qe in query_embeddings])
+        missing = [i for i, answer in enumerate(cached) if answer is None]
+        sources, vectors = {}, {}
+        if missing:
+            found, found_vectors = timed('search', self.search_batch, query_embeddings[missing], k, filters,
+                                         [queries[i] for i in missing])
+            sources = dict(zip(missing, found))
+            vectors = dict(zip(missing, found_vectors))
+
+        results = []
+        for i, query in enumerate(queries):
+            query_timings = dict(timings)
+            if cached[i] is not None:
+                query_timings['total'] = sum(query_timings.get(stage, 0.0) for stage in self.STAGES)
+                results.append(RAGResult(query=query, response=cached[i].response, sources=cached[i].sources,
+                                         timings=query_timings, cached=True))
+                continue
+
+            start = time.perf_counter()
+            context = self.assemble_context(query, sources[i], vectors[i])
+            query_timings['assemble_context'] = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            response = self.generate(query, context.text)
+            query_timings['generate'] = (time.perf_counter() - start) * 1000
+            query_timings['total'] = sum(query_timings.get(stage, 0.0) for stage in self.STAGES)
+
+            answer_cache.put(query_embeddings[i], response, context.sources, scope)
+            results.append(RAGResult(query=query, response=response, sources=context.sources,
+                                     timings=query_timings, context=context.stats()))
+        return results
+
+    async def run_async(self, query: str, k: int = 5, executor: Optional[Executor] = None,
+                        filters: Optional[Dict[str, Any]] = None) -> RAGResult:
+        """
+        Like run, but the embed stage goes through the service's micro-batcher
+
+        Args:
+            query: User question
+            k: Number of chunks to retrieve and use as context
+            executor: Executor for the blocking search/generate stages; the
+                loop's default executor if None
+            filters: Optional metadata filters restricting the retrieved chunks
+        """
+        if not query.strip():
+            raise ValueError("Query cannot be empty")
+
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        query_embedding = await self.service.embed_query_async(query)
+        timings['embed'] = (time.perf_counter() - start) * 1000
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self._complete, query, query_embedding, k, timings, filters)
+
+    def _complete(self, query: str, query_embedding: np.ndarray, k: int,
+                  timings: Dict[str, float], filters: Optional[Dict[str, Any]] = None) -> RAGResult:
+        """Serve from the answer cache, or run the search, context and generation stages"""
+
+        def timed(stage: str, fn, *args):
+            start = time.perf_counter()
+            result = fn(*args)
+            timings[stage] = (time.perf_counter() - start) * 1000
+            return result
+
+        answer_cache = self.service.answer_cache
+        scope = cache_scope(k, filters, self.service.corpus_generation)
+        cached = timed('answer_cache', answer_cache.get, query_embedding, scope)
+        if cached is not None:
+            timings['total'] = sum(timings.get(stage, 0.0) for stage in self.STAGES)
+            return RAGResult(query=query, response=cached.response, sources=cached.sources,
+                             timings=timings, cached=True)
+
+        sources, vectors = timed('search', self.search, query_embedding, k, filters, query)
+        context = timed('assemble_context', self.assemble_context, query, sources, vectors)
+        response = timed('generate', self.generate, query, context.text)
+        timings['total'] = sum(timings[stage] for stage in self.STAGES)
+
+        answer_cache.put(query_embedding, response, context.sources, scope)
+        return RAGResult(query=query, response=response, sources=context.sources, timings=timings,
+                         context=context.stats())
@@ -1,27 +1,137 @@
 import numpy as np
-import pandas as pd
-from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Any, Optional
 import logging
 import os
 import json
+import threading
+import weakref
+from concurrent.futures import Executor
 from datetime import datetime
 
+from vector_index import VectorIndex
+from ann_index import IVFIndex
+from quantization import QuantizedIndex, QUANTIZERS
+from sharded_index import ShardedIndex
+from index_snapshot import write_snapshot, read_snapshot, read_projection, current_snapshot
+from dimension_reduction import PROJECTIONS, projection_version
+from embedding_cache import EmbeddingCache
+from chunk_embedding_cache import ChunkEmbeddingCache
+from embedding_batcher import EmbeddingBatcher
+from embedding_backends import EMBEDDING_BACKENDS, create_backend
+from context_assembler import ContextAssembler, AssembledContext
+from answer_cache import SemanticAnswerCache
+from chunk_store import ChunkStore
+from lexical_index import reciprocal_rank_fusion
+from text_chunker import iter_chunks
+from rag_pipeline import RAGPipeline, RAGResult
+from micro_batcher import MicroBatcher
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sample queries encoded once after loading so the first real request is not slow
+WARMUP_QUERIES = [
+    "How can I save tax under section 80C?",
+    "What is a SIP in mutual funds?",
+    "When is the GSTR-3B filing due?",
+    "How much should I keep in an emergency fund?",
+]
+
+# Vector index implementations selectable via RAGService(index_type=...)
+INDEX_TYPES = {
+    'exact': VectorIndex,
+    'ivf': IVFIndex,
+    'quantized': QuantizedIndex,
+    'sharded': ShardedIndex,
+}
+
 class RAGService:
-    def __init__(self):
+    # Hybrid retrieval: each ranker contributes HYBRID_CANDIDATES * k candidates to RRF
+    HYBRID_CANDIDATES = 4
+    RRF_K = 60
+    
+    def __init__(self,
+                 index_type: str = 'exact',
+                 index_params: Optional[Dict[str, Any]] = None,
+                 query_cache_params: Optional[Dict[str, Any]] = None,
+                 batcher_params: Optional[Dict[str, Any]] = None,
+                 load_models: bool = True,
+                 hybrid: bool = True,
+                 lexical_params: Optional[Dict[str, Any]] = None,
+                 answer_cache_params: Optional[Dict[str, Any]] = None,
+                 compaction_threshold: Optional[float] = 0.2,
+                 embedding_batch_params: Optional[Dict[str, Any]] = None,
+                 reduction_params: Optional[Dict[str, Any]] = None,
+                 embedding_backend: str = 'sentence-transformers',
+                 embedding_backend_params: Optional[Dict[str, Any]] = None,
+                 context_params: Optional[Dict[str, Any]] = None,
+                 chunk_cache_params: Optional[Dict[str, Any]] = None):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {embedding_backend}")
+        if reduction_params and reduction_params.get('method') not in PROJECTIONS:
+            raise ValueError(f"Unknown reduction method: {reduction_params.get('method')}")
+        
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        self.snapshot_version = None
+        self.query_cache = EmbeddingCache(**(query_cache_params or {}))
+        self.answer_cache = SemanticAnswerCache(**(answer_cache_params or {}))
+        self.pipeline = RAGPipeline(self)
+        self.query_batcher = MicroBatcher(self._encode_batch, **(batcher_params or {}))
+        self.document_batcher = EmbeddingBatcher(self._encode_batch, **(embedding_batch_params or {}))
+        self.context_assembler = ContextAssembler(**(context_params or {}))
         self.embedding_model = None
-        self.vector_store = None
+        self.vector_store = INDEX_TYPES[index_type](**self.index_params)
         self.llm_model = None
-        self.initialize_models()
+        
+        # Document map, metadata and BM25 indexes per vector index, caught up
+        # lazily, so a swapped-in index (snapshot load, compaction) gets its own
+        self.hybrid = hybrid
+        self.lexical_params = lexical_params or {}
+        self._chunk_stores: 'weakref.WeakKeyDictionary[VectorIndex, ChunkStore]' = weakref.WeakKeyDictionary()
+        self._chunk_stores_lock = threading.Lock()
+        
+        # Writers (store/update/delete/compact) are serialized; queries never take this lock
+        self.compaction_threshold = compaction_threshold
+        self.compactions = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._write_lock = threading.RLock()
+        
+        # Bumped once stored documents are searchable; part of the answer cache scope
+        self.corpus_generation = 0
+        
+        # Optional dimensionality reduction, {'method': 'pca' | 'truncate', 'dimensions': N,
+        # 'train_size': M}; PCA is fitted once train_size chunks are stored
+        self.reduction_params = dict(reduction_params or {})
+        if self.reduction_params.get('method') == 'truncate':
+            self._chunk_store(self.vector_store).projection = self._new_projection()
+        
+        # Encoder chosen by config; constructed now, loaded by initialize_models
+        self.embedding_backend = create_backend(embedding_backend, **(embedding_backend_params or {}))
+        
+        # Model metadata cached at load time so probes never touch the models
+        self.model_name = self.embedding_backend.name
+        
+        # Optional persistent content-hash -> embedding cache for document chunks
+        self.chunk_cache = (ChunkEmbeddingCache(model_name=self.model_name, **chunk_cache_params)
+                            if chunk_cache_params is not None else None)
+        self.embedding_dimension = None
+        self.ready = False
+        
+        if load_models:
+            self.initialize_models()
     
-    def initialize_models(self):
-        """Initialize embedding and LLM models"""
+    def initialize_models(self, warm_up: bool = False):
+        """Initialize embedding and LLM models, optionally running a warm-up batch"""
         try:
-            # Initialize sentence transformer for embeddings
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            # Initialize the configured embedding backend
+            self.embedding_backend.load()
+            self.embedding_model = self.embedding_backend
+            self.embedding_dimension = self.embedding_backend.dimension
+            if self.embedding_backend.max_seq_length and self.document_batcher.max_tokens is None:
+                self.document_batcher.max_tokens = self.embedding_backend.max_seq_length
             logger.info("Embedding model initialized successfully")
             
             # Initialize LLM model (placeholder for local model)
@@ -29,10 +139,21 @@ class RAGService:
             self.llm_model = self._initialize_llm()
             logger.info("LLM model initialized successfully")
             
+            if warm_up:
+                self.warm_up()
+            self.ready = True
+            
         except Exception as e:
             logger.error(f"Error initializing models: {e}")
             raise
     
+    def warm_up(self):
+        """Run one encode batch and one generation so lazy model initialization happens now"""
+        embeddings = self.generate_embeddings(WARMUP_QUERIES)
+        self.embedding_dimension = int(embeddings.shape[1])
+        self.llm_model.generate(WARMUP_QUERIES[0], "warm-up context")
+        logger.info(f"Warm-up complete ({len(WARMUP_QUERIES)} queries, {self.embedding_dimension} dims)")
+    
     def _initialize_llm(self):
         """Initialize local LLM model"""
         # Placeholder for local LLM initialization
@@ -49,60 +170,69 @@ class RAGService:
         return MockLLM()
     
     def chunk_document(self, document: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
-        """Split document into overlapping chunks"""
+        """Split document into overlapping chunks, ending them at sentence boundaries where possible"""
         if len(document) <= chunk_size:
             return [document]
         
-        chunks = []
-        start = 0
-        
-        while start < len(document):
-            end = start + chunk_size
-            
-            # Try to break at sentence boundary
-            if end < len(document):
-                # Look for sentence endings
-                for i in range(end, max(start + chunk_size - 100, start), -1):
-                    if document[i] in '.!?':
-                        end = i + 1
-                        break
-            
-            chunk = document[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-            
-            start = end - overlap
-        
-        return chunks
+        return [chunk.text for chunk in iter_chunks(document, chunk_size, overlap)]
     
-    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Generate embeddings for a list of texts"""
+    def generate_embeddings(self, texts: List[str], use_cache: bool = False) -> np.ndarray:
+        """Generate embeddings for a list of texts, optionally via the query cache"""
         if not texts:
             return np.array([])
         
         try:
-            embeddings = self.embedding_model.encode(texts, convert_to_tensor=False)
-            return embeddings
+            if not use_cache:
+                # Length-sorted, token-budgeted batches, returned in input order;
+                # chunks already in the chunk cache are not re-encoded
+                if self.chunk_cache is not None:
+                    return self.chunk_cache.encode(texts, self.document_batcher.encode)
+                return self.document_batcher.encode(texts)
+            
+            cached = [self.query_cache.get(text) for text in texts]
+            missing = [i for i, embedding in enumerate(cached) if embedding is None]
+            if missing:
+                # Only cache misses reach the encoder, in a single batch
+                encoded = self.embedding_model.encode([texts[i] for i in missing], convert_to_tensor=False)
+                for i, embedding in zip(missing, encoded):
+                    self.query_cache.put(texts[i], embedding)
+                    cached[i] = embedding
+            
+            return np.vstack(cached)
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             raise
     
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Blocking encoder call used by the query micro-batcher"""
+        return self.embedding_model.encode(texts, convert_to_tensor=False)
+    
+    async def embed_query_async(self, query: str) -> np.ndarray:
+        """Embed a query, coalescing concurrent cache misses into batched encodes"""
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = await self.query_batcher.submit(query)
+            self.query_cache.put(query, embedding)
+        return embedding
+    
     def store_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
-        """Store documents in vector database"""
+        """Store documents in vector database, replacing any earlier version of each"""
         try:
             # Extract text content and metadata
             texts = []
             metadatas = []
+            document_ids = []
             
             for doc in documents:
-                # Chunk the document
+                # Chunk the document; chunk numbers restart for every document
                 chunks = self.chunk_document(doc['content'])
                 
-                for chunk in chunks:
+                for chunk_index, chunk in enumerate(chunks):
                     texts.append(chunk)
+                    document_ids.append(f"{doc['id']}_chunk_{chunk_index}")
                     metadatas.append({
                         'document_id': doc['id'],
-                        'chunk_index': len(texts) - 1,
+                        'chunk_index': chunk_index,
                         'metadata': doc.get('metadata', {}),
                         'created_at': datetime.now().isoformat()
                     })
@@ -110,15 +240,24 @@ class RAGService:
             # Generate embeddings
             embeddings = self.generate_embeddings(texts)
             
-            # Store in vector database (placeholder)
-            # In production, this would store in pgvector or similar
-            document_ids = []
-            for i, (text, metadata, embedding) in enumerate(zip(texts, metadatas, embeddings)):
-                doc_id = f"{metadata['document_id']}_chunk_{i}"
-                document_ids.append(doc_id)
+            with self._write_lock:
+                index = self.vector_store
+                chunk_store = self._chunk_store(index)
+                replaced = [slot for doc in documents for slot in chunk_store.pop_document(doc['id'])]
+                
+                # Store in the in-memory vector index, then the chunk store; earlier
+                # versions are tombstoned only once the new chunks are searchable
+                index.add(document_ids, texts, chunk_store.project(embeddings), metadatas)
+                chunk_store.sync(index)
+                self._delete_slots(index, replaced)
+                self.corpus_generation += 1
                 
-                # Store in database (placeholder)
-                self._store_embedding(doc_id, text, metadata, embedding)
+                if (self.reduction_params.get('method') == 'pca' and chunk_store.projection is None and
+                        index.num_live >= self.reduction_params.get('train_size', 10000)):
+                    self.fit_projection()
+            
+            if replaced:
+                self.answer_cache.invalidate_documents([doc['id'] for doc in documents])
             
             logger.info(f"Stored {len(document_ids)} document chunks")
             return document_ids
@@ -127,21 +266,19 @@ class RAGService:
             logger.error(f"Error storing documents: {e}")
             raise
     
-    def _store_embedding(self, doc_id: str, text: str, metadata: Dict, embedding: np.ndarray):
-        """Store embedding in database (placeholder)"""
-        # In production, this would store in PostgreSQL with pgvector
-        # For now, we'll just log the storage
-        logger.info(f"Storing embedding for document {doc_id}")
-    
-    def retrieve_relevant_documents(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Retrieve relevant documents for a query"""
+    def retrieve_relevant_documents(self, query: str, k: int = 5,
+                                    filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Retrieve relevant documents for a query, optionally restricted by metadata filters"""
+        if not query.strip():
+            raise ValueError("Query cannot be empty")
+        
         try:
             # Generate query embedding
-            query_embedding = self.generate_embeddings([query])[0]
+            query_embedding = self.generate_embeddings([query], use_cache=True)[0]
             
             # Search for similar documents (placeholder)
             # In production, this would use vector similarity search
-            similar_docs = self._search_similar_documents(query_embedding, k)
+            similar_docs = self._search_similar_documents(query_embedding, k, filters, query)
             
             return similar_docs
             
@@ -149,30 +286,223 @@ class RAGService:
             logger.error(f"Error retrieving documents: {e}")
             raise
     
-    def _search_similar_documents(self, query_embedding: np.ndarray, k: int) -> List[Dict[str, Any]]:
-        """Search for similar documents (placeholder)"""
-        # In production, this would use vector similarity search in pgvector
-        # For now, return mock results
-        mock_docs = [
-            {
-                'content': 'Sample financial document content about tax planning',
-                'metadata': {'type': 'tax_guide', 'year': '2023'},
-                'similarity_score': 0.95
-            },
-            {
-                'content': 'Investment strategies for long-term wealth building',
-                'metadata': {'type': 'investment', 'year': '2023'},
-                'similarity_score': 0.87
-            }
-        ]
+    def _search_similar_documents(self, query_embedding: np.ndarray, k: int,
+                                  filters: Optional[Dict[str, Any]] = None,
+                                  query: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Search for the k best chunks matching the filters
+        
+        With hybrid retrieval and the query text available, vector and BM25
+        candidates are merged with reciprocal rank fusion; otherwise this is
+        a plain vector search.
+        """
+        return self._search_similar_documents_batch(
+            np.asarray(query_embedding).reshape(1, -1), k, filters, None if query is None else [query]
+        )[0]
+    
+    def _search_similar_documents_batch(self, query_embeddings: np.ndarray, k: int,
+                                        filters: Optional[Dict[str, Any]] = None,
+                                        queries: Optional[List[str]] = None,
+                                        return_vectors: bool = False):
+        """
+        Search for the k best chunks of several queries sharing the same filters
+        
+        The vector side is one matrix-matrix search over all queries; with
+        hybrid retrieval each query's BM25 hits are then fused with its
+        vector hits.
+        
+        Returns:
+            One result list per query; with return_vectors, also one matrix
+            per query holding the index vectors of its results
+        """
+        index = self.vector_store
+        hybrid = self.hybrid and queries is not None and any(queries)
+        chunk_store = self._chunk_store(index)
+        query_embeddings = chunk_store.project(query_embeddings)
+        mask = chunk_store.metadata_index.mask(filters, len(index)) if filters else None
+        
+        if not hybrid:
+            all_hits = self._vector_hits(index, query_embeddings, k, mask)
+        else:
+            candidates = self.HYBRID_CANDIDATES * k
+            lexical_mask = index._effective_mask(mask)
+            all_hits = []
+            for query_embedding, query, vector_hits in zip(
+                    query_embeddings, queries, self._vector_hits(index, query_embeddings, candidates, mask)):
+                if not query:
+                    all_hits.append(vector_hits[:k])
+                    continue
+                lexical_hits = chunk_store.lexical_index.search(query, candidates, mask=lexical_mask)
+                
+                fused = reciprocal_rank_fusion(
+                    [[slot for slot, _ in vector_hits], [slot for slot, _ in lexical_hits]], k=self.RRF_K
+                )[:k]
+                similarity = dict(vector_hits)
+                lexical_only = [slot for slot, _ in fused if slot not in similarity]
+                if lexical_only:
+                    # Exact cosine for chunks only the lexical ranker found
+                    similarity.update(index.search_slots(query_embedding, len(lexical_only), lexical_only))
+                all_hits.append([(slot, similarity[slot]) for slot, _ in fused])
+        
+        all_results = [[self._source(index, slot, score) for slot, score in hits] for hits in all_hits]
+        
+        if return_vectors:
+            # Copied now: a compaction may swap the index before the caller uses them
+            all_vectors = [index.vectors[[slot for slot, _ in hits]] for hits in all_hits]
+            return all_results, all_vectors
+        return all_results
+    
+    @staticmethod
+    def _source(index, slot: int, score: float) -> Dict[str, Any]:
+        """A retrieved chunk as returned to callers, with the document's own metadata"""
+        stored = index.metadatas[slot]
+        return {
+            'id': index.ids[slot],
+            'document_id': stored.get('document_id'),
+            'content': index.texts[slot],
+            'metadata': stored.get('metadata', {}),
+            'similarity_score': score
+        }
+    
+    @staticmethod
+    def _vector_hits(index, query_embeddings: np.ndarray, k: int, mask: Optional[np.ndarray]):
+        """Vector search hits per query; a lone query takes the index's single-query path"""
+        if len(query_embeddings) == 1:
+            return [index.search(query_embeddings[0], k, mask=mask)]
+        return index.search_batch(query_embeddings, k, mask=mask)
+    
+    def _chunk_store(self, index, sync: bool = True) -> ChunkStore:
+        """The index's chunk store, caught up with every chunk added to the index unless sync is False"""
+        with self._chunk_stores_lock:
+            chunk_store = self._chunk_stores.get(index)
+            if chunk_store is None:
+                chunk_store = self._chunk_stores[index] = ChunkStore(self.lexical_params)
+        if sync:
+            chunk_store.sync(index)
+        return chunk_store
+    
+    @property
+    def metadata_index(self):
+        return self._chunk_store(self.vector_store).metadata_index
+    
+    @property
+    def lexical_index(self):
+        return self._chunk_store(self.vector_store).lexical_index
+    
+    def _build_index(self, ids: List[str], texts: List[str], vectors: np.ndarray,
+                     metadatas: List[Dict[str, Any]]) -> VectorIndex:
+        """A fresh index of the configured type holding the given chunks"""
+        index = INDEX_TYPES[self.index_type](**self.index_params)
+        if ids:
+            index.add(ids, texts, vectors, metadatas)
+        return index
+    
+    def _rebuild_live(self, index, transform=None) -> VectorIndex:
+        """A fresh index holding the live chunks of index, optionally with their vectors transformed"""
+        live = index.live_mask()
+        slots = np.arange(len(index)) if live is None else np.flatnonzero(live)
+        vectors = index.vectors[slots]
+        return self._build_index([index.ids[slot] for slot in slots],
+                                 [index.texts[slot] for slot in slots],
+                                 vectors if transform is None else transform(vectors),
+                                 [index.metadatas[slot] for slot in slots])
+    
+    def _new_projection(self):
+        """An untrained projection as configured by reduction_params"""
+        return PROJECTIONS[self.reduction_params['method']](self.reduction_params.get('dimensions', 128))
+    
+    def fit_projection(self, sample: Optional[np.ndarray] = None):
+        """
+        Fit the configured projection and rebuild the index in the reduced space
+        
+        Args:
+            sample: Full-dimension training embeddings; defaults to up to
+                train_size live chunks of the current index
+        """
+        if not self.reduction_params:
+            raise ValueError("No dimensionality reduction configured")
         
-        return mock_docs[:k]
+        with self._write_lock:
+            index = self.vector_store
+            if self._chunk_store(index).projection is not None:
+                raise ValueError("Index vectors are already projected")
+            
+            projection = self._new_projection()
+            if sample is None:
+                live = index.live_mask()
+                slots = np.arange(len(index)) if live is None else np.flatnonzero(live)
+                train_size = self.reduction_params.get('train_size', 10000)
+                if len(slots) > train_size:
+                    slots = np.sort(np.random.default_rng(0).choice(slots, train_size, replace=False))
+                sample = index.vectors[slots]
+            projection.train(sample)
+            
+            projected = self._rebuild_live(index, projection.transform)
+            self._chunk_store(projected).projection = projection
+            self.vector_store = projected
+            self.answer_cache.clear()
+            logger.info(f"Projected {len(projected)} chunks to {projection.dimensions} dimensions ({projection.method})")
+    
+    def _delete_slots(self, index, slots: List[int]):
+        """Tombstone row slots, scheduling a compaction once enough rows are dead"""
+        if not slots:
+            return
+        index.delete(slots)
+        if (self.compaction_threshold is not None and
+                index.num_deleted > self.compaction_threshold * len(index)):
+            self.compact(background=True)
+    
+    def compact(self, background: bool = False) -> Optional[threading.Thread]:
+        """
+        Rebuild the vector index from its live chunks, dropping tombstoned rows
+        
+        Ingestion waits while the new index is built; queries keep running on
+        the old one until it is swapped in with a single reference assignment.
+        
+        Args:
+            background: Run on a daemon thread (at most one at a time) and return it
+        """
+        if not background:
+            self._compact()
+            return None
+        
+        with self._write_lock:
+            if self._compaction_thread is None or not self._compaction_thread.is_alive():
+                self._compaction_thread = threading.Thread(target=self._compact, name='rag-compaction', daemon=True)
+                self._compaction_thread.start()
+            return self._compaction_thread
+    
+    def _compact(self):
+        try:
+            with self._write_lock:
+                index = self.vector_store
+                if index.live_mask() is None:
+                    return
+                
+                compacted = self._rebuild_live(index)
+                self._chunk_store(compacted).projection = self._chunk_store(index).projection
+                self.vector_store = compacted
+                self.compactions += 1
+                logger.info(f"Compacted index: dropped {index.num_deleted} deleted chunks, kept {len(compacted)}")
+        except Exception as e:
+            logger.error(f"Error compacting index: {e}")
+            raise
+    
+    def build_context(self, context_docs: List[Dict[str, Any]], query: Optional[str] = None,
+                      chunk_embeddings: Optional[np.ndarray] = None) -> AssembledContext:
+        """De-duplicate retrieved chunks and fit them to the context token budget"""
+        return self.context_assembler.assemble(context_docs, query, chunk_embeddings)
+    
+    def assemble_context(self, context_docs: List[Dict[str, Any]], query: Optional[str] = None,
+                         chunk_embeddings: Optional[np.ndarray] = None) -> str:
+        """Build the LLM context text from retrieved chunks"""
+        return self.build_context(context_docs, query, chunk_embeddings).text
     
     def generate_response(self, query: str, context_docs: List[Dict[str, Any]]) -> str:
         """Generate response using RAG"""
         try:
             # Prepare context from retrieved documents
-            context = "\n\n".join([doc['content'] for doc in context_docs])
+            context = self.assemble_context(context_docs, query)
             
             # Generate response using LLM
             response = self.llm_model.generate(query, context)
@@ -183,70 +513,159 @@ class RAGService:
             logger.error(f"Error generating response: {e}")
             raise
     
-    def rag_pipeline(self, query: str) -> str:
-        """Complete RAG pipeline: retrieve + generate"""
+    def run_pipeline(self, query: str, k: int = 5, filters: Optional[Dict[str, Any]] = None) -> RAGResult:
+        """Answer a query in one pass, returning response, sources and stage timings"""
         try:
-            # Retrieve relevant documents
-            relevant_docs = self.retrieve_relevant_documents(query)
-            
-            # Generate response
-            response = self.generate_response(query, relevant_docs)
-            
-            return response
-            
+            return self.pipeline.run(query, k, filters)
+        except Exception as e:
+            logger.error(f"Error in RAG pipeline: {e}")
+            raise
+    
+    def run_pipeline_batch(self, queries: List[str], k: int = 5,
+                           filters: Optional[Dict[str, Any]] = None) -> List[RAGResult]:
+        """Answer several queries with one encoder call and one matrix-matrix search"""
+        try:
+            return self.pipeline.run_batch(queries, k, filters)
+        except Exception as e:
+            logger.error(f"Error in batch RAG pipeline: {e}")
+            raise
+    
+    async def run_pipeline_async(self, query: str, k: int = 5, executor: Optional[Executor] = None,
+                                 filters: Optional[Dict[str, Any]] = None) -> RAGResult:
+        """Async variant of run_pipeline whose embed stage is micro-batched"""
+        try:
+            return await self.pipeline.run_async(query, k, executor, filters)
         except Exception as e:
             logger.error(f"Error in RAG pipeline: {e}")
             raise
     
-    def load_embeddings(self, filepath: str) -> np.ndarray:
-        """Load embeddings from file"""
+    def rag_pipeline(self, query: str, k: int = 5) -> str:
+        """Complete RAG pipeline: retrieve + generate"""
+        return self.run_pipeline(query, k).response
+    
+    def load_embeddings(self, filepath: str, mmap: bool = False) -> np.ndarray:
+        """Load embeddings from file, decoding quantized archives"""
         try:
-            embeddings = np.load(filepath)
+            # mmap keeps .npy arrays on disk, paged in on demand and shared across processes
+            embeddings = np.load(filepath, mmap_mode='r') if mmap else np.load(filepath)
+            if isinstance(embeddings, np.lib.npyio.NpzFile):
+                with embeddings as archive:
+                    quantizer = QUANTIZERS[str(archive['quantization'])]()
+                    quantizer.set_state(archive)
+                    embeddings = quantizer.decode(archive['codes'])
             logger.info(f"Loaded embeddings from {filepath}")
             return embeddings
         except Exception as e:
             logger.error(f"Error loading embeddings: {e}")
             raise
     
-    def save_embeddings(self, embeddings: np.ndarray, filepath: str):
-        """Save embeddings to file"""
+    def save_embeddings(self, embeddings: np.ndarray, filepath: str, quantization: Optional[str] = None):
+        """Save embeddings to file, optionally as 'int8' or 'pq' codes (.npz)"""
         try:
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            np.save(filepath, embeddings)
+            if quantization is None:
+                np.save(filepath, embeddings)
+            else:
+                quantizer = QUANTIZERS[quantization]()
+                vectors = np.asarray(embeddings, dtype=np.float32)
+                quantizer.train(vectors)
+                np.savez(filepath, quantization=np.array(quantization),
+                         codes=quantizer.encode(vectors), **quantizer.get_state())
             logger.info(f"Saved embeddings to {filepath}")
         except Exception as e:
             logger.error(f"Error saving embeddings: {e}")
             raise
     
+    def save_snapshot(self, root_dir: str) -> str:
+        """Publish the current index (compacted first if it has deletions) as a new memory-mappable snapshot"""
+        try:
+            with self._write_lock:
+                if self.vector_store.num_deleted:
+                    self.compact()
+                index = self.vector_store
+                path = write_snapshot(index, root_dir, index_type=self.index_type,
+                                      projection=self._chunk_store(index).projection)
+            self.snapshot_version = os.path.basename(path)
+            return path
+        except Exception as e:
+            logger.error(f"Error saving snapshot: {e}")
+            raise
+    
+    def load_snapshot(self, root_dir: str, version: Optional[str] = None) -> str:
+        """Open a snapshot (default: CURRENT) and swap it in as the live index"""
+        try:
+            version = version or current_snapshot(root_dir)
+            if version is None:
+                raise FileNotFoundError(f"No snapshot published in {root_dir}")
+            
+            index = read_snapshot(os.path.join(root_dir, version))
+            projection = read_projection(os.path.join(root_dir, version))
+            if self.index_type != 'exact':
+                # Approximate/quantized structures are rebuilt from the mapped vectors
+                index = self._build_index(list(index.ids), list(index.texts), index.vectors, list(index.metadatas))
+            
+            # Queries go through the projection the snapshot's vectors were built with;
+            # metadata and BM25 indexes catch up lazily, keeping the load in milliseconds
+            self._chunk_store(index, sync=False).projection = projection
+            
+            # A single reference assignment, so in-flight queries finish on the old index
+            with self._write_lock:
+                self.vector_store = index
+            self.answer_cache.clear()
+            self.snapshot_version = version
+            logger.info(f"Loaded snapshot {version} with {len(index)} chunks")
+            return version
+        except Exception as e:
+            logger.error(f"Error loading snapshot: {e}")
+            raise
+    
+    def refresh_snapshot(self, root_dir: str) -> bool:
+        """Swap to the CURRENT snapshot if it is newer than the loaded one"""
+        version = current_snapshot(root_dir)
+        if version is None or version == self.snapshot_version:
+            return False
+        self.load_snapshot(root_dir, version)
+        return True
+    
     def get_embedding_dimensions(self) -> int:
         """Get the dimension of embeddings"""
         if self.embedding_model is None:
             raise ValueError("Embedding model not initialized")
         
-        # Get embedding dimension from the model
-        test_embedding = self.embedding_model.encode(["test"])
-        return test_embedding.shape[1]
+        # Computed once, then served from the cached model metadata
+        if self.embedding_dimension is None:
+            test_embedding = self.embedding_model.encode(["test"])
+            self.embedding_dimension = int(test_embedding.shape[1])
+        return self.embedding_dimension
     
-    def batch_process_documents(self, documents: List[Dict[str, Any]], batch_size: int = 10) -> List[str]:
-        """Process documents in batches for better performance"""
+    def batch_process_documents(self, documents: List[Dict[str, Any]], batch_size: int = 10,
+                                max_batch_chars: int = 4 * 1024 * 1024) -> List[str]:
+        """Process documents in batches of at most batch_size documents and max_batch_chars characters"""
         all_document_ids = []
+        batch: List[Dict[str, Any]] = []
+        batch_chars = 0
+        num_batches = 0
         
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            batch_ids = self.store_documents(batch)
-            all_document_ids.extend(batch_ids)
+        for i, doc in enumerate(documents):
+            batch.append(doc)
+            batch_chars += len(doc['content'])
+            next_chars = len(documents[i + 1]['content']) if i + 1 < len(documents) else 0
+            if i + 1 < len(documents) and len(batch) < batch_size and batch_chars + next_chars <= max_batch_chars:
+                continue
             
-            logger.info(f"Processed batch {i//batch_size + 1}/{(len(documents) + batch_size - 1)//batch_size}")
+            all_document_ids.extend(self.store_documents(batch))
+            num_batches += 1
+            logger.info(f"Processed batch {num_batches} ({len(batch)} documents, {batch_chars} chars, "
+                        f"{i + 1}/{len(documents)} documents done)")
+            batch, batch_chars = [], 0
         
         return all_document_ids
     
     def update_document(self, document_id: str, new_content: str, metadata: Dict[str, Any]):
         """Update an existing document"""
         try:
-            # Remove old chunks
-            self._remove_document_chunks(document_id)
-            
-            # Store new content
+            # Store new content; store_documents tombstones the old chunks once
+            # the new ones are searchable
             new_doc = {
                 'id': document_id,
                 'content': new_content,
@@ -260,15 +679,20 @@ class RAGService:
             logger.error(f"Error updating document: {e}")
             raise
     
-    def _remove_document_chunks(self, document_id: str):
-        """Remove all chunks for a document (placeholder)"""
-        # In production, this would remove from the database
-        logger.info(f"Removing chunks for document {document_id}")
+    def _remove_document_chunks(self, document_id: str) -> int:
+        """Tombstone all chunks of a document; returns the number removed"""
+        with self._write_lock:
+            index = self.vector_store
+            slots = self._chunk_store(index).pop_document(document_id)
+            self._delete_slots(index, slots)
+        logger.info(f"Removed {len(slots)} chunks for document {document_id}")
+        return len(slots)
     
     def delete_document(self, document_id: str):
         """Delete a document and all its chunks"""
         try:
             self._remove_document_chunks(document_id)
+            self.answer_cache.invalidate_documents([document_id])
             logger.info(f"Deleted document {document_id}")
         except Exception as e:
             logger.error(f"Error deleting document: {e}")
@@ -276,33 +700,36 @@ class RAGService:
     
     def get_document_stats(self) -> Dict[str, Any]:
         """Get statistics about stored documents"""
-        # In production, this would query the database
+        index = self.vector_store
+        chunk_store = self._chunk_store(index)
         return {
-            'total_documents': 0,
-            'total_chunks': 0,
-            'embedding_dimensions': self.get_embedding_dimensions(),
-            'model_name': 'all-MiniLM-L6-v2'
+            'total_documents': chunk_store.num_documents,
+            'total_chunks': index.num_live,
+            'deleted_chunks': index.num_deleted,
+            'compactions': self.compactions,
+            'embedding_dimensions': self.embedding_dimension,
+            'model_name': self.model_name,
+            'index_type': self.index_type,
+            'index_dimensions': index.dimension,
+            'projection': projection_version(chunk_store.projection) if chunk_store.projection is not None else None,
+            'snapshot_version': self.snapshot_version,
+            'metadata_index': chunk_store.metadata_index.stats(),
+            'lexical_index': chunk_store.lexical_index.stats(),
+            'query_cache': self.query_cache.stats(),
+            'answer_cache': self.answer_cache.stats(),
+            'query_batcher': self.query_batcher.stats(),
+            'document_batcher': self.document_batcher.stats(),
+            'chunk_cache': self.chunk_cache.stats() if self.chunk_cache is not None else None,
+            'context_assembler': self.context_assembler.stats()
         }
     
     def health_check(self) -> Dict[str, Any]:
-        """Check the health of the RAG service"""
-        try:
-            # Test embedding generation
-            test_embedding = self.generate_embeddings(["test"])
-            
-            # Test LLM generation
-            test_response = self.llm_model.generate("test query", "test context")
-            
-            return {
-                'status': 'healthy',
-                'embedding_model': 'working',
-                'llm_model': 'working',
-                'embedding_dimensions': test_embedding.shape[1],
-                'timestamp': datetime.now().isoformat()
-            }
-        except Exception as e:
-            return {
-                'status': 'unhealthy',
-                'error': str(e),
-                'timestamp': datetime.now().isoformat()
-            }
+        """Report model readiness from cached state, without running the models"""
+        return {
+            'status': 'healthy' if self.ready else 'starting',
+            'embedding_model': 'loaded' if self.embedding_model is not None else 'not_loaded',
+            'llm_model': 'loaded' if self.llm_model is not None else 'not_loaded',
+            'model_name': self.model_name,
+            'embedding_dimensions': self.embedding_dimension,
+            'timestamp': datetime.now().isoformat()
+        }
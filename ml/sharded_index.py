@@ -0,0 +1,227 @@
+"""
+Sharded exact vector index for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+A brute-force scan of one query runs on roughly one core. The ShardedIndex
+keeps the same contiguous normalized matrix as the VectorIndex, but
+allocates it in POSIX shared memory; a full scan is split into contiguous
+row ranges that worker processes score in parallel against their own
+zero-copy mapping of the matrix. Each worker returns its local top-k and
+the parent merges them, so results are the same as a single scan's.
+"""
+
+import atexit
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from vector_index import VectorIndex, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Shard boundaries fall on multiples of this many rows so every shard starts
+# on the same memory alignment and scores bit-for-bit like a single scan
+SHARD_ALIGNMENT = 64
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def search_pool(num_workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by every sharded index with the same worker count"""
+    with _pools_lock:
+        pool = _pools.get(num_workers)
+        if pool is None:
+            # spawn: forking a threaded server process is not safe
+            pool = ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('spawn'))
+            _pools[num_workers] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_search_pools():
+    """Stop every shard worker process"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def shard_bounds(size: int, num_shards: int) -> List[Tuple[int, int]]:
+    """Split rows [0, size) into at most num_shards aligned, contiguous ranges"""
+    blocks = (size + SHARD_ALIGNMENT - 1) // SHARD_ALIGNMENT
+    num_shards = max(1, min(num_shards, blocks))
+    edges = [min(size, (blocks * i // num_shards) * SHARD_ALIGNMENT) for i in range(num_shards + 1)]
+    return [(lo, hi) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+
+# Worker side: the block this process last attached to
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    block = _attached.get(name)
+    if block is None:
+        for stale in _attached.values():
+            stale.close()
+        _attached.clear()
+        block = _attached[name] = shared_memory.SharedMemory(name=name)
+    return block
+
+
+def search_shard(name: str,
+                 shape: Tuple[int, int],
+                 lo: int,
+                 hi: int,
+                 query: np.ndarray,
+                 k: int,
+                 mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k of one row range of a shared-memory vector matrix (runs in a worker)
+
+    Returns:
+        (row slots, scores) of the shard's best rows, best first
+    """
+    vectors = np.ndarray(shape, dtype=np.float32, buffer=_attach(name).buf)
+    scores = vectors[lo:hi] @ query
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    top = top_k_indices(scores, k)
+    if mask is not None:
+        top = top[mask[top]]
+    return top + lo, scores[top]
+
+
+def _release(block: shared_memory.SharedMemory):
+    try:
+        block.close()
+    except BufferError:
+        # Still viewed by an array somewhere; the mapping goes away with it
+        pass
+    try:
+        block.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _release_all(blocks: List[shared_memory.SharedMemory]):
+    while blocks:
+        _release(blocks.pop())
+
+
+class ShardedIndex(VectorIndex):
+    """
+    Exact cosine index whose full scans are scattered across worker processes
+    """
+
+    def __init__(self,
+                 num_shards: int = 4,
+                 min_shard_rows: int = 16384,
+                 **kwargs):
+        """
+        Args:
+            num_shards: Worker processes (and row ranges) a full scan is split into
+            min_shard_rows: Scans are only split into shards of at least this many
+                rows; smaller indexes are searched in-process
+            **kwargs: Passed to VectorIndex
+        """
+        super().__init__(**kwargs)
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        self.num_shards = num_shards
+        self.min_shard_rows = max(SHARD_ALIGNMENT, min_shard_rows)
+
+        # Shared memory blocks owned by this index, newest last; the previous
+        # one is kept because a search started before the last growth may
+        # still be attaching to it
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self._finalizer = weakref.finalize(self, _release_all, self._blocks)
+
+        # (matrix, block backing it), replaced in one assignment once a grown
+        # matrix holds every published row
+        self._published: Optional[Tuple[np.ndarray, shared_memory.SharedMemory]] = None
+
+    @classmethod
+    def from_storage(cls, vectors, ids, texts, metadatas) -> 'ShardedIndex':
+        """Wrap existing storage, copying the vectors into shared memory"""
+        index = super().from_storage(vectors, ids, texts, metadatas)
+        shared = index._allocate(max(1, index._size))
+        shared[:index._size] = vectors
+        index._vectors = shared
+        index._published = (shared, index._blocks[-1])
+        return index
+
+    def _allocate(self, rows: int) -> np.ndarray:
+        """Allocate the vector matrix in a new shared memory block"""
+        block = shared_memory.SharedMemory(create=True, size=max(1, rows * self.dimension * 4))
+        while len(self._blocks) > 1:
+            _release(self._blocks.pop(0))
+        self._blocks.append(block)
+        return np.ndarray((rows, self.dimension), dtype=np.float32, buffer=block.buf)
+
+    def _reserve(self, required: int):
+        """Grow the shared matrix, publishing it once the existing rows are copied"""
+        vectors = self._vectors
+        super()._reserve(required)
+        if self._vectors is not vectors:
+            self._published = (self._vectors, self._blocks[-1])
+
+    def search(self,
+               query_embedding: np.ndarray,
+               k: int = 5,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Find the k most similar chunks, scanning shards in parallel
+
+        Args:
+            query_embedding: Query vector of shape (dimension,)
+            k: Number of results to return
+            mask: Optional boolean row mask; only rows where it is True are returned
+
+        Returns:
+            List of (row slot, cosine similarity) pairs, best first
+        """
+        size = self._size
+        published = self._published
+        num_shards = min(self.num_shards, size // self.min_shard_rows)
+        if num_shards <= 1 or k <= 0 or published is None:
+            return super().search(query_embedding, k, mask)
+
+        query = self._normalize_query(query_embedding)
+        mask = self._effective_mask(mask)
+        if mask is not None:
+            mask = self._check_mask(mask)[:size]
+            selected = np.flatnonzero(mask)
+            if selected.shape[0] <= self._prefilter_limit():
+                return self.search_slots(query, k, selected)
+
+        vectors, block = published
+        pool = search_pool(self.num_shards)
+        futures = [
+            pool.submit(search_shard, block.name, vectors.shape, lo, hi, query, k,
+                        None if mask is None else mask[lo:hi])
+            for lo, hi in shard_bounds(size, num_shards)
+        ]
+        shard_results = [future.result() for future in futures]
+
+        # Shards are in slot order, so the stable merge breaks ties like a single scan
+        slots = np.concatenate([slots for slots, _ in shard_results])
+        scores = np.concatenate([scores for _, scores in shard_results])
+        top = top_k_indices(scores, k)
+        return [(int(slots[i]), float(scores[i])) for i in top]
+
+    def clear(self):
+        """Remove every chunk; shared memory is reallocated on the next insert"""
+        super().clear()
+        self._published = None
+        _release_all(self._blocks)
+
+    def close(self):
+        """Release the shared memory now rather than at garbage collection"""
+        self.clear()
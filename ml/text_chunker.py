@@ -0,0 +1,92 @@
+"""
+Streaming text chunker for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+Splits documents into overlapping chunks of at most `chunk_size` characters,
+preferring to end each chunk at a sentence boundary near the size limit, then
+at a word boundary, and only then mid-word. Boundaries are found by running
+precompiled regexes over each chunk's lookback window only, so the document
+is never scanned character by character in Python; chunks are yielded
+lazily and every step is guaranteed to advance, whatever the overlap.
+"""
+
+import re
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+# Sentence punctuation (plus closing quotes/brackets) followed by whitespace,
+# or a paragraph break; "80C.1" and "Rs.500" are not boundaries
+_SENTENCE_END = re.compile(r'[.!?][.!?"\')\]]*(?=\s)|\n[ \t]*(?=\n)')
+
+# The same boundary, but the last one in the searched span: the greedy prefix
+# backtracks from the end inside the regex engine
+_LAST_SENTENCE_END = re.compile(r'.*(?:' + _SENTENCE_END.pattern + ')', re.DOTALL)
+
+
+class TextChunk(NamedTuple):
+    """A chunk and its character span in the source document"""
+    text: str
+    start: int
+    end: int
+    num_tokens: Optional[int] = None
+
+
+def sentence_boundaries(text: str) -> List[int]:
+    """Offsets just past every sentence end in text, ascending"""
+    return [match.end() for match in _SENTENCE_END.finditer(text)]
+
+
+def last_sentence_boundary(text: str, start: int, end: int) -> int:
+    """Offset just past the last sentence end within text[start:end], or -1"""
+    # One extra character so the whitespace lookahead can see past the window
+    match = _LAST_SENTENCE_END.match(text, start, end + 1)
+    return match.end() if match else -1
+
+
+def iter_chunks(text: str,
+                chunk_size: int = 500,
+                overlap: int = 50,
+                lookback: int = 100,
+                token_counter: Optional[Callable[[str], int]] = None) -> Iterator[TextChunk]:
+    """
+    Lazily split text into overlapping chunks
+
+    Args:
+        text: Document text
+        chunk_size: Maximum chunk length in characters
+        overlap: Characters shared between consecutive chunks
+        lookback: How far before the size limit to look for a boundary
+        token_counter: Optional function counting tokenizer tokens per chunk
+
+    Yields:
+        TextChunk with stripped text, its span and (optionally) token count
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must be non-negative and smaller than chunk_size")
+
+    length = len(text)
+    start = 0
+
+    while start < length:
+        end = min(start + chunk_size, length)
+
+        if end < length:
+            # Cut after the overlap so the next chunk always starts further on
+            floor = max(start + overlap + 1, end - lookback)
+            boundary = last_sentence_boundary(text, floor, end)
+            if boundary != -1:
+                end = boundary
+            else:
+                space = text.rfind(' ', floor, end)
+                if space != -1:
+                    end = space
+
+        chunk = text[start:end].strip()
+        if chunk:
+            num_tokens = token_counter(chunk) if token_counter is not None else None
+            yield TextChunk(chunk, start, end, num_tokens)
+
+        if end >= length:
+            break
+        start = end - overlap
@@ -0,0 +1,389 @@
+"""
+In-memory vector index for the RAG service
+FinTwin AI Financial Twin - Retrieval Layer
+
+Chunk embeddings live in one contiguous, L2-normalized float32 matrix so that
+cosine similarity for a query is a single matrix-vector product. Chunk ids,
+text and metadata are kept in parallel lists indexed by the same row slot.
+Deleted rows are tombstoned and skipped by search until the owner rebuilds
+a compacted index.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 copies of the rows scaled to unit L2 norm"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k highest scores in every row, best first"""
+    n = scores.shape[1]
+    if k <= 0 or n == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, axis=1, kind='stable')
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class VectorIndex:
+    """
+    Exact (brute-force) cosine similarity index over chunk embeddings
+    """
+
+    # Filter masks matching at most this fraction of the rows are searched by
+    # scoring only the matching rows (pre-filter); broader masks are applied
+    # to the scores of a full scan instead
+    prefilter_selectivity = 0.2
+
+    # Queries scored per matrix-matrix product in search_batch; bounds the
+    # score block to batch_block_rows x rows floats
+    batch_block_rows = 64
+
+    def __init__(self,
+                 dimension: Optional[int] = None,
+                 initial_capacity: int = 1024,
+                 growth_factor: float = 2.0):
+        """
+        Initialize an empty index
+
+        Args:
+            dimension: Embedding dimension; inferred from the first insert if None
+            initial_capacity: Number of rows allocated on first insert
+            growth_factor: Capacity multiplier applied when the matrix is full
+        """
+        if growth_factor <= 1.0:
+            raise ValueError("growth_factor must be greater than 1")
+
+        self.dimension = dimension
+        self.initial_capacity = max(1, initial_capacity)
+        self.growth_factor = growth_factor
+
+        self._vectors = np.empty((0, dimension or 0), dtype=np.float32)
+        self._size = 0
+
+        # Parallel arrays, one entry per row of the vector matrix
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+
+        # Deleted row slots; rows past the end of the array are live
+        self._tombstones = np.zeros(0, dtype=np.bool_)
+        self.num_deleted = 0
+
+    @classmethod
+    def from_storage(cls,
+                     vectors: np.ndarray,
+                     ids: Sequence[str],
+                     texts: Sequence[str],
+                     metadatas: Sequence[Dict[str, Any]]) -> 'VectorIndex':
+        """
+        Wrap existing, already-normalized storage without copying it
+
+        Used to serve memory-mapped snapshots; the first insert afterwards
+        copies the vectors onto the heap.
+        """
+        index = cls(dimension=vectors.shape[1], initial_capacity=max(1, vectors.shape[0]))
+        index._vectors = vectors
+        index._size = vectors.shape[0]
+        index.ids = ids
+        index.texts = texts
+        index.metadatas = metadatas
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._vectors.shape[0]
+
+    @property
+    def num_live(self) -> int:
+        return self._size - self.num_deleted
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Read-only view of the populated rows"""
+        view = self._vectors[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def _allocate(self, rows: int) -> np.ndarray:
+        """Allocate backing storage for `rows` vectors"""
+        return np.empty((rows, self.dimension), dtype=np.float32)
+
+    def _reserve(self, required: int):
+        """Grow the vector matrix so that it holds at least `required` rows"""
+        if required <= self.capacity:
+            return
+
+        new_capacity = max(self.initial_capacity, self.capacity)
+        while new_capacity < required:
+            new_capacity = int(new_capacity * self.growth_factor) + 1
+
+        grown = self._allocate(new_capacity)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+        logger.debug(f"Vector index capacity grown to {new_capacity} rows")
+
+    def add(self,
+            ids: List[str],
+            texts: List[str],
+            embeddings: np.ndarray,
+            metadatas: Optional[List[Dict[str, Any]]] = None) -> List[int]:
+        """
+        Append chunks to the index
+
+        Args:
+            ids: Chunk identifiers
+            texts: Chunk text
+            embeddings: Matrix of shape (len(ids), dimension)
+            metadatas: Per-chunk metadata dictionaries
+
+        Returns:
+            Row slots assigned to the new chunks
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        if metadatas is None:
+            metadatas = [{} for _ in ids]
+
+        if not (len(ids) == len(texts) == len(metadatas) == embeddings.shape[0]):
+            raise ValueError("ids, texts, embeddings and metadatas must have the same length")
+        if not ids:
+            return []
+
+        if self.dimension is None:
+            self.dimension = embeddings.shape[1]
+            self._vectors = np.empty((0, self.dimension), dtype=np.float32)
+        elif embeddings.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {embeddings.shape[1]} does not match index dimension {self.dimension}"
+            )
+
+        start = self._size
+        end = start + len(ids)
+        self._reserve(end)
+        self._vectors[start:end] = normalize_rows(embeddings)
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas)
+        self._prepare_rows(start, end)
+
+        # Publish the rows last so concurrent searches never see a partial chunk
+        self._size = end
+
+        return list(range(start, end))
+
+    def _prepare_rows(self, start: int, end: int):
+        """Hook for subclasses to index rows [start, end) before searches can see them"""
+
+    def _normalize_query(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Unit-norm float32 query, checked against the index dimension"""
+        query = normalize_rows(query_embedding)[0]
+        if query.shape[0] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query.shape[0]} does not match index dimension {self.dimension}"
+            )
+        return query
+
+    def _check_mask(self, mask: np.ndarray) -> np.ndarray:
+        """Boolean mask aligned to the populated rows; rows beyond the mask do not match"""
+        mask = np.asarray(mask, dtype=np.bool_)
+        if mask.shape[0] < self._size:
+            mask = np.concatenate([mask, np.zeros(self._size - mask.shape[0], dtype=np.bool_)])
+        return mask[:self._size]
+
+    def delete(self, slots: Sequence[int]) -> int:
+        """
+        Tombstone row slots so that search skips them
+
+        Args:
+            slots: Row slots to delete
+
+        Returns:
+            Number of rows newly deleted
+        """
+        slots = np.unique(np.asarray(slots, dtype=np.int64))
+        if slots.shape[0] == 0:
+            return 0
+        if slots[0] < 0 or slots[-1] >= self._size:
+            raise IndexError("slot out of range")
+
+        if self._tombstones.shape[0] < self._size:
+            grown = np.zeros(max(self.capacity, self._size), dtype=np.bool_)
+            grown[:self._tombstones.shape[0]] = self._tombstones
+            self._tombstones = grown
+
+        newly_deleted = slots[~self._tombstones[slots]]
+        self._tombstones[newly_deleted] = True
+        self.num_deleted += int(newly_deleted.shape[0])
+        return int(newly_deleted.shape[0])
+
+    def live_mask(self) -> Optional[np.ndarray]:
+        """Boolean mask of rows that are not deleted, or None when nothing is deleted"""
+        if self.num_deleted == 0:
+            return None
+        live = np.ones(self._size, dtype=np.bool_)
+        count = min(self._size, self._tombstones.shape[0])
+        live[:count] = ~self._tombstones[:count]
+        return live
+
+    def _effective_mask(self, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Caller's mask combined with the tombstones"""
+        live = self.live_mask()
+        if live is None:
+            return mask
+        return live if mask is None else self._check_mask(mask) & live
+
+    def _prefilter_limit(self) -> int:
+        """Largest number of matching rows that is searched by pre-filtering"""
+        return int(self.prefilter_selectivity * self._size)
+
+    def search(self,
+               query_embedding: np.ndarray,
+               k: int = 5,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Find the k most similar chunks to a query embedding
+
+        Args:
+            query_embedding: Query vector of shape (dimension,)
+            k: Number of results to return
+            mask: Optional boolean row mask; only rows where it is True are returned
+
+        Returns:
+            List of (row slot, cosine similarity) pairs, best first
+        """
+        if self._size == 0 or k <= 0:
+            return []
+
+        query = self._normalize_query(query_embedding)
+        mask = self._effective_mask(mask)
+        if mask is not None:
+            mask = self._check_mask(mask)
+            selected = np.flatnonzero(mask)
+            if selected.shape[0] <= self._prefilter_limit():
+                return self.search_slots(query, k, selected)
+
+        scores = self._vectors[:self._size] @ query
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        top = top_k_indices(scores, k)
+        return [(int(i), float(scores[i])) for i in top if mask is None or mask[i]]
+
+    def search_batch(self,
+                     query_embeddings: np.ndarray,
+                     k: int = 5,
+                     mask: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Find the k most similar chunks for each of several queries
+
+        All queries are scored with one matrix-matrix product per block of
+        batch_block_rows queries, followed by a row-wise top-k.
+
+        Args:
+            query_embeddings: Query matrix of shape (num_queries, dimension)
+            k: Number of results per query
+            mask: Optional boolean row mask shared by every query
+
+        Returns:
+            One list of (row slot, cosine similarity) pairs per query, best first
+        """
+        queries = normalize_rows(query_embeddings)
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+        if queries.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension {queries.shape[1]} does not match index dimension {self.dimension}"
+            )
+
+        size = self._size
+        rows = None
+        mask = self._effective_mask(mask)
+        if mask is not None:
+            mask = self._check_mask(mask)
+            selected = np.flatnonzero(mask)
+            if selected.shape[0] <= self._prefilter_limit():
+                # Pre-filter: score only the matching rows
+                rows, mask = selected, None
+        vectors = self._vectors[:size] if rows is None else self._vectors[rows]
+
+        results = []
+        for start in range(0, queries.shape[0], self.batch_block_rows):
+            scores = queries[start:start + self.batch_block_rows] @ vectors.T
+            if mask is not None:
+                scores[:, ~mask] = -np.inf
+            for row_scores, top in zip(scores, top_k_rows(scores, k)):
+                if mask is not None:
+                    top = top[mask[top]]
+                slots = top if rows is None else rows[top]
+                results.append([(int(slot), float(score)) for slot, score in zip(slots, row_scores[top])])
+        return results
+
+    def search_slots(self, query_embedding: np.ndarray, k: int, slots: np.ndarray) -> List[Tuple[int, float]]:
+        """
+        Exact search restricted to the given row slots
+
+        Args:
+            query_embedding: Query vector of shape (dimension,)
+            k: Number of results to return
+            slots: Candidate row slots
+
+        Returns:
+            List of (row slot, cosine similarity) pairs, best first
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        live = self.live_mask()
+        if live is not None:
+            slots = slots[live[slots]]
+        if slots.shape[0] == 0 or k <= 0:
+            return []
+
+        query = self._normalize_query(query_embedding)
+        scores = self._vectors[slots] @ query
+        top = top_k_indices(scores, k)
+        return [(int(slots[i]), float(scores[i])) for i in top]
+
+    def get(self, slot: int) -> Dict[str, Any]:
+        """Return the stored chunk at a row slot"""
+        return {
+            'id': self.ids[slot],
+            'content': self.texts[slot],
+            'metadata': self.metadatas[slot]
+        }
+
+    def clear(self):
+        """Remove every chunk from the index"""
+        self._vectors = np.empty((0, self.dimension or 0), dtype=np.float32)
+        self._size = 0
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self._tombstones = np.zeros(0, dtype=np.bool_)
+        self.num_deleted = 0